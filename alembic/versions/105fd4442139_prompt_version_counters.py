@@ -0,0 +1,89 @@
+"""prompt version counters
+
+latest_version, version_count and latest_content_hash on prompts, backfilled
+from prompt_versions so the next edit of an existing prompt reserves the
+right number. Version numbers become unique per prompt; histories that
+already have duplicates are renumbered in (version_number, id) order first.
+
+Revision ID: 105fd4442139
+Revises: bd33c9f610d7
+Create Date: 2026-10-19 11:25:34.248943
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '105fd4442139'
+down_revision: Union[str, Sequence[str], None] = 'bd33c9f610d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    columns = {c["name"] for c in inspector.get_columns("prompts")}
+    if "latest_version" not in columns:
+        op.add_column("prompts", sa.Column("latest_version", sa.Integer(), nullable=False, server_default="0"))
+    if "version_count" not in columns:
+        op.add_column("prompts", sa.Column("version_count", sa.Integer(), nullable=False, server_default="0"))
+    if "latest_content_hash" not in columns:
+        op.add_column("prompts", sa.Column("latest_content_hash", sa.String(64), nullable=True))
+
+    indexes = {i["name"]: i for i in inspector.get_indexes("prompt_versions")}
+    version_index = indexes.get("ix_prompt_versions_prompt_id_version_number")
+    if version_index is None or not version_index["unique"]:
+        op.execute(
+            """
+            UPDATE prompt_versions SET version_number = (
+                SELECT renumbered.n FROM (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY prompt_id ORDER BY version_number, id) AS n
+                    FROM prompt_versions
+                ) AS renumbered
+                WHERE renumbered.id = prompt_versions.id
+            )
+            WHERE prompt_id IN (
+                SELECT prompt_id FROM prompt_versions GROUP BY prompt_id, version_number HAVING COUNT(*) > 1
+            )
+            """
+        )
+        if version_index is not None:
+            op.drop_index("ix_prompt_versions_prompt_id_version_number", table_name="prompt_versions")
+        op.create_index(
+            "ix_prompt_versions_prompt_id_version_number",
+            "prompt_versions",
+            ["prompt_id", "version_number"],
+            unique=True,
+        )
+
+    # Also corrects prompts written by the new code before this migration ran
+    op.execute(
+        """
+        UPDATE prompts SET
+            latest_version = COALESCE(
+                (SELECT MAX(v.version_number) FROM prompt_versions v WHERE v.prompt_id = prompts.id), 0
+            ),
+            version_count = (SELECT COUNT(*) FROM prompt_versions v WHERE v.prompt_id = prompts.id),
+            latest_content_hash = (
+                SELECT v.content_hash FROM prompt_versions v
+                WHERE v.prompt_id = prompts.id
+                ORDER BY v.version_number DESC
+                LIMIT 1
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_prompt_versions_prompt_id_version_number", table_name="prompt_versions")
+    op.create_index("ix_prompt_versions_prompt_id_version_number", "prompt_versions", ["prompt_id", "version_number"])
+    with op.batch_alter_table("prompts") as batch:
+        batch.drop_column("latest_content_hash")
+        batch.drop_column("version_count")
+        batch.drop_column("latest_version")
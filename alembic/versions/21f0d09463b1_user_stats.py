@@ -0,0 +1,42 @@
+"""user stats
+
+The per-user dashboard summary. New users get their row at signup; rows for
+existing users are built from their prompts on first use by
+rebuild_user_stats, which inserts with ON CONFLICT DO NOTHING.
+
+Revision ID: 21f0d09463b1
+Revises: d1328f016448
+Create Date: 2026-10-19 11:34:45.967197
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '21f0d09463b1'
+down_revision: Union[str, Sequence[str], None] = 'd1328f016448'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if "user_stats" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("prompt_count", sa.Integer(), nullable=False),
+        sa.Column("version_count", sa.Integer(), nullable=False),
+        sa.Column("last_updated", sa.DateTime(), nullable=True),
+        sa.Column("recent_prompts", sa.JSON(), nullable=False),
+        sa.Column("updated_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_stats")
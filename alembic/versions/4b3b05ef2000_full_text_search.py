@@ -0,0 +1,102 @@
+"""full text search
+
+Postgres: a generated, weighted tsvector column with a GIN index.
+SQLite: an FTS5 external-content table kept current by triggers; skipped
+when the SQLite build has no FTS5, and search falls back to substring matching.
+
+Revision ID: 4b3b05ef2000
+Revises: b265851af311
+Create Date: 2026-10-19 11:21:43.223748
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b3b05ef2000'
+down_revision: Union[str, Sequence[str], None] = 'b265851af311'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Title matches outrank description matches, which outrank content matches.
+POSTGRES_UPGRADE = [
+    """
+    ALTER TABLE prompts ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_prompts_search_vector ON prompts USING GIN (search_vector)",
+]
+
+POSTGRES_DOWNGRADE = [
+    "DROP INDEX IF EXISTS ix_prompts_search_vector",
+    "ALTER TABLE prompts DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_UPGRADE = [
+    """
+    CREATE TRIGGER IF NOT EXISTS prompts_fts_ai AFTER INSERT ON prompts BEGIN
+        INSERT INTO prompts_fts(rowid, title, description, content)
+        VALUES (new.id, new.title, new.description, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS prompts_fts_ad AFTER DELETE ON prompts BEGIN
+        INSERT INTO prompts_fts(prompts_fts, rowid, title, description, content)
+        VALUES ('delete', old.id, old.title, old.description, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS prompts_fts_au AFTER UPDATE OF title, description, content ON prompts BEGIN
+        INSERT INTO prompts_fts(prompts_fts, rowid, title, description, content)
+        VALUES ('delete', old.id, old.title, old.description, old.content);
+        INSERT INTO prompts_fts(rowid, title, description, content)
+        VALUES (new.id, new.title, new.description, new.content);
+    END
+    """,
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS prompts_fts_au",
+    "DROP TRIGGER IF EXISTS prompts_fts_ad",
+    "DROP TRIGGER IF EXISTS prompts_fts_ai",
+    "DROP TABLE IF EXISTS prompts_fts",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for ddl in POSTGRES_UPGRADE:
+            op.execute(ddl)
+    elif bind.dialect.name == "sqlite":
+        if "prompts_fts" not in sa.inspect(bind).get_table_names():
+            try:
+                op.execute(
+                    "CREATE VIRTUAL TABLE prompts_fts USING fts5("
+                    "title, description, content, content='prompts', content_rowid='id')"
+                )
+            except sa.exc.OperationalError:
+                return  # no FTS5 in this SQLite build
+            op.execute("INSERT INTO prompts_fts(prompts_fts) VALUES ('rebuild')")
+        for ddl in SQLITE_UPGRADE:
+            op.execute(ddl)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        for ddl in POSTGRES_DOWNGRADE:
+            op.execute(ddl)
+    elif dialect == "sqlite":
+        for ddl in SQLITE_DOWNGRADE:
+            op.execute(ddl)
@@ -0,0 +1,51 @@
+"""partial live prompts index
+
+Replaces the (user_id, updated_at, id) keyset index with one restricted to
+prompts that aren't soft-deleted. Every query on it filters deleted_at IS NULL,
+and the fuzzy search cache's per-keystroke COUNT can then be answered from the
+index alone. The new index is built before the old one is dropped.
+
+Revision ID: 7c3f2a9e5b14
+Revises: e44d31ceb026
+Create Date: 2026-10-19 12:05:12.418337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3f2a9e5b14'
+down_revision: Union[str, Sequence[str], None] = 'e44d31ceb026'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _index_names(table: str) -> set[str]:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    indexes = _index_names("prompts")
+    if "ix_prompts_live_user_id_updated_at_id" not in indexes:
+        op.create_index(
+            "ix_prompts_live_user_id_updated_at_id",
+            "prompts",
+            ["user_id", "updated_at", "id"],
+            postgresql_where=sa.text("deleted_at IS NULL"),
+            sqlite_where=sa.text("deleted_at IS NULL"),
+        )
+    if "ix_prompts_user_id_updated_at_id" in indexes:
+        op.drop_index("ix_prompts_user_id_updated_at_id", table_name="prompts")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    indexes = _index_names("prompts")
+    if "ix_prompts_user_id_updated_at_id" not in indexes:
+        op.create_index("ix_prompts_user_id_updated_at_id", "prompts", ["user_id", "updated_at", "id"])
+    if "ix_prompts_live_user_id_updated_at_id" in indexes:
+        op.drop_index("ix_prompts_live_user_id_updated_at_id", table_name="prompts")
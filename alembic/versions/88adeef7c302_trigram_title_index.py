@@ -0,0 +1,41 @@
+"""trigram title index
+
+Postgres only: pg_trgm and a GIN trigram index on prompts.title. Creating the
+extension needs privileges the app role may not have; without it fuzzy search
+uses the in-process trigram index.
+
+Revision ID: 88adeef7c302
+Revises: 4b3b05ef2000
+Create Date: 2026-10-19 11:22:55.438447
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '88adeef7c302'
+down_revision: Union[str, Sequence[str], None] = '4b3b05ef2000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    try:
+        with bind.begin_nested():
+            op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except sa.exc.DBAPIError:
+        return
+    op.execute("CREATE INDEX IF NOT EXISTS ix_prompts_title_trgm ON prompts USING GIN (title gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_prompts_title_trgm")
@@ -0,0 +1,38 @@
+"""keyset pagination indexes
+
+Revision ID: b265851af311
+Revises: dc9b5bd601dc
+Create Date: 2026-10-19 11:21:01.546680
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b265851af311'
+down_revision: Union[str, Sequence[str], None] = 'dc9b5bd601dc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _index_names(table: str) -> set[str]:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if "ix_prompts_user_id_updated_at_id" not in _index_names("prompts"):
+        op.create_index("ix_prompts_user_id_updated_at_id", "prompts", ["user_id", "updated_at", "id"])
+    if "ix_prompt_versions_prompt_id_version_number" not in _index_names("prompt_versions"):
+        op.create_index(
+            "ix_prompt_versions_prompt_id_version_number", "prompt_versions", ["prompt_id", "version_number"]
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_prompt_versions_prompt_id_version_number", table_name="prompt_versions")
+    op.drop_index("ix_prompts_user_id_updated_at_id", table_name="prompts")
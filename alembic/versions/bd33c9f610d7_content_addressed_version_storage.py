@@ -0,0 +1,58 @@
+"""content addressed version storage
+
+Version bodies move to version_contents (full snapshots or deltas, keyed by
+sha256). Existing prompt_versions rows keep their full `content` and are read
+as before; only new versions set `content_hash`.
+
+Revision ID: bd33c9f610d7
+Revises: 88adeef7c302
+Create Date: 2026-10-19 11:24:00.692345
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bd33c9f610d7'
+down_revision: Union[str, Sequence[str], None] = '88adeef7c302'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+
+    if "version_contents" not in inspector.get_table_names():
+        op.create_table(
+            "version_contents",
+            sa.Column("hash", sa.String(64), primary_key=True),
+            sa.Column("base_hash", sa.String(64), sa.ForeignKey("version_contents.hash")),
+            sa.Column("depth", sa.Integer(), nullable=False),
+            sa.Column("data", sa.LargeBinary(), nullable=False),
+            sa.Column("size", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+        )
+    if "ix_version_contents_base_hash" not in {i["name"] for i in inspector.get_indexes("version_contents")}:
+        op.create_index("ix_version_contents_base_hash", "version_contents", ["base_hash"])
+
+    columns = {c["name"]: c for c in inspector.get_columns("prompt_versions")}
+    with op.batch_alter_table("prompt_versions") as batch:
+        if "content_hash" not in columns:
+            batch.add_column(sa.Column("content_hash", sa.String(64), nullable=True))
+            batch.create_foreign_key(
+                "fk_prompt_versions_content_hash", "version_contents", ["content_hash"], ["hash"]
+            )
+        if not columns["content"]["nullable"]:
+            batch.alter_column("content", existing_type=sa.Text(), nullable=True)
+    if "ix_prompt_versions_content_hash" not in {i["name"] for i in inspector.get_indexes("prompt_versions")}:
+        op.create_index("ix_prompt_versions_content_hash", "prompt_versions", ["content_hash"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Versions written since the upgrade only exist as (delta-compressed) rows in version_contents
+    raise NotImplementedError("version bodies in version_contents can't be moved back; restore a backup instead")
@@ -0,0 +1,64 @@
+"""soft delete and cascading foreign keys
+
+prompts.deleted_at for soft deletes, and ON DELETE CASCADE on every foreign key
+the set-based deletes rely on (the baseline created prompt_versions.user_id
+without it).
+
+Revision ID: d1328f016448
+Revises: 105fd4442139
+Create Date: 2026-10-19 11:27:28.644014
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1328f016448'
+down_revision: Union[str, Sequence[str], None] = '105fd4442139'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column, referred table) that must cascade
+CASCADES = [
+    ("prompts", "user_id", "users"),
+    ("prompt_versions", "prompt_id", "prompts"),
+    ("prompt_versions", "user_id", "users"),
+]
+
+# Names for constraints SQLite reflects without one, so batch mode can drop them
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def _set_ondelete(table: str, column: str, referred: str, ondelete: str | None):
+    inspector = sa.inspect(op.get_bind())
+    fk = next(
+        fk for fk in inspector.get_foreign_keys(table)
+        if fk["constrained_columns"] == [column] and fk["referred_table"] == referred
+    )
+    if (fk["options"].get("ondelete") or "").upper() == (ondelete or "").upper():
+        return
+    name = f"fk_{table}_{column}_{referred}"
+    with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch:
+        batch.drop_constraint(fk["name"] or name, type_="foreignkey")
+        batch.create_foreign_key(name, referred, [column], ["id"], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("prompts")}
+    if "deleted_at" not in columns:
+        op.add_column("prompts", sa.Column("deleted_at", sa.DateTime(), nullable=True))
+
+    for table, column, referred in CASCADES:
+        _set_ondelete(table, column, referred, "CASCADE")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _set_ondelete("prompt_versions", "user_id", "users", None)
+    with op.batch_alter_table("prompts") as batch:
+        batch.drop_column("deleted_at")
@@ -0,0 +1,75 @@
+"""baseline schema
+
+The tables as the app created them with Base.metadata.create_all before
+migrations existed. Databases from that time have no alembic_version table,
+so every revision checks what is already there instead of assuming.
+
+Revision ID: dc9b5bd601dc
+Revises: 
+Create Date: 2026-10-19 11:21:00.871300
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dc9b5bd601dc'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if "users" not in tables:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("hashed_password", sa.LargeBinary(), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+        op.create_index("ix_users_id", "users", ["id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "prompts" not in tables:
+        op.create_table(
+            "prompts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("embedding", sa.JSON()),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE")),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+        op.create_index("ix_prompts_id", "prompts", ["id"])
+        op.create_index("ix_prompts_title", "prompts", ["title"])
+        op.create_index("ix_prompts_user_id", "prompts", ["user_id"])
+
+    if "prompt_versions" not in tables:
+        op.create_table(
+            "prompt_versions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("prompt_id", sa.Integer(), sa.ForeignKey("prompts.id", ondelete="CASCADE")),
+            sa.Column("version_number", sa.Integer(), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_prompt_versions_id", "prompt_versions", ["id"])
+        op.create_index("ix_prompt_versions_prompt_id", "prompt_versions", ["prompt_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("prompt_versions")
+    op.drop_table("prompts")
+    op.drop_table("users")
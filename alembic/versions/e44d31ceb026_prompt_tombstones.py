@@ -0,0 +1,44 @@
+"""prompt tombstones
+
+Deleted prompt ids for incremental exports. Prompts deleted before this
+revision leave no tombstone, so clients that synced earlier should run one
+full export after upgrading.
+
+Revision ID: e44d31ceb026
+Revises: 21f0d09463b1
+Create Date: 2026-10-19 11:35:40.893874
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e44d31ceb026'
+down_revision: Union[str, Sequence[str], None] = '21f0d09463b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if "prompt_tombstones" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "prompt_tombstones",
+        sa.Column("prompt_id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_prompt_tombstones_user_id_deleted_at_prompt_id",
+        "prompt_tombstones",
+        ["user_id", "deleted_at", "prompt_id"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("prompt_tombstones")
@@ -1,19 +1,25 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from sqlalchemy.orm import Session
-from app.core.deps import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.deps import get_async_db
+from app.core.password_hasher import password_hasher
 from app.core.security import create_access_token
+from app.core.timing import TimedRoute
 from app.schemas import UserCreate, UserOut, UserLogin, Token
-from app.crud import get_user_by_email, create_user, authenticate_user
+from app.crud import create_user, update_password_hash
+from app.crud import crud_async
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+# bcrypt runs in the password hasher's process pool, so these routes only await
+# and never tie up the request threadpool while hashing.
 
 @router.post("/signup", status_code=status.HTTP_201_CREATED, response_model=UserOut)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new user account
     """
     # Check if user already exists
-    db_user = get_user_by_email(db, email=user.email)
+    db_user = await crud_async.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -21,22 +27,28 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    new_user = create_user(db, user)
+    hashed_password = await password_hasher.hash(user.password)
+    new_user = await db.run_sync(create_user, user, hashed_password)
     return new_user
 
 @router.post("/login", response_model=Token)
-def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """
     Login with email and password to get access token
     """
     # Authenticate user
-    db_user = authenticate_user(db, user.email, user.password)
-    if not db_user:
+    db_user = await crud_async.get_user_by_email(db, email=user.email)
+    if not db_user or not await password_hasher.verify(user.password, db_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Upgrade hashes made with an older BCRYPT_ROUNDS while we have the plaintext
+    if password_hasher.needs_rehash(db_user.hashed_password):
+        hashed_password = await password_hasher.hash(user.password)
+        await db.run_sync(update_password_hash, db_user, hashed_password)
     
     # Create access token
     access_token = create_access_token(data={"sub": db_user.email})
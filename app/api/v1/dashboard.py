@@ -1,23 +1,17 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.deps import get_db, get_current_user
-from app.models import User,Prompt
-from app.crud import get_total_prompts, get_recent_prompts
+from app.core.deps import get_async_db, get_current_user
+from app.core.timing import TimedRoute
+from app.models import User
+from app.crud import get_user_stats
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/")
-def get_dashboard(
-    db: Session = Depends(get_db),
+async def get_dashboard(
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ):
-    total_prompts = get_total_prompts(db, user.id)
-    recent_prompts = get_recent_prompts(db, user.id)
-    last_updated = recent_prompts[0]["updated_at"] if recent_prompts and recent_prompts[0] else None
-    
-    return {
-        "total_prompts": total_prompts,
-        "last_updated": last_updated,
-        "recent_prompts": recent_prompts,
-    }
\ No newline at end of file
+    # Precomputed by the prompt write paths, so this is a cache hit or a single primary-key lookup
+    return await db.run_sync(get_user_stats, user.id)
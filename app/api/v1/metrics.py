@@ -1,14 +1,65 @@
 from app.core.metrics import metrics
-from fastapi import APIRouter
+from app.core.database import engine, async_engine, replica_engines, async_replica_engines
+from app.core.pool_metrics import pool_snapshot
+from app.core.sql_stats import sql_stats
+from app.core.config import SQL_STATS_ENABLED, PROFILE_MAX_SECONDS
+from app.core.deps import get_current_admin
+from app.core.profiler import stack_sampler, collapsed, top_functions, without_idle
+from app.models.user import User
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.core.timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
 
 @router.get("/", summary="Get system metrics")
 def get_metrics():
     return {
-        "total_requests": metrics.total_requests,
-        "total_errors": metrics.total_errors,
-        "total_domain_errors": metrics.total_domain_errors,
-        "total_internal_errors": metrics.total_internal_errors,
-        "average_response_time_ms": metrics.average_response_time,
-    }
\ No newline at end of file
+        **metrics.snapshot(),
+        "db_pool": {
+            "sync": pool_snapshot(engine),
+            "async": pool_snapshot(async_engine.sync_engine),
+            "replicas": [pool_snapshot(e) for e in replica_engines],
+            "async_replicas": [pool_snapshot(e.sync_engine) for e in async_replica_engines],
+        },
+    }
+
+@router.get("/prometheus", summary="Get metrics in Prometheus text format", response_class=PlainTextResponse)
+def get_prometheus_metrics():
+    return PlainTextResponse(metrics.prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@router.get("/sql", summary="Get the most expensive SQL statements")
+def get_sql_metrics(limit: int = Query(20, ge=1, le=200)):
+    """
+    Normalized statements by total time in this worker (needs SQL_STATS_ENABLED=true)
+    """
+    return {"enabled": SQL_STATS_ENABLED, "statements": sql_stats.top(limit)}
+
+@router.get("/profile", summary="Sample this worker's stacks (admin only)", response_class=PlainTextResponse)
+async def get_profile(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+    idle: bool = Query(False, description="Keep samples of threads waiting for work"),
+    admin: User = Depends(get_current_admin),
+):
+    """
+    Sample every thread's Python stack in the worker serving this request for `seconds`.
+
+    `collapsed` returns "frame;frame;frame count" lines for flamegraph.pl or
+    speedscope; `json` returns the busiest leaf frames.
+    """
+    stacks, rounds = await run_in_threadpool(stack_sampler.sample, seconds)
+    if not idle:
+        stacks = without_idle(stacks)
+    if format == "json":
+        return JSONResponse({
+            "seconds": seconds,
+            "interval_ms": stack_sampler.interval * 1000,
+            "rounds": rounds,
+            "samples": sum(stacks.values()),
+            "top": top_functions(stacks),
+        })
+    return PlainTextResponse(collapsed(stacks))
@@ -1,185 +1,370 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Body
+from fastapi import APIRouter, status, Depends, Body, Request, BackgroundTasks, Response, Query
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
-from app.core.deps import get_db, get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal
+from datetime import datetime
+from app.core.deps import get_db, get_read_db, get_async_db, get_async_read_db, get_current_user
+from app.core.database import read_router
+from app.core.replica_router import wrote_recently
 from app.models.user import User
-from app.core.domain_error import PromptNotFound
-from app.schemas import PromptCreate, PromptUpdate, PromptOut, PromptVersionOut, PromptAIRequest
+from app.models.prompt import Prompt
+from app.core.domain_error import PromptNotFound, VersionNotFound, UnauthorizedActionError, InvalidFieldsError
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER,
+    decode_prompt_cursor,
+    decode_search_cursor,
+    decode_version_cursor,
+    next_prompt_cursor,
+    next_search_cursor,
+    next_version_cursor,
+)
+from app.schemas import PromptCreate, PromptUpdate, PromptOut, PromptListItem, PromptSearchResult, PromptVersionOut, VersionDiffOut, PromptAIRequest, PromptImportResult, PromptBulkDelete, PromptBulkDeleteResult
 from app.services.semantic_search_service import SemanticSearchService
 from app.services.prompt_ai_service import PromptAIService
-from app.models.prompt import Prompt
+from app.services.prompt_import_service import PromptImportService, embed_imported_prompts
+from app.services.prompt_export_service import PromptExportService
+from app.services.version_diff_service import VersionDiffService
+from app.services.prompt_purge_service import purge_deleted_prompts_task, delete_version_contents_task
+from app.core.config import SOFT_DELETE_VERSION_THRESHOLD
+from app.core.timing import TimedRoute
 from app.crud import (
+    crud_async,
     create_prompt,
-    get_prompts_by_user,
+    PROMPT_LIST_COLUMNS,
     get_prompt_by_id,
+    get_user_prompt,
+    prompt_exists,
     update_prompt,
     delete_prompt,
+    delete_prompts,
+    soft_delete_prompts,
     search_user_prompts,
-    get_prompt_versions,
+    fuzzy_search_user_prompts,
     rollback_prompt_to_version,
-    get_prompt_version_count,
+    get_version_contents,
 )
 
-router = APIRouter()
+# Routes that only wait on the database are `async def` on an AsyncSession; sync CRUD
+# functions run on it through `run_sync`. Routes doing CPU-bound or blocking work
+# (search indexes, diffs, AI calls, exports) stay `def` so they run in the threadpool.
+router = APIRouter(route_class=TimedRoute)
+
+async def _get_owned_prompt(db: AsyncSession, prompt_id: int, user: User, action: str) -> Prompt:
+    """Load the user's prompt in one query; the row is reused by the CRUD call that follows"""
+    prompt = await crud_async.get_user_prompt(db, prompt_id, user.id)
+    if prompt is None:
+        # Only the error path pays for telling "missing" from "not yours"
+        if await crud_async.prompt_exists(db, prompt_id):
+            raise UnauthorizedActionError(action)
+        raise PromptNotFound(prompt_id)
+    return prompt
+
+def _get_owned_prompt_sync(db: Session, prompt_id: int, user: User, action: str) -> Prompt:
+    """`_get_owned_prompt` for threadpool routes"""
+    prompt = get_user_prompt(db, prompt_id, user.id)
+    if prompt is None:
+        if prompt_exists(db, prompt_id):
+            raise UnauthorizedActionError(action)
+        raise PromptNotFound(prompt_id)
+    return prompt
+
+async def _embed(content: str) -> list[float]:
+    """Compute an embedding in the threadpool; the AI client blocks"""
+    return await run_in_threadpool(PromptAIService().embed_prompt, content)
 
 @router.post("/", response_model=PromptOut, status_code=status.HTTP_201_CREATED)
-def create_new_prompt(
+async def create_new_prompt(
     prompt: PromptCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Create a new prompt for the authenticated user
     """
-    new_prompt = create_prompt(db, prompt, current_user.id)
+    embedding = await _embed(prompt.content)
+    new_prompt = await db.run_sync(create_prompt, prompt, current_user.id, embedding)
     return new_prompt
 
-@router.get("/", response_model=List[PromptOut])
-def get_all_prompts(
+@router.post("/import", response_model=PromptImportResult)
+async def import_prompts(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Bulk import prompts from a streamed NDJSON (default) or CSV (`Content-Type: text/csv`) body.
+    Rows are validated individually; invalid rows are reported without aborting the import.
+    Embeddings are computed in a batched pass after the response is sent.
+    """
+    service = PromptImportService(db, current_user.id)
+    result = await service.import_stream(request.stream(), request.headers.get("content-type"))
+
+    if service.imported_ids:
+        background_tasks.add_task(embed_imported_prompts, service.imported_ids)
+
+    return result
+
+@router.get("/", response_model=List[PromptListItem], response_model_exclude_unset=True)
+async def get_all_prompts(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    fields: str | None = Query(None, description="Comma-separated columns to return, e.g. `title,updated_at`"),
+    preview_chars: int | None = Query(None, ge=1, description="Truncate `content` to this many characters"),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all prompts for the authenticated user
+    Get all prompts for the authenticated user, most recently updated first.
+    Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page.
     """
-    prompts = get_prompts_by_user(db, current_user.id, skip, limit)
-    # need to send updated at as well with the response
-    prompts = [
-        {
-            "id": p.id,
-            "title": p.title,
-            "content": p.content,
-            "description": p.description,
-            "updated_at": p.updated_at
-        }
-        for p in prompts
-    ]
-    return prompts
+    field_list = None
+    if fields:
+        field_list = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in field_list if f not in PROMPT_LIST_COLUMNS]
+        if unknown:
+            raise InvalidFieldsError(unknown)
 
-@router.get("/search", response_model=List[PromptOut])
+    after = decode_prompt_cursor(cursor) if cursor else None
+    rows = await crud_async.get_prompt_list(db, current_user.id, skip, limit, after, field_list, preview_chars)
+    next_cursor = next_prompt_cursor(rows, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [row._asdict() for row in rows]
+
+@router.get("/search", response_model=List[PromptSearchResult])
 def search_prompts(
     query: str,
+    response: Response,
+    mode: Literal["fulltext", "fuzzy", "prefix"] = "fulltext",
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Search prompts by title or description for the authenticated user
+    Search prompts for the authenticated user.
+
+    - `fulltext`: title, description and content ranked by relevance, with a highlighted snippet
+    - `fuzzy`: typo-tolerant title match ranked by trigram similarity
+    - `prefix`: titles starting with the query, for autocomplete
     """
     if not query.strip():
         return []
     
-    prompts = search_user_prompts(db, current_user.id, query, skip, limit)
-    return prompts
+    after = decode_search_cursor(cursor) if cursor else None
+    if mode == "fulltext":
+        results = search_user_prompts(db, current_user.id, query, skip, limit, after)
+    else:
+        matches = fuzzy_search_user_prompts(
+            db, current_user.id, query.strip(), mode == "prefix", skip, limit, after
+        )
+        results = [(p, score, None) for p, score in matches]
+    next_cursor = next_search_cursor(results, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return [
+        {
+            "id": p.id,
+            "title": p.title,
+            "content": p.content,
+            "description": p.description,
+            "updated_at": p.updated_at,
+            "rank": rank,
+            "snippet": snippet,
+        }
+        for p, rank, snippet in results
+    ]
+
+@router.get("/export")
+def export_prompts(
+    request: Request,
+    since: datetime | None = None,
+    since_id: int | None = None,
+    gzip: bool = False,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Stream all prompts of the authenticated user with their version history as NDJSON.
+    Pass the `updated_at` and `id` of the last exported line as `since` and `since_id`
+    to only get what changed afterwards, including deletions.
+    """
+    bind = read_router.choose(wrote_recently(request))
+    service = PromptExportService(current_user.id, since, since_id, bind)
+
+    if gzip:
+        return StreamingResponse(
+            service.iter_gzip(),
+            media_type="application/gzip",
+            headers={"Content-Disposition": 'attachment; filename="prompts.ndjson.gz"'},
+        )
+
+    return StreamingResponse(
+        service.iter_ndjson(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="prompts.ndjson"'},
+    )
 
 @router.get("/{prompt_id}", response_model=PromptOut)
-def get_prompt(
+async def get_prompt(
     prompt_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get a specific prompt by ID
     """
-    prompt = get_prompt_by_id(db, prompt_id)
-    if not prompt:
-        raise PromptNotFound(prompt_id)
-    
-    # Check if prompt belongs to current user
-    if prompt.user_id != current_user.id:
-        raise UnauthorizedActionError("access this prompt")
-    
-    return prompt
+    return await _get_owned_prompt(db, prompt_id, current_user, "access this prompt")
 
 @router.put("/{prompt_id}", response_model=PromptOut)
-def update_existing_prompt(
+async def update_existing_prompt(
     prompt_id: int,
     prompt_update: PromptUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Update a prompt (creates a version if content is updated)
     """
-    # Check if prompt exists
-    existing_prompt = get_prompt_by_id(db, prompt_id)
-    if not existing_prompt:
-        raise PromptNotFound(prompt_id)
-    
-    # Check if prompt belongs to current user
-    if existing_prompt.user_id != current_user.id:
-        raise UnauthorizedActionError("update this prompt")
+    # keep a reference: the session identity map is weak, the CRUD call reuses this row
+    prompt = await _get_owned_prompt(db, prompt_id, current_user, "update this prompt")
     
+    embedding = await _embed(prompt_update.content) if prompt_update.content is not None else None
     # Update prompt (CRUD handles version creation)
-    updated_prompt = update_prompt(db, prompt_id, prompt_update, current_user.id)
+    updated_prompt = await db.run_sync(update_prompt, prompt_id, prompt_update, current_user.id, embedding)
     return updated_prompt
 
 @router.delete("/{prompt_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_existing_prompt(
+async def delete_existing_prompt(
     prompt_id: int,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    soft: bool = Query(False, description="Hide the prompt now and purge its history in the background"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Delete a prompt
+    Delete a prompt. Prompts with a very long version history are always soft-deleted
     """
-    # Check if prompt exists
-    existing_prompt = get_prompt_by_id(db, prompt_id)
-    if not existing_prompt:
-        raise PromptNotFound(prompt_id)
-    
-    # Check if prompt belongs to current user
-    if existing_prompt.user_id != current_user.id:
-        raise UnauthorizedActionError("delete this prompt")
+    existing_prompt = await _get_owned_prompt(db, prompt_id, current_user, "delete this prompt")
     
     # Delete prompt
-    delete_prompt(db, prompt_id)
+    if soft or existing_prompt.version_count >= SOFT_DELETE_VERSION_THRESHOLD:
+        await db.run_sync(soft_delete_prompts, current_user.id, [prompt_id])
+        background_tasks.add_task(purge_deleted_prompts_task)
+    else:
+        content_hashes = await db.run_sync(delete_prompt, prompt_id)
+        if content_hashes:
+            background_tasks.add_task(delete_version_contents_task, content_hashes)
     return None
 
-@router.get("/{prompt_id}/versions", response_model=List[PromptVersionOut])
-def get_versions(
+@router.delete("/", response_model=PromptBulkDeleteResult)
+async def delete_many_prompts(
+    payload: PromptBulkDelete,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Delete several of the user's prompts in one request.
+    Ids that don't exist or belong to someone else are reported in `not_found`
+    """
+    if payload.soft:
+        deleted = await db.run_sync(soft_delete_prompts, current_user.id, payload.ids)
+        background_tasks.add_task(purge_deleted_prompts_task)
+    else:
+        deleted, content_hashes = await db.run_sync(delete_prompts, current_user.id, payload.ids)
+        if content_hashes:
+            background_tasks.add_task(delete_version_contents_task, content_hashes)
+
+    deleted_ids = set(deleted)
+    return {
+        "deleted": sorted(deleted_ids),
+        "not_found": [prompt_id for prompt_id in dict.fromkeys(payload.ids) if prompt_id not in deleted_ids],
+    }
+
+@router.get("/{prompt_id}/versions", response_model=List[PromptVersionOut], response_model_exclude_unset=True)
+async def get_versions(
     prompt_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: int = 100,
+    cursor: str | None = None,
+    include_content: bool = True,
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get all versions for a specific prompt
+    Get versions for a specific prompt, newest first.
+    Set `include_content=false` to list version metadata without the bodies.
     """
-    # Check if prompt exists and belongs to current user
-    prompt = get_prompt_by_id(db, prompt_id)
-    if not prompt:
-        raise PromptNotFound(prompt_id)
-    
-    if prompt.user_id != current_user.id:
-        raise UnauthorizedActionError("access this prompt's versions")
+    await _get_owned_prompt(db, prompt_id, current_user, "access this prompt's versions")
     
     # Get versions using CRUD function
-    versions = get_prompt_versions(db, prompt_id)
-    return versions
+    before_version = decode_version_cursor(cursor) if cursor else None
+    versions = await crud_async.get_prompt_versions(db, prompt_id, limit, before_version)
+    next_cursor = next_version_cursor(versions, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if not include_content:
+        return [
+            {
+                "id": v.id,
+                "prompt_id": v.prompt_id,
+                "version_number": v.version_number,
+                "created_at": v.created_at,
+            }
+            for v in versions
+        ]
+
+    contents = await db.run_sync(get_version_contents, versions)
+    return [
+        {
+            "id": v.id,
+            "prompt_id": v.prompt_id,
+            "version_number": v.version_number,
+            "content": content,
+            "created_at": v.created_at,
+        }
+        for v, content in zip(versions, contents)
+    ]
+
+@router.get("/{prompt_id}/diff", response_model=VersionDiffOut)
+def diff_versions(
+    prompt_id: int,
+    from_version: int = Query(..., alias="from"),
+    to_version: int = Query(..., alias="to"),
+    granularity: Literal["line", "word"] = "line",
+    context: int = Query(3, ge=0, le=50),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Diff two versions of a prompt server-side, returning only the changed hunks
+    """
+    _get_owned_prompt_sync(db, prompt_id, current_user, "access this prompt's versions")
+    
+    service = VersionDiffService(db)
+    return service.diff_versions(prompt_id, from_version, to_version, granularity, context)
 
 @router.post("/{prompt_id}/rollback/{version_number}", response_model=PromptOut)
-def rollback_to_version(
+async def rollback_to_version(
     prompt_id: int,
     version_number: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Rollback a prompt to a specific version
     """
-    # Check if prompt exists and belongs to current user
-    prompt = get_prompt_by_id(db, prompt_id)
-    if not prompt:
-        raise PromptNotFound(prompt_id)
-    
-    if prompt.user_id != current_user.id:
-        raise UnauthorizedActionError("rollback this prompt")
+    # keep a reference: the session identity map is weak, the CRUD call reuses this row
+    prompt = await _get_owned_prompt(db, prompt_id, current_user, "rollback this prompt")
     
     # Rollback using CRUD function
-    rolled_back_prompt = rollback_prompt_to_version(db, prompt_id, version_number)
+    rolled_back_prompt = await db.run_sync(rollback_prompt_to_version, prompt_id, version_number)
     
     if not rolled_back_prompt:
         raise VersionNotFound(version_number)
@@ -187,28 +372,20 @@ def rollback_to_version(
     return rolled_back_prompt
 
 @router.get("/{prompt_id}/version_count")
-def get_version_count(
+async def get_version_count(
     prompt_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get the total number of versions for a prompt
     """
-    # Check if prompt exists and belongs to current user
-    prompt = get_prompt_by_id(db, prompt_id)
-    if not prompt:
-        raise PromptNotFound(prompt_id)
+    prompt = await _get_owned_prompt(db, prompt_id, current_user, "access this prompt")
     
-    if prompt.user_id != current_user.id:
-        raise UnauthorizedActionError("access this prompt")
-    
-    # Get count using CRUD function
-    count = get_prompt_version_count(db, prompt_id)
-    return {"total_versions": count}
+    return {"total_versions": prompt.version_count}
 
 @router.get("/search/semantic")
-def semantic_search(q:str, db: Session = Depends(get_db)):
+def semantic_search(q:str, db: Session = Depends(get_read_db)):
     service = SemanticSearchService(db)
     results = service.search_prompts(q)
 
@@ -223,7 +400,7 @@ def semantic_search(q:str, db: Session = Depends(get_db)):
 
 @router.get("/{prompt_id}/ai/suggest-version")
 def suggest_prompt_version(prompt_id: int, db: Session = Depends(get_db)):
-    prompt = db.query(Prompt).filter(Prompt.id == prompt_id).first()
+    prompt = get_prompt_by_id(db, prompt_id)
 
     if not prompt:
         raise PromptNotFound(prompt_id)
@@ -243,7 +420,7 @@ def run_prompt_ai_action(
     payload: PromptAIRequest = Body(...),
     db: Session = Depends(get_db),
 ):
-    prompt = db.query(Prompt).filter(Prompt.id == prompt_id).first()
+    prompt = get_prompt_by_id(db, prompt_id)
 
     if not prompt: 
         raise PromptNotFound(prompt_id)
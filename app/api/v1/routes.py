@@ -7,8 +7,9 @@ from app.core.deps import get_current_user
 from app.models.user import User
 from app.schemas import UserOut
 from app.core.domain_error import PromptNotFound
+from app.core.timing import TimedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 router.include_router(auth_router, prefix="", tags=["Auth"])
 router.include_router(prompt_router, prefix="/prompts", tags=["Prompts"])
@@ -1,6 +1,7 @@
 import os
 from groq import Groq
 from app.core.logging_config import logger
+from app.core.timing import timed
 
 
 class AIClient:
@@ -21,6 +22,7 @@ class AIClient:
             logger.error(f"Groq init failed, switching to MOCK mode: {e}")
             self.mock_mode = True
     
+    @timed("ai")
     def generate_completion(self, prompt: str):
         if self.mock_mode:
             return f"[MOCK COMPLETION] {prompt}"
@@ -38,6 +40,7 @@ class AIClient:
             logger.error(f"Groq completion error — fallback to mock: {e}")
             return f"[MOCK COMPLETION FALLBACK] {prompt}"
     
+    @timed("ai")
     def improve_prompt(self, prompt_text: str):
         if self.mock_mode:
             return f"[MOCK] Improved prompt: {prompt_text}"
@@ -65,6 +68,7 @@ class AIClient:
             logger.error(f"Groq improve_prompt error — fallback to mock: {e}")
             return f"[MOCK FALLBACK] Improved prompt: {prompt_text}"
 
+    @timed("embedding")
     def embed_text(self, text: str):
         if self.mock_mode:
             return [0.1, 0.3, 0.5, 0.9]
@@ -78,3 +82,19 @@ class AIClient:
         except Exception as e:
             logger.error(f"Groq embedding error — fallback to mock: {e}")
             return [0.1, 0.3, 0.5, 0.9]
+
+    @timed("embedding")
+    def embed_texts(self, texts: list[str]):
+        if self.mock_mode:
+            return [[0.1, 0.3, 0.5, 0.9] for _ in texts]
+
+        try:
+            embedding = self.client.embeddings.create(
+                model=self.embedding_model,
+                input=texts
+            )
+            ordered = sorted(embedding.data, key=lambda d: d.index)
+            return [d.embedding for d in ordered]
+        except Exception as e:
+            logger.error(f"Groq batch embedding error — fallback to mock: {e}")
+            return [[0.1, 0.3, 0.5, 0.9] for _ in texts]
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -14,3 +15,101 @@ EXPIRE_MINUTES = int(os.getenv("EXPIRE_MINUTES", "30"))
 
 # Database Configuration
 DATABASE_URL = os.getenv("DATABASE_URL")
+
+# Bulk Import / Export Configuration
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "100"))  # rejected rows listed in the response; all are counted
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+EXPORT_VERSION_CHUNK_SIZE = int(os.getenv("EXPORT_VERSION_CHUNK_SIZE", "1000"))  # versions held in memory at once
+EXPORT_TOMBSTONE_RETENTION_DAYS = int(os.getenv("EXPORT_TOMBSTONE_RETENTION_DAYS", "90"))  # older syncs need a full export
+
+# Search Configuration
+FUZZY_SIMILARITY_THRESHOLD = float(os.getenv("FUZZY_SIMILARITY_THRESHOLD", "0.4"))
+FUZZY_INDEX_CACHE_SIZE = int(os.getenv("FUZZY_INDEX_CACHE_SIZE", "256"))
+
+# Version Storage Configuration
+VERSION_SNAPSHOT_INTERVAL = int(os.getenv("VERSION_SNAPSHOT_INTERVAL", "10"))
+VERSION_CONTENT_CACHE_SIZE = int(os.getenv("VERSION_CONTENT_CACHE_SIZE", "4096"))
+VERSION_DIFF_CACHE_SIZE = int(os.getenv("VERSION_DIFF_CACHE_SIZE", "1024"))
+VERSION_DIFF_MAX_TOKENS = int(os.getenv("VERSION_DIFF_MAX_TOKENS", "50000"))  # lines/words of both versions; larger diffs are rejected
+VERSION_DIFF_MAX_EDITS = int(os.getenv("VERSION_DIFF_MAX_EDITS", "1000"))  # beyond this the changed region is shown as one replacement
+
+# Deletion Configuration
+SOFT_DELETE_VERSION_THRESHOLD = int(os.getenv("SOFT_DELETE_VERSION_THRESHOLD", "1000"))
+PURGE_BATCH_SIZE = int(os.getenv("PURGE_BATCH_SIZE", "5000"))
+
+# Query Budget Configuration
+# Max SQL statements per request, keyed by "METHOD /route/path"; override with a JSON object in QUERY_BUDGETS.
+# The auth user lookup and background tasks aren't counted, so these hold with a cold user cache too
+DEFAULT_QUERY_BUDGET = int(os.getenv("DEFAULT_QUERY_BUDGET", "20"))
+QUERY_BUDGETS = {
+    "GET /api/v1/prompts/": 1,
+    "POST /api/v1/prompts/": 6,
+    "GET /api/v1/prompts/{prompt_id}": 1,
+    "PUT /api/v1/prompts/{prompt_id}": 7,
+    "DELETE /api/v1/prompts/{prompt_id}": 6,
+    "GET /api/v1/prompts/{prompt_id}/versions": 3,
+    "GET /api/v1/prompts/{prompt_id}/diff": 4,
+    "GET /api/v1/prompts/{prompt_id}/version_count": 1,
+    "POST /api/v1/prompts/{prompt_id}/rollback/{version_number}": 6,
+    "GET /api/v1/dashboard/": 1,
+    **json.loads(os.getenv("QUERY_BUDGETS", "{}")),
+}
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "false").lower() == "true"
+
+# Dashboard Configuration
+USER_STATS_RECENT_SIZE = int(os.getenv("USER_STATS_RECENT_SIZE", "5"))
+USER_STATS_CACHE_SIZE = int(os.getenv("USER_STATS_CACHE_SIZE", "10000"))
+USER_STATS_CACHE_TTL_SECONDS = float(os.getenv("USER_STATS_CACHE_TTL_SECONDS", "5"))  # bounds staleness across workers
+
+# Connection Pool Configuration (per engine, per worker process)
+# Each worker opens up to (DB_POOL_SIZE + DB_MAX_OVERFLOW) + (DB_SYNC_POOL_SIZE + DB_SYNC_MAX_OVERFLOW)
+# connections to each database: 18 by default, 72 for 4 workers, under Postgres' default max_connections=100
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))  # async engine: request handlers
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "4"))
+DB_SYNC_POOL_SIZE = int(os.getenv("DB_SYNC_POOL_SIZE", "4"))  # sync engine: background tasks, exports, sync routes
+DB_SYNC_MAX_OVERFLOW = int(os.getenv("DB_SYNC_MAX_OVERFLOW", "2"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Read Replica Configuration
+# Comma-separated replica URLs; empty means every query goes to DATABASE_URL
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+REPLICA_ROUTING = os.getenv("REPLICA_ROUTING", "round_robin")  # round_robin | least_connections
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Password Hashing Configuration
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # existing hashes are upgraded on the next login
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))  # processes per app worker; 0 = threads
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+# Auth Cache Configuration (per worker process)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))  # bounds staleness across workers
+
+# Metrics Configuration
+METRICS_DIR = os.getenv("METRICS_DIR", "")  # shared by all workers; empty = this process only
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", "true").lower() == "true"  # per-stage timings on responses
+
+# SQL Statistics Configuration (opt-in, per worker process)
+SQL_STATS_ENABLED = os.getenv("SQL_STATS_ENABLED", "false").lower() == "true"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))  # same statement this often in one request
+SQL_STATS_MAX_STATEMENTS = int(os.getenv("SQL_STATS_MAX_STATEMENTS", "1000"))  # distinct statements tracked
+
+# Profiler Configuration
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "1"))  # per worker process
+
+# Request Logging Configuration
+# Share of successful requests logged per route, e.g. {"GET /api/v1/prompts/{prompt_id}": 0.05};
+# errors and requests slower than LOG_SLOW_REQUEST_MS are always logged
+LOG_SAMPLE_RATES = json.loads(os.getenv("LOG_SAMPLE_RATES", "{}"))
+LOG_DEFAULT_SAMPLE_RATE = float(os.getenv("LOG_DEFAULT_SAMPLE_RATE", "1.0"))
+LOG_SLOW_REQUEST_MS = float(os.getenv("LOG_SLOW_REQUEST_MS", "1000"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records beyond this are dropped, never block
@@ -1,7 +1,100 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from app.core.config import DATABASE_URL
+from app.core.config import (
+    DATABASE_URL,
+    DATABASE_REPLICA_URLS,
+    REPLICA_ROUTING,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_SYNC_POOL_SIZE,
+    DB_SYNC_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+)
+from app.core.pool_metrics import TimedQueuePool, TimedAsyncQueuePool
+from app.core.replica_router import ReplicaRouter
+
+# Async drivers for the sync URLs used everywhere else (DATABASE_URL stays the single setting)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """`postgresql://...` -> `postgresql+asyncpg://...`, `sqlite:///...` -> `sqlite+aiosqlite:///...`"""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)).render_as_string(
+        hide_password=False
+    )
+
+
+# Dialect INSERT constructs that support ON CONFLICT
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def insert_ignoring_conflicts(db, model):
+    """`INSERT ... ON CONFLICT DO NOTHING` for `model`: rows that already exist are skipped, in one statement"""
+    return UPSERT_INSERTS[db.get_bind().dialect.name](model).on_conflict_do_nothing()
+
+
+def insert_replacing_conflicts(db, model, key: list, columns: list[str]):
+    """`INSERT ... ON CONFLICT (key) DO UPDATE`: an existing row gets the inserted `columns`, in one statement"""
+    stmt = UPSERT_INSERTS[db.get_bind().dialect.name](model)
+    return stmt.on_conflict_do_update(index_elements=key, set_={name: stmt.excluded[name] for name in columns})
+
+
+pool_options = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+# The sync engine only serves background tasks and the few sync routes, so it gets a smaller pool
+sync_pool_options = {**pool_options, "pool_size": DB_SYNC_POOL_SIZE, "max_overflow": DB_SYNC_MAX_OVERFLOW}
+
+# Sync engine: background tasks, streaming exports and routes that do CPU-bound or blocking work
+engine = create_engine(DATABASE_URL, future=True, poolclass=TimedQueuePool, **sync_pool_options)
+
+# Async engine: request handlers that only wait on the database
+async_engine = create_async_engine(
+    async_database_url(DATABASE_URL), poolclass=TimedAsyncQueuePool, **pool_options
+)
+
+# Read replicas for read-only routes, see app/core/replica_router.py
+replica_engines = [
+    create_engine(url, future=True, poolclass=TimedQueuePool, **sync_pool_options)
+    for url in DATABASE_REPLICA_URLS
+]
+async_replica_engines = [
+    create_async_engine(async_database_url(url), poolclass=TimedAsyncQueuePool, **pool_options)
+    for url in DATABASE_REPLICA_URLS
+]
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite ignores ON DELETE CASCADE unless foreign keys are switched on per connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+for _engine in [engine, *replica_engines, async_engine.sync_engine, *(e.sync_engine for e in async_replica_engines)]:
+    if _engine.dialect.name == "sqlite":
+        event.listen(_engine, "connect", _enable_sqlite_foreign_keys)
 
-engine = create_engine(DATABASE_URL, future=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: attributes can't lazy-load under asyncio, so keep them readable after commit
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
+
+read_router = ReplicaRouter(engine, replica_engines, REPLICA_ROUTING)
+async_read_router = ReplicaRouter(async_engine, async_replica_engines, REPLICA_ROUTING)
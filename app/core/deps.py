@@ -1,7 +1,15 @@
+from typing import AsyncIterator
 from sqlalchemy.orm import Session
-from fastapi import Depends, HTTPException, status
-from app.core.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, HTTPException, Request, status
+from app.core.database import SessionLocal, AsyncSessionLocal, read_router, async_read_router
+from app.core.replica_router import wrote_recently
 from app.core.security import get_current_user_email
+from app.core.timing import span
+from app.core.request_context import uncounted
+from app.core.config import ADMIN_EMAILS
+from app.core.domain_error import UnauthorizedActionError
+from app.crud import crud_async, get_cached_user, cache_user
 from app.models.user import User
 
 def get_db() -> Session:
@@ -12,16 +20,50 @@ def get_db() -> Session:
     finally:
         db.close()
 
-def get_current_user(
-    db: Session = Depends(get_db),
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Async database session dependency for `async def` routes"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db(request: Request) -> Session:
+    """Session for read-only routes: a replica, or the primary if the caller wrote recently"""
+    sticky = wrote_recently(request)
+    db = SessionLocal(bind=read_router.choose(sticky))
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request) -> AsyncIterator[AsyncSession]:
+    """Async `get_read_db`"""
+    sticky = wrote_recently(request)
+    async with AsyncSessionLocal(bind=async_read_router.choose(sticky)) as db:
+        yield db
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
     email: str = Depends(get_current_user_email)
 ) -> User:
-    """Get current authenticated user from database"""
-    user = db.query(User).filter(User.email == email).first()
+    """Get current authenticated user, from this worker's user cache when possible"""
+    user = get_cached_user(email)
+    if user is not None:
+        return user
+    # a cache miss isn't the endpoint's cost, so the lookup stays out of its query budget
+    with span("auth"), uncounted():
+        user = await crud_async.get_user_by_email(db, email)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
\ No newline at end of file
+    # shared across requests, so it must not belong to this request's session
+    db.expunge(user)
+    cache_user(user)
+    return user
+
+async def get_current_admin(user: User = Depends(get_current_user)) -> User:
+    """Current user, if listed in ADMIN_EMAILS"""
+    if user.email.lower() not in ADMIN_EMAILS:
+        raise UnauthorizedActionError("access admin endpoints")
+    return user
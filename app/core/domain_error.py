@@ -25,4 +25,32 @@ class UnauthorizedActionError(DomainError):
         super().__init__(
             f"You do not have permission to {action}",
             status_code=403
-        )
\ No newline at end of file
+        )
+
+class ServiceBusyError(DomainError):
+    def __init__(self, what: str = "The server"):
+        super().__init__(
+            f"{what} is busy, please retry shortly",
+            status_code=503
+        )
+
+class InvalidFieldsError(DomainError):
+    def __init__(self, fields: list[str]):
+        super().__init__(
+            f"Unknown fields: {', '.join(fields)}",
+            status_code=400
+        )
+
+class InvalidCursorError(DomainError):
+    def __init__(self):
+        super().__init__(
+            "Invalid pagination cursor",
+            status_code=400
+        )
+
+class DiffTooLargeError(DomainError):
+    def __init__(self, tokens: int, limit: int):
+        super().__init__(
+            f"The versions have {tokens} lines/words together, more than the {limit} that can be diffed",
+            status_code=413
+        )
@@ -1,15 +1,64 @@
-import logging 
-import sys 
+import atexit
+import json
+import logging
+import queue
+import sys
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+
+from app.core.config import LOG_QUEUE_SIZE
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; structured fields passed as `extra={"fields": {...}}` are merged in"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(sep=" ", timespec="milliseconds"),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking the caller"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Keep the structured fields; the default prepare() flattens the record for pickling
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
 
 def setup_logger():
+    """Log through a queue: callers only enqueue, a background thread formats and writes to stdout"""
     logger = logging.getLogger("promptVault")
     logger.setLevel(logging.INFO)
 
     handler = logging.StreamHandler(sys.stdout)
-    formatter = logging.Formatter('{"time": "%(asctime)s", "level": "%(levelname)s", "message": "%(message)s"}')
-    handler.setFormatter(formatter)
+    handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # flush what's still queued
 
-    logger.addHandler(handler)
-    return logger
+    logger.addHandler(DroppingQueueHandler(log_queue))
+    return logger, listener
 
-logger = setup_logger()
+logger, log_listener = setup_logger()
@@ -1,29 +1,365 @@
-class MetricsStore: 
+import fcntl
+import glob
+import math
+import os
+import re
+import threading
+from contextlib import contextmanager
+
+from app.core.config import METRICS_DIR
+from app.core.metrics_file import MetricsFile, read_metrics_file
+
+# Log-spaced latency buckets: bucket i holds durations up to LATENCY_MIN_MS * LATENCY_GROWTH**i,
+# the extra last bucket everything slower. 2**(1/4) keeps percentile error under ~10%.
+LATENCY_MIN_MS = 0.05
+LATENCY_GROWTH = 2 ** 0.25
+LATENCY_BUCKETS = 96  # up to ~14 minutes
+LATENCY_BOUNDS_MS = [LATENCY_MIN_MS * LATENCY_GROWTH ** i for i in range(LATENCY_BUCKETS)]
+
+METRICS_FILE_SUFFIX = ".metrics"
+# Values of exited workers, folded into one file so reads don't open every worker that ever ran
+RETIRED_METRICS_FILE = f"retired{METRICS_FILE_SUFFIX}"
+# flock()ed exclusively while folding, shared while reading, so no read sees a worker twice or not at all
+METRICS_LOCK_FILE = ".lock"
+_WORKER_FILE = re.compile(rf"worker-(\d+){re.escape(METRICS_FILE_SUFFIX)}$")
+
+# Prometheus gets every 4th bound, LATENCY_MIN_MS * 2**k (0.05 ms, 0.1 ms, 0.2 ms, ...); cumulative counts stay exact
+PROMETHEUS_BUCKET_STEP = 4
+
+
+def latency_bucket(duration_ms: float) -> int:
+    """Index of the histogram bucket a duration falls into"""
+    if duration_ms <= LATENCY_MIN_MS:
+        return 0
+    index = math.ceil(math.log(duration_ms / LATENCY_MIN_MS, LATENCY_GROWTH) - 1e-9)
+    return min(index, LATENCY_BUCKETS)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # exists, owned by someone else
+    return True
+
+
+def status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+class Histogram:
+    """Merged latency histogram of one series"""
+
+    def __init__(self, buckets: list[int] | None = None, total_ms: float = 0.0, max_ms: float = 0.0):
+        self.buckets = buckets or [0] * (LATENCY_BUCKETS + 1)
+        self.total_ms = total_ms
+        self.max_ms = max_ms
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets)
+
+    def merge(self, other: "Histogram"):
+        for i, n in enumerate(other.buckets):
+            self.buckets[i] += n
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-quantile (0..1), interpolated inside the bucket and capped at the max"""
+        count = self.count
+        if count == 0:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                lower = LATENCY_BOUNDS_MS[i - 1] if i > 0 else 0.0
+                upper = LATENCY_BOUNDS_MS[i] if i < LATENCY_BUCKETS else self.max_ms
+                value = lower + (upper - lower) * (rank - seen) / n
+                return min(value, self.max_ms)
+            seen += n
+        return self.max_ms
+
+    def summary(self) -> dict:
+        count = self.count
+        return {
+            "count": count,
+            "mean_ms": round(self.total_ms / count, 3) if count else 0.0,
+            "p50_ms": round(self.percentile(0.50), 3),
+            "p90_ms": round(self.percentile(0.90), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+# Stored values: ("counter", name) -> [value] and
+# ("latency", method, route, status class) -> [*bucket counts, total_ms, max_ms]
+_HISTOGRAM_SLOTS = LATENCY_BUCKETS + 1
+
+
+class _Shard:
+    """In-memory values written by a single thread, so updates need no lock"""
+
     def __init__(self):
-        self.total_requests = 0
-        self.total_errors = 0
-        self.total_domain_errors = 0
-        self.total_internal_errors = 0
-        self.total_response_time = 0 # accumulated in ms
+        self.values: dict[tuple, list[float]] = {}
+
+    def add(self, key: tuple, index: int, amount: float, count: int = 1):
+        values = self.values.get(key)
+        if values is None:
+            values = self.values[key] = [0.0] * count
+        values[index] += amount
+
+    def observe(self, key: tuple, bucket: int, buckets: int, duration_ms: float):
+        values = self.values.get(key)
+        if values is None:
+            values = self.values[key] = [0.0] * (buckets + 2)
+        values[bucket] += 1
+        values[buckets] += duration_ms
+        if duration_ms > values[buckets + 1]:
+            values[buckets + 1] = duration_ms
+
 
-    def record_request(self):
-        self.total_requests += 1
+class MetricsStore:
+    """
+    Request counters and per-route latency histograms.
+
+    Without a directory every thread records into its own in-memory shard and
+    readers merge the shards. With one (multi-worker servers) each process
+    writes a memory-mapped file there and readers merge every file. Files of
+    workers that have exited are folded into one retired file on read, so
+    restarts lose no history and reads stay proportional to live workers.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory
+        self._local = threading.local()
+        self._shards: list[_Shard] = []
+        self._shards_lock = threading.Lock()
+        self._file: MetricsFile | None = None
+        self._file_pid: int | None = None
+
+    def _shard(self) -> _Shard | MetricsFile:
+        if self.directory:
+            return self._process_file()
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _process_file(self) -> MetricsFile:
+        # opened lazily and per pid, so a module imported before the fork still works
+        pid = os.getpid()
+        if self._file_pid != pid:
+            with self._shards_lock:
+                if self._file_pid != pid:
+                    os.makedirs(self.directory, exist_ok=True)
+                    self._file = MetricsFile(os.path.join(self.directory, f"worker-{pid}{METRICS_FILE_SUFFIX}"))
+                    self._file_pid = pid
+        return self._file
+
+    def _increment(self, name: str):
+        self._shard().add(("counter", name), 0, 1)
 
     def record_domain_error(self):
-        self.total_domain_errors += 1
-        self.total_errors +=1
+        self._increment("domain_errors")
 
     def record_internal_error(self):
-        self.total_internal_errors += 1
-        self.total_errors +=1
-    
-    def record_response_time(self, duration_ms: float):
-        self.total_response_time += duration_ms
+        self._increment("internal_errors")
+
+    def observe_request(self, method: str, route: str, status_code: int, duration_ms: float):
+        """Count a finished request and add its duration to the route's histogram"""
+        shard = self._shard()
+        shard.add(("counter", "requests"), 0, 1)
+        key = ("latency", method, route, status_class(status_code))
+        shard.observe(key, latency_bucket(duration_ms), _HISTOGRAM_SLOTS, duration_ms)
+
+    def observe_stage(self, method: str, route: str, stage: str, duration_ms: float):
+        """Add a request's time in one stage ("db", "ai", ...) to the route's stage histogram"""
+        key = ("stage", method, route, stage)
+        self._shard().observe(key, latency_bucket(duration_ms), _HISTOGRAM_SLOTS, duration_ms)
+
+    @contextmanager
+    def _directory_lock(self, operation: int):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, METRICS_LOCK_FILE), "a") as lock:
+            fcntl.flock(lock, operation)
+            yield  # closing the file releases the lock
+
+    def _exited_worker_files(self) -> list[str]:
+        paths = []
+        for path in glob.glob(os.path.join(self.directory, f"worker-*{METRICS_FILE_SUFFIX}")):
+            match = _WORKER_FILE.search(path)
+            if match and int(match.group(1)) != os.getpid() and not _pid_alive(int(match.group(1))):
+                paths.append(path)
+        return paths
+
+    def _retire_exited_workers(self):
+        """Fold the files of exited workers into RETIRED_METRICS_FILE and delete them"""
+        if not self._exited_worker_files():
+            return
+        try:
+            with self._directory_lock(fcntl.LOCK_EX | fcntl.LOCK_NB):
+                # list again under the lock: another process may have just folded them
+                paths = self._exited_worker_files()
+                if not paths:
+                    return
+                retired = MetricsFile(os.path.join(self.directory, RETIRED_METRICS_FILE))
+                try:
+                    for path in paths:
+                        for key, series in read_metrics_file(path).items():
+                            if key[0] == "counter":
+                                retired.add(key, 0, series[0])
+                                continue
+                            # histograms: bucket counts and total add up, the last slot is the max
+                            for index, value in enumerate(series[:-1]):
+                                if value:
+                                    retired.add(key, index, value, len(series))
+                            retired.maximize(key, len(series) - 1, series[-1], len(series))
+                        os.remove(path)
+                finally:
+                    retired.close()
+        except BlockingIOError:
+            pass  # another process is folding them right now
+
+    def _values(self) -> list[dict[tuple, list[float]]]:
+        """Stored values of every shard or worker file"""
+        if self.directory:
+            self._retire_exited_workers()
+            with self._directory_lock(fcntl.LOCK_SH):
+                paths = glob.glob(os.path.join(self.directory, f"*{METRICS_FILE_SUFFIX}"))
+                return [read_metrics_file(path) for path in paths]
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [{key: list(values) for key, values in shard.values.copy().items()} for shard in shards]
+
+    def counters(self, stored: list | None = None) -> dict[str, int]:
+        totals: dict[str, int] = {}
+        for values in stored if stored is not None else self._values():
+            for key, series in values.items():
+                if key[0] == "counter":
+                    totals[key[1]] = totals.get(key[1], 0) + int(series[0])
+        return totals
+
+    def histograms(self, stored: list | None = None, kind: str = "latency") -> dict[tuple, Histogram]:
+        """Merged histograms by (method, route, status class), or (method, route, stage) for kind="stage" """
+        merged: dict[tuple, Histogram] = {}
+        for values in stored if stored is not None else self._values():
+            for key, series in values.items():
+                if key[0] != kind:
+                    continue
+                histogram = Histogram(
+                    [int(n) for n in series[:_HISTOGRAM_SLOTS]],
+                    series[_HISTOGRAM_SLOTS],
+                    series[_HISTOGRAM_SLOTS + 1],
+                )
+                merged.setdefault(key[1:], Histogram()).merge(histogram)
+        return merged
+
+    def snapshot(self) -> dict:
+        """JSON-friendly totals plus latency percentiles overall and per route"""
+        stored = self._values()
+        counters = self.counters(stored)
+        histograms = self.histograms(stored)
+        overall = Histogram()
+        for histogram in histograms.values():
+            overall.merge(histogram)
+        domain_errors = counters.get("domain_errors", 0)
+        internal_errors = counters.get("internal_errors", 0)
+        routes = [
+            {"method": method, "route": route, "status": status, **histogram.summary()}
+            for (method, route, status), histogram in histograms.items()
+        ]
+        routes.sort(key=lambda r: r["count"], reverse=True)
+        stages = [
+            {"method": method, "route": route, "stage": stage, **histogram.summary()}
+            for (method, route, stage), histogram in self.histograms(stored, "stage").items()
+        ]
+        stages.sort(key=lambda s: (s["method"], s["route"], s["stage"]))
+        return {
+            "total_requests": counters.get("requests", 0),
+            "total_errors": domain_errors + internal_errors,
+            "total_domain_errors": domain_errors,
+            "total_internal_errors": internal_errors,
+            "average_response_time_ms": overall.summary()["mean_ms"],
+            "latency": overall.summary(),
+            "routes": routes,
+            "stages": stages,
+        }
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        stored = self._values()
+        counters = self.counters(stored)
+        lines = [
+            "# HELP http_requests_total Finished HTTP requests.",
+            "# TYPE http_requests_total counter",
+        ]
+        histograms = sorted(self.histograms(stored).items())
+        for (method, route, status), histogram in histograms:
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {histogram.count}")
+
+        lines += [
+            "# HELP http_request_duration_seconds HTTP request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route, status), histogram in histograms:
+            lines += _prometheus_histogram(
+                "http_request_duration_seconds", dict(method=method, route=route, status=status), histogram
+            )
+
+        lines += [
+            "# HELP http_request_stage_duration_seconds Time per request spent in each stage (db, ai, auth, ...).",
+            "# TYPE http_request_stage_duration_seconds histogram",
+        ]
+        for (method, route, stage), histogram in sorted(self.histograms(stored, "stage").items()):
+            lines += _prometheus_histogram(
+                "http_request_stage_duration_seconds", dict(method=method, route=route, stage=stage), histogram
+            )
+
+        lines += [
+            "# HELP http_request_duration_max_seconds Slowest HTTP request by route.",
+            "# TYPE http_request_duration_max_seconds gauge",
+        ]
+        for (method, route, status), histogram in histograms:
+            lines.append(
+                f"http_request_duration_max_seconds{_labels(method=method, route=route, status=status)} "
+                f"{histogram.max_ms / 1000:.6f}"
+            )
+
+        lines += [
+            "# HELP app_errors_total Errors handled by the exception handlers.",
+            "# TYPE app_errors_total counter",
+            f'app_errors_total{{kind="domain"}} {counters.get("domain_errors", 0)}',
+            f'app_errors_total{{kind="internal"}} {counters.get("internal_errors", 0)}',
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _prometheus_histogram(name: str, labels: dict, histogram: Histogram) -> list[str]:
+    lines = []
+    cumulative = 0
+    for i, n in enumerate(histogram.buckets[:LATENCY_BUCKETS]):
+        cumulative += n
+        if i % PROMETHEUS_BUCKET_STEP == 0:
+            le = f"{LATENCY_BOUNDS_MS[i] / 1000:.6g}"
+            lines.append(f"{name}_bucket{_labels(**labels, le=le)} {cumulative}")
+    lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.total_ms / 1000:.6f}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
 
-    @property
-    def average_response_time(self) -> float:
-        if self.total_requests == 0:
-            return 0
-        return self.total_response_time / self.total_requests
 
-metrics = MetricsStore()
\ No newline at end of file
+metrics = MetricsStore(METRICS_DIR or None)
@@ -0,0 +1,122 @@
+import json
+import mmap
+import os
+import struct
+import threading
+
+# File layout: an 8-byte "bytes used" header, then entries of
+#   uint32 key length | uint32 value count | JSON key padded to 8 bytes | float64 values
+# Entries are only ever appended and values updated in place, so readers in
+# other processes can parse the file at any time.
+_HEADER = struct.Struct("<Q")
+_ENTRY = struct.Struct("<II")
+_VALUE = struct.Struct("<d")
+_INITIAL_SIZE = 1 << 16
+
+
+def _padded(length: int) -> int:
+    return (length + 7) & ~7
+
+
+def _entries(buffer, used: int):
+    """(key, offset of first value, value count) for every entry"""
+    position = _HEADER.size
+    while position < used:
+        key_length, count = _ENTRY.unpack_from(buffer, position)
+        key_start = position + _ENTRY.size
+        key = tuple(json.loads(bytes(buffer[key_start:key_start + key_length])))
+        values_offset = key_start + _padded(key_length)
+        yield key, values_offset, count
+        position = values_offset + count * _VALUE.size
+
+
+def read_metrics_file(path: str) -> dict[tuple, list[float]]:
+    """All values in a metrics file by key; works while its worker is still writing"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        return {}
+    used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+    return {
+        key: list(struct.unpack_from(f"<{count}d", data, offset))
+        for key, offset, count in _entries(data, used)
+    }
+
+
+class MetricsFile:
+    """
+    One process's metric values in a memory-mapped file.
+
+    Each key owns a fixed number of float64 slots. Writes from the process's
+    threads are serialized by a lock; other processes only read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < _INITIAL_SIZE:
+            self._file.truncate(_INITIAL_SIZE)
+        self._mmap = mmap.mmap(self._file.fileno(), max(size, _INITIAL_SIZE))
+        self._used = _HEADER.unpack_from(self._mmap, 0)[0] or _HEADER.size
+        # a reused pid appends to the file a previous worker left behind
+        self._offsets = {key: offset for key, offset, _ in _entries(self._mmap, self._used)}
+
+    def _grow(self, needed: int):
+        size = len(self._mmap)
+        while size < needed:
+            size *= 2
+        self._mmap.close()
+        self._file.truncate(size)
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+
+    def _slots(self, key: tuple, count: int) -> int:
+        """Offset of the key's first value, appending a zeroed entry on first use"""
+        offset = self._offsets.get(key)
+        if offset is not None:
+            return offset
+        encoded = json.dumps(key, separators=(",", ":")).encode("utf-8")
+        offset = self._used + _ENTRY.size + _padded(len(encoded))
+        end = offset + count * _VALUE.size
+        if end > len(self._mmap):
+            self._grow(end)
+        _ENTRY.pack_into(self._mmap, self._used, len(encoded), count)
+        self._mmap[self._used + _ENTRY.size:self._used + _ENTRY.size + len(encoded)] = encoded
+        self._mmap[offset:end] = bytes(end - offset)
+        # publish the entry only once it's complete
+        self._used = end
+        _HEADER.pack_into(self._mmap, 0, end)
+        self._offsets[key] = offset
+        return offset
+
+    def add(self, key: tuple, index: int, amount: float, count: int = 1):
+        """Add to slot `index` of the key's `count` values"""
+        with self._lock:
+            position = self._slots(key, count) + index * _VALUE.size
+            _VALUE.pack_into(self._mmap, position, _VALUE.unpack_from(self._mmap, position)[0] + amount)
+
+    def maximize(self, key: tuple, index: int, value: float, count: int = 1):
+        """Raise slot `index` of the key's `count` values to `value` if it's larger"""
+        with self._lock:
+            position = self._slots(key, count) + index * _VALUE.size
+            if value > _VALUE.unpack_from(self._mmap, position)[0]:
+                _VALUE.pack_into(self._mmap, position, value)
+
+    def observe(self, key: tuple, bucket: int, buckets: int, duration_ms: float):
+        """Histogram update: bucket count, then running total and max in the last two slots"""
+        with self._lock:
+            offset = self._slots(key, buckets + 2)
+            position = offset + bucket * _VALUE.size
+            _VALUE.pack_into(self._mmap, position, _VALUE.unpack_from(self._mmap, position)[0] + 1)
+            position = offset + buckets * _VALUE.size
+            _VALUE.pack_into(self._mmap, position, _VALUE.unpack_from(self._mmap, position)[0] + duration_ms)
+            position += _VALUE.size
+            if duration_ms > _VALUE.unpack_from(self._mmap, position)[0]:
+                _VALUE.pack_into(self._mmap, position, duration_ms)
+
+    def close(self):
+        with self._lock:
+            self._mmap.flush()
+            self._mmap.close()
+            self._file.close()
@@ -0,0 +1,78 @@
+import base64
+import json
+from datetime import datetime
+from app.core.domain_error import InvalidCursorError
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(**values) -> str:
+    """Encode keyset values into an opaque, URL-safe cursor string"""
+    payload = {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in values.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decode a cursor produced by `encode_cursor`, raising InvalidCursorError if it was tampered with"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise InvalidCursorError()
+    if not isinstance(payload, dict):
+        raise InvalidCursorError()
+    return payload
+
+
+def decode_prompt_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode an (updated_at, id) cursor used by prompt listings"""
+    payload = decode_cursor(cursor)
+    try:
+        return datetime.fromisoformat(payload["u"]), int(payload["id"])
+    except (KeyError, TypeError, ValueError):
+        raise InvalidCursorError()
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, int]:
+    """Decode a (rank, id) cursor used by search results"""
+    payload = decode_cursor(cursor)
+    try:
+        return float(payload["r"]), int(payload["id"])
+    except (KeyError, TypeError, ValueError):
+        raise InvalidCursorError()
+
+
+def decode_version_cursor(cursor: str) -> int:
+    """Decode a version_number cursor used by version listings"""
+    payload = decode_cursor(cursor)
+    try:
+        return int(payload["v"])
+    except (KeyError, TypeError, ValueError):
+        raise InvalidCursorError()
+
+
+def next_prompt_cursor(prompts: list, limit: int) -> str | None:
+    """Cursor for the page after `prompts`, or None when this was the last page"""
+    if not prompts or len(prompts) < limit:
+        return None
+    last = prompts[-1]
+    return encode_cursor(u=last.updated_at, id=last.id)
+
+
+def next_search_cursor(results: list, limit: int) -> str | None:
+    """Cursor for the page after `results` ((prompt, rank, snippet) rows), or None when this was the last page"""
+    if not results or len(results) < limit:
+        return None
+    prompt, rank, _ = results[-1]
+    return encode_cursor(r=rank, id=prompt.id)
+
+
+def next_version_cursor(versions: list, limit: int | None) -> str | None:
+    """Cursor for the page after `versions`, or None when this was the last page"""
+    if not versions or limit is None or len(versions) < limit:
+        return None
+    return encode_cursor(v=versions[-1].version_number)
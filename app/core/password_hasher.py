@@ -0,0 +1,92 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.core.config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING
+from app.core.domain_error import ServiceBusyError
+from app.core.security import hash_password, verify_password, hash_rounds
+from app.core.timing import span
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a small process pool so logins can't starve the request threadpool.
+
+    At most `max_pending` hashes may be queued or running; beyond that callers get
+    a 503 straight away instead of piling up behind the pool.
+    """
+
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rounds = rounds
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers == 0:
+                    self._executor = ThreadPoolExecutor(thread_name_prefix="password-hash")
+                else:
+                    # spawn: forking a process that runs an event loop and driver threads isn't safe
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+            return self._executor
+
+    def _release(self, future: Future | None = None):
+        with self._lock:
+            self._pending -= 1
+
+    def _discard_executor(self, executor: Executor):
+        # a worker died (e.g. OOM-killed): start a fresh pool on the next call
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ServiceBusyError("Authentication")
+            self._pending += 1
+        executor = None
+        try:
+            executor = self._get_executor()
+            future = executor.submit(fn, *args)
+        except BaseException as e:
+            self._release()
+            if isinstance(e, BrokenProcessPool):
+                self._discard_executor(executor)
+            raise
+        # A cancelled request can't stop bcrypt once it runs, so the slot is
+        # freed when the work itself finishes rather than when the caller stops waiting
+        future.add_done_callback(self._release)
+        try:
+            with span("password_hash"):
+                return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise
+
+    async def hash(self, password: str) -> bytes:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: bytes) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: bytes) -> bool:
+        """Whether a stored hash was made with a different cost than the configured one"""
+        return hash_rounds(hashed_password) != self.rounds
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, BCRYPT_ROUNDS)
@@ -0,0 +1,109 @@
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+
+from app.core.config import PROFILE_MAX_CONCURRENT, PROFILE_SAMPLE_INTERVAL_MS
+from app.core.domain_error import ServiceBusyError
+
+_PATH_PREFIXES = sorted(
+    {sysconfig.get_paths()["purelib"], sysconfig.get_paths()["stdlib"], os.getcwd()},
+    key=len,
+    reverse=True,
+)
+
+
+# Leaf frames of threads that are parked rather than working
+_IDLE_LEAVES = ("wait (threading.py", "select (selectors.py", "_worker (concurrent/futures/thread.py")
+
+
+def _short_path(filename: str) -> str:
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):].lstrip(os.sep)
+    return filename
+
+
+def _frame_label(code) -> str:
+    # ';' separates frames in the collapsed format
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    """
+    Samples every thread's stack with `sys._current_frames()` from a background thread.
+
+    No tracing hooks are installed, so the cost is one stack walk per thread
+    per interval, paid by the sampler thread (and the GIL it takes).
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS, max_concurrent: int = PROFILE_MAX_CONCURRENT):
+        self.interval = interval_ms / 1000
+        self._sessions = threading.BoundedSemaphore(max_concurrent)
+        self._labels: dict = {}  # code object -> label
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code)
+        return label
+
+    def sample(self, seconds: float, ignore_thread: int | None = None) -> tuple[Counter, int]:
+        """
+        Sample for `seconds` and return (collapsed stack -> samples, sampling rounds).
+
+        Raises ServiceBusyError when PROFILE_MAX_CONCURRENT sessions are already running.
+        """
+        if not self._sessions.acquire(blocking=False):
+            raise ServiceBusyError("The profiler")
+        try:
+            stacks: Counter = Counter()
+            me = threading.get_ident()
+            rounds = 0
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident in (me, ignore_thread):
+                        continue
+                    labels = []
+                    while frame is not None:
+                        labels.append(self._label(frame.f_code))
+                        frame = frame.f_back
+                    labels.append(names.get(ident, f"thread-{ident}"))
+                    stacks[";".join(reversed(labels))] += 1
+                rounds += 1
+                time.sleep(self.interval)
+            return stacks, rounds
+        finally:
+            self._sessions.release()
+
+
+def without_idle(stacks: Counter) -> Counter:
+    """Drop samples of threads waiting for work (idle threadpool workers, the event loop's select)"""
+    return Counter({
+        stack: count for stack, count in stacks.items()
+        if not stack.rsplit(";", 1)[-1].startswith(_IDLE_LEAVES)
+    })
+
+
+def collapsed(stacks: Counter) -> str:
+    """Brendan Gregg's collapsed format ("frame;frame;frame count"), for flamegraph.pl or speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def top_functions(stacks: Counter, limit: int = 20) -> list[dict]:
+    """Leaf frames by samples, i.e. where the time is actually spent"""
+    leaves: Counter = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    total = sum(leaves.values()) or 1
+    return [
+        {"frame": frame, "samples": count, "percent": round(100 * count / total, 1)}
+        for frame, count in leaves.most_common(limit)
+    ]
+
+
+stack_sampler = StackSampler()
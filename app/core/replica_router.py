@@ -0,0 +1,105 @@
+import itertools
+import math
+import threading
+import time
+from http.cookies import SimpleCookie
+
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import READ_YOUR_WRITES_SECONDS, IS_PROD
+from app.core.security import get_request_user_email
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class ReplicaRouter:
+    """Picks the engine a read-only session should use"""
+
+    def __init__(self, primary, replicas: list, strategy: str = "round_robin"):
+        if strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica routing strategy: {strategy}")
+        self.primary = primary
+        self.replicas = replicas
+        self.strategy = strategy
+        self._cycle = itertools.cycle(replicas) if replicas else None
+        self._lock = threading.Lock()
+
+    def choose(self, sticky: bool = False):
+        """Primary when there are no replicas or the caller must read its own writes"""
+        if sticky or not self.replicas:
+            return self.primary
+        with self._lock:
+            candidate = next(self._cycle)
+        if self.strategy == "least_connections":
+            # ties (e.g. idle replicas) go to the round-robin candidate
+            return min(
+                self.replicas,
+                key=lambda engine: (engine.pool.checkedout(), engine is not candidate),
+            )
+        return candidate
+
+
+# Wall-clock time of the caller's last successful write, sent back by browsers as a
+# cookie and by other clients as a header, so every worker can see it
+LAST_WRITE_COOKIE = "last_write"
+LAST_WRITE_HEADER = "X-Last-Write"
+
+
+def _last_write_at(request: Request) -> float | None:
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def wrote_recently(request: Request) -> bool:
+    """Whether the caller wrote within READ_YOUR_WRITES_SECONDS, so its reads must stay on the primary"""
+    last_write = _last_write_at(request)
+    # a timestamp from the future only pins reads for one window past now
+    return last_write is not None and -READ_YOUR_WRITES_SECONDS < time.time() - last_write < READ_YOUR_WRITES_SECONDS
+
+
+def _last_write_cookie(last_write: str) -> str:
+    cookie = SimpleCookie()
+    cookie[LAST_WRITE_COOKIE] = last_write
+    morsel = cookie[LAST_WRITE_COOKIE]
+    morsel["max-age"] = math.ceil(READ_YOUR_WRITES_SECONDS)
+    morsel["path"] = "/"
+    morsel["httponly"] = True
+    morsel["secure"] = IS_PROD
+    morsel["samesite"] = "lax"
+    return morsel.OutputString()
+
+
+class ReadYourWritesMiddleware:
+    """
+    Stamps successful unsafe requests with the write time, pinning the caller's
+    reads to the primary for a while. Plain ASGI: the stamp is added to the
+    http.response.start message.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message):
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] < 400
+                # claims were decoded on request.state by the auth dependency, if there was one
+                and get_request_user_email(Request(scope)) is not None
+            ):
+                last_write = f"{time.time():.3f}"
+                headers = MutableHeaders(scope=message)
+                headers[LAST_WRITE_HEADER] = last_write
+                headers.append("set-cookie", _last_write_cookie(last_write))
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,250 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import (
+    QUERY_BUDGETS,
+    DEFAULT_QUERY_BUDGET,
+    QUERY_BUDGET_STRICT,
+    SERVER_TIMING_HEADER,
+    SQL_STATS_ENABLED,
+)
+from app.core.logging_config import logger
+from app.core.metrics import metrics
+from app.core.replica_router import SAFE_METHODS
+from app.core.sql_stats import normalize_statement, record_statement, report_repeated_statements
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+SERVER_TIMING = "Server-Timing"
+
+
+class RequestContext:
+    """
+    What one request, or one `count_queries` block, did: the SQL statements it
+    ran, the time spent per stage ("db", "ai", "auth", ...) and, with SQL stats
+    on, how often each normalized statement repeated.
+
+    `count` leaves out statements run under `uncounted()`, and the context stops
+    recording once closed, so background tasks that run after the response
+    don't count towards the request.
+    """
+
+    def __init__(self, scope: dict | None = None):
+        self.scope = scope
+        self.count = 0
+        self.uncounted = 0
+        self.closed = False
+        self.statements: list[str] = []
+        self.repeats: Counter = Counter()
+        self.stages: dict[str, list] = {}  # stage -> [total ms, spans]
+        self.endpoint_returned: float | None = None
+        self._lock = threading.Lock()  # statements and spans can finish in several threadpool workers at once
+
+    @property
+    def route_path(self) -> str | None:
+        """Template of the matched route, e.g. "/api/v1/prompts/{prompt_id}", once routing is done"""
+        route = self.scope.get("route") if self.scope is not None else None
+        return getattr(route, "path", None)
+
+    @property
+    def route(self) -> str | None:
+        """"METHOD /path" for logs, the template when a route matched"""
+        if self.scope is None:
+            return None
+        return f"{self.scope['method']} {self.route_path or self.scope['path']}"
+
+    def add_statement(self, statement: str, counted: bool = True):
+        with self._lock:
+            if self.closed:
+                return
+            if not counted:
+                self.uncounted += 1
+                return
+            self.count += 1
+            self.statements.append(statement)
+
+    def add_repeat(self, normalized: str):
+        with self._lock:
+            if not self.closed:
+                self.repeats[normalized] += 1
+
+    def add_stage(self, stage: str, duration_ms: float):
+        with self._lock:
+            if self.closed:
+                return
+            entry = self.stages.setdefault(stage, [0.0, 0])
+            entry[0] += duration_ms
+            entry[1] += 1
+
+    def close(self):
+        """Stop recording: whatever runs from now on isn't part of the request"""
+        with self._lock:
+            self.closed = True
+
+    def server_timing(self, total_ms: float) -> str:
+        """Server-Timing value; stages can overlap (e.g. db inside auth), total is the whole request"""
+        parts = [f'{stage};dur={ms:.2f};desc="{count}x"' for stage, (ms, count) in self.stages.items()]
+        parts.append(f"total;dur={total_ms:.2f}")
+        return ", ".join(parts)
+
+
+# Mutable holder, so statements and spans recorded in threadpool workers (which
+# get a copy of the context) still reach the request's RequestContext
+_current_context: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+# False while running statements that aren't the endpoint's own, see `uncounted`
+_counting: ContextVar[bool] = ContextVar("count_statements", default=True)
+
+
+def current_request_context() -> RequestContext | None:
+    return _current_context.get()
+
+
+@contextmanager
+def count_queries():
+    """
+    Count SQL statements executed inside the block:
+
+        with count_queries() as stats:
+            update_prompt(db, prompt_id, prompt_update, user_id)
+        assert stats.count <= 6
+    """
+    context = RequestContext()
+    token = _current_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_context.reset(token)
+
+
+@contextmanager
+def uncounted():
+    """
+    Leave the statements run inside the block out of the query count (they still
+    add to the "db" time). For work whose cost depends on the worker's caches
+    rather than the endpoint, like loading the authenticated user.
+    """
+    token = _counting.set(False)
+    try:
+        yield
+    finally:
+        _counting.reset(token)
+
+
+def query_budget(method: str, route_path: str) -> int:
+    """Statement budget for an endpoint, e.g. ("PUT", "/api/v1/prompts/{prompt_id}")"""
+    return QUERY_BUDGETS.get(f"{method} {route_path}", DEFAULT_QUERY_BUDGET)
+
+
+def install_sql_instrumentation(engine: Engine):
+    """
+    One pair of cursor hooks on `engine` feeding every statement to the active
+    RequestContext (statement count and "db" time) and, when SQL_STATS_ENABLED,
+    to the per-process SQL stats.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_starts", []).append(time.perf_counter())
+        request_context = _current_context.get()
+        if request_context is not None:
+            request_context.add_statement(statement, _counting.get())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["statement_starts"].pop()) * 1000
+        request_context = _current_context.get()
+        if request_context is not None:
+            request_context.add_stage("db", duration_ms)
+        if SQL_STATS_ENABLED:
+            normalized = normalize_statement(statement)
+            if request_context is not None:
+                request_context.add_repeat(normalized)
+            route = request_context.route if request_context is not None else None
+            record_statement(normalized, duration_ms, route, parameters, executemany)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("statement_starts"):
+            conn.info["statement_starts"].pop()
+
+
+class RequestContextMiddleware:
+    """
+    Opens a RequestContext for each request, then reports it: the X-Query-Count
+    and Server-Timing headers, per-route stage histograms, query budget overruns
+    and statements the request repeated (possible N+1).
+
+    Plain ASGI, so streaming responses pass through untouched. The headers are
+    added to http.response.start and so cover the work done before the first
+    byte; the histograms, budget warning and N+1 check run after the last one.
+    The context is closed with the last byte, before any background task runs.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = RequestContext(scope)
+        start = time.perf_counter()
+        replaced = False
+
+        async def send_wrapper(message: Message):
+            nonlocal replaced
+            if message["type"] == "http.response.start":
+                headers = {QUERY_COUNT_HEADER: str(context.count)}
+                if SERVER_TIMING_HEADER:
+                    headers[SERVER_TIMING] = context.server_timing((time.perf_counter() - start) * 1000)
+                budget = query_budget(scope["method"], context.route_path or scope["path"])
+                # only reads are failed: a write has already been committed by now
+                if QUERY_BUDGET_STRICT and context.count > budget and scope["method"] in SAFE_METHODS:
+                    replaced = True
+                    response = JSONResponse(
+                        status_code=500,
+                        content={
+                            "error": "QueryBudgetExceeded",
+                            "message": f"{context.route} ran {context.count} SQL statements, budget is {budget}",
+                        },
+                        headers=headers,
+                    )
+                    await response(scope, receive, send)
+                    context.close()
+                    return
+                MutableHeaders(scope=message).update(headers)
+            elif replaced:
+                return  # the original body, replaced by the error above
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                context.close()
+
+        token = _current_context.set(context)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_context.reset(token)
+            context.close()
+            self._report(context, scope["method"], scope["path"])
+
+    @staticmethod
+    def _report(context: RequestContext, method: str, path: str):
+        route_path = context.route_path
+        for stage, (duration_ms, _) in list(context.stages.items()):
+            metrics.observe_stage(method, route_path or "unmatched", stage, duration_ms)
+        if SQL_STATS_ENABLED:
+            report_repeated_statements(context.route, context.repeats)
+        budget = query_budget(method, route_path or path)
+        if context.count > budget:
+            log = logger.error if QUERY_BUDGET_STRICT else logger.warning
+            log(f"Query budget exceeded: {context.route} ran {context.count} statements (budget {budget})")
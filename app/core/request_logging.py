@@ -1,43 +1,68 @@
-import time 
-from starlette.middleware.base import BaseHTTPMiddleware
+import random
+import time
+
 from starlette.requests import Request
-from jose import jwt, JWTError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import LOG_SAMPLE_RATES, LOG_DEFAULT_SAMPLE_RATE, LOG_SLOW_REQUEST_MS
 from app.core.logging_config import logger
-from app.core.config import SECRET_KEY, ALGORITHM
 from app.core.metrics import metrics
+from app.core.security import get_request_user_email
+
+
+class RequestLoggingMiddleware:
+    """
+    Records every request in the metrics and logs one structured line for it.
+
+    Plain ASGI rather than BaseHTTPMiddleware: no extra task or stream wrapping,
+    and streaming responses pass through untouched. Successful requests are
+    sampled per route (LOG_SAMPLE_RATES); errors and slow requests always log.
+    """
 
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status = 500  # unless a response starts
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        metrics.record_request()
-
-        start_time = time.time()
-        
-        # Extract user from token (optional - won't fail if no auth)
-        user_email = self._get_user_from_token(request)
-        user_info = f" by {user_email}" if user_email else ""
-        
-        logger.info(f"→ {request.method} {request.url.path}{user_info}")
-
-        response = await call_next(request)
-
-        duration = (time.time() - start_time) * 1000  # ms
-        metrics.record_response_time(duration)
-        status = response.status_code
-        logger.info(f"← {request.method} {request.url.path} [{status}] in {duration:.2f}ms")
-
-        return response
-    
-    def _get_user_from_token(self, request: Request) -> str | None:
-        """Extract user email from JWT token if present"""
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return None
-        
-        token = auth_header.replace("Bearer ", "")
-        
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            return payload.get("sub")  # user email
-        except (JWTError, Exception):
-            return None
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = (time.perf_counter() - start_time) * 1000  # ms, including the streamed body
+            # route template, so /prompts/1 and /prompts/2 share a histogram
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            metrics.observe_request(method, route, status, duration)
+            if self._should_log(f"{method} {route}", status, duration):
+                self._log(Request(scope), route, status, duration)
+
+    @staticmethod
+    def _should_log(route_key: str, status: int, duration: float) -> bool:
+        if status >= 400 or duration >= LOG_SLOW_REQUEST_MS:
+            return True
+        rate = LOG_SAMPLE_RATES.get(route_key, LOG_DEFAULT_SAMPLE_RATE)
+        return rate >= 1 or random.random() < rate
+
+    @staticmethod
+    def _log(request: Request, route: str, status: int, duration: float):
+        fields = {
+            "method": request.method,
+            "path": request.url.path,
+            "route": route,
+            "status": status,
+            "duration_ms": round(duration, 2),
+            # claims were decoded on request.state by the auth dependency, if there was one
+            "user": get_request_user_email(request),
+        }
+        logger.info(f"{request.method} {request.url.path} [{status}] in {duration:.2f}ms", extra={"fields": fields})
@@ -1,22 +1,33 @@
-from fastapi import Depends, HTTPException, status
+import time
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
+from fastapi.security.utils import get_authorization_scheme_param
 from jose import jwt, JWTError
 from datetime import datetime, timedelta
 import bcrypt
-from app.core.config import SECRET_KEY, ALGORITHM, EXPIRE_MINUTES
+from app.core.config import SECRET_KEY, ALGORITHM, EXPIRE_MINUTES, BCRYPT_ROUNDS, TOKEN_CACHE_SIZE
+from app.core.lru_cache import TTLCache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 
-# Password hashing functions
-def hash_password(password: str) -> bytes:
+# Password hashing functions (run in the password hasher's process pool, see password_hasher.py)
+def hash_password(password: str, rounds: int = BCRYPT_ROUNDS) -> bytes:
     """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds))
+
+def hash_rounds(hashed_password: bytes) -> int:
+    """bcrypt cost factor of a hash ("$2b$12$..." -> 12)"""
+    return int(hashed_password.split(b"$")[2])
 
 def verify_password(plain_password: str, hashed_password: bytes) -> bool:
     """Verify a password against its hash"""
     return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password)
 
 # Token functions
+
+# Verified claims by raw token; entries never outlive the token's own expiry
+_token_cache = TTLCache(TOKEN_CACHE_SIZE, ttl=EXPIRE_MINUTES * 60)
+
 def create_access_token(data: dict) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -24,27 +35,50 @@ def create_access_token(data: dict) -> str:
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user_email(token: str = Depends(oauth2_scheme)) -> str:
-    """Get current user email from JWT token"""
+def decode_token(token: str) -> dict | None:
+    """Verified claims of a token, or None if it's invalid or expired
+
+    Verified tokens are cached until they expire, so repeat requests skip the
+    signature check.
+    """
+    claims = _token_cache.get(token)
+    if claims is not None:
+        return claims
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return email
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except JWTError:
+        return None
+    expires_at = None
+    if "exp" in claims:
+        expires_at = time.monotonic() + (claims["exp"] - time.time())
+    _token_cache.put(token, claims, expires_at)
+    return claims
+
+def get_request_claims(request: Request) -> dict | None:
+    """Claims of the request's bearer token, decoded at most once per request"""
+    if not hasattr(request.state, "token_claims"):
+        token = get_token(request)
+        request.state.token_claims = decode_token(token) if token else None
+    return request.state.token_claims
+
+def get_request_user_email(request: Request) -> str | None:
+    """Subject of the bearer token, without failing on missing or invalid tokens"""
+    claims = get_request_claims(request)
+    return claims.get("sub") if claims else None
+
+def get_current_user_email(request: Request, token: str = Depends(oauth2_scheme)) -> str:
+    """Get current user email from JWT token"""
+    email = get_request_user_email(request)
+    if email is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return email
 
-def get_token(request):
-    auth_header = request.headers.get("Authorization")
-    if auth_header and auth_header.startswith("Bearer "):
-        return auth_header.split(" ")[1]
+def get_token(request: Request) -> str | None:
+    scheme, token = get_authorization_scheme_param(request.headers.get("Authorization"))
+    if scheme.lower() == "bearer" and token:
+        return token
     return None
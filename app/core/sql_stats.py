@@ -0,0 +1,122 @@
+import re
+import threading
+from collections import Counter
+
+from app.core.config import SLOW_QUERY_MS, N_PLUS_ONE_THRESHOLD, SQL_STATS_MAX_STATEMENTS
+from app.core.logging_config import logger
+
+# Bind parameter styles of the drivers we run on: qmark, format, pyformat, numeric, named
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+_REPEATED_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """SQL with literals replaced by ? and IN lists / multi-row VALUES collapsed, for grouping"""
+    text = _WHITESPACE.sub(" ", statement).strip()
+    text = _STRING.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _PLACEHOLDER_LIST.sub("(...)", text)
+    return _REPEATED_ROWS.sub("(...), ...", text)
+
+
+def parameter_shape(parameters, executemany: bool) -> str:
+    """Types of the bound parameters, never their values (they may hold personal data)"""
+    if executemany:
+        rows = list(parameters or [])
+        return f"{len(rows)} x {parameter_shape(rows[0], False)}" if rows else "0 rows"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+class StatementStats:
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow_calls = 0
+        self.n_plus_one_requests = 0
+        self.routes: Counter = Counter()
+
+
+class SqlStats:
+    """Per-process totals by normalized statement, bounded to `max_statements` entries"""
+
+    def __init__(self, max_statements: int):
+        self.max_statements = max_statements
+        self._statements: dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, statement: str) -> StatementStats:
+        entry = self._statements.get(statement)
+        if entry is None:
+            if len(self._statements) >= self.max_statements:
+                # make room by forgetting the cheapest statement
+                cheapest = min(self._statements, key=lambda s: self._statements[s].total_ms)
+                del self._statements[cheapest]
+            entry = self._statements[statement] = StatementStats()
+        return entry
+
+    def record(self, statement: str, duration_ms: float, route: str | None, slow: bool):
+        with self._lock:
+            entry = self._entry(statement)
+            entry.calls += 1
+            entry.total_ms += duration_ms
+            entry.max_ms = max(entry.max_ms, duration_ms)
+            entry.slow_calls += slow
+            if route:
+                entry.routes[route] += 1
+
+    def record_n_plus_one(self, statement: str):
+        with self._lock:
+            self._entry(statement).n_plus_one_requests += 1
+
+    def top(self, limit: int) -> list[dict]:
+        """Statements with the most total time first"""
+        with self._lock:
+            items = sorted(self._statements.items(), key=lambda item: item[1].total_ms, reverse=True)[:limit]
+            return [
+                {
+                    "statement": statement,
+                    "calls": entry.calls,
+                    "total_ms": round(entry.total_ms, 3),
+                    "mean_ms": round(entry.total_ms / entry.calls, 3) if entry.calls else 0.0,
+                    "max_ms": round(entry.max_ms, 3),
+                    "slow_calls": entry.slow_calls,
+                    "n_plus_one_requests": entry.n_plus_one_requests,
+                    "routes": [route for route, _ in entry.routes.most_common(3)],
+                }
+                for statement, entry in items
+            ]
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+
+
+sql_stats = SqlStats(SQL_STATS_MAX_STATEMENTS)
+
+
+def record_statement(normalized: str, duration_ms: float, route: str | None, parameters, executemany: bool):
+    """Add one executed statement to `sql_stats`, logging it when it's slow"""
+    slow = duration_ms >= SLOW_QUERY_MS
+    sql_stats.record(normalized, duration_ms, route, slow)
+    if slow:
+        logger.warning(
+            f"Slow query ({duration_ms:.1f} ms) in {route or 'background task'}: {normalized} "
+            f"[params: {parameter_shape(parameters, executemany)}]"
+        )
+
+
+def report_repeated_statements(route: str | None, repeats: Counter):
+    """Flag statements one request ran N_PLUS_ONE_THRESHOLD+ times"""
+    for statement, count in list(repeats.items()):
+        if count >= N_PLUS_ONE_THRESHOLD:
+            sql_stats.record_n_plus_one(statement)
+            logger.warning(f"Possible N+1: {route} ran {count}x: {statement}")
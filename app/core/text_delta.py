@@ -0,0 +1,56 @@
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+
+# Words with their trailing whitespace (plus any leading whitespace run), so
+# joining the tokens always gives back the original text byte for byte.
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into word tokens that concatenate back to the original"""
+    return TOKEN_PATTERN.findall(text)
+
+
+def make_delta(base: str, target: str) -> list:
+    """
+    Describe `target` as edits against `base`.
+
+    The delta is a list of `[start, end]` ranges copied from the base tokens and
+    plain strings inserted verbatim.
+    """
+    base_tokens = tokenize(base)
+    target_tokens = tokenize(target)
+    matcher = SequenceMatcher(None, base_tokens, target_tokens, autojunk=False)
+
+    delta = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            delta.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            delta.append("".join(target_tokens[j1:j2]))
+    return delta
+
+
+def apply_delta(base: str, delta: list) -> str:
+    """Rebuild the target text from `base` and a delta produced by `make_delta`"""
+    base_tokens = tokenize(base)
+    parts = []
+    for op in delta:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            start, end = op
+            parts.append("".join(base_tokens[start:end]))
+    return "".join(parts)
+
+
+def pack(value) -> bytes:
+    """Serialize a body (str) or delta (list) into compressed bytes"""
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack(data: bytes):
+    """Inverse of `pack`"""
+    return json.loads(zlib.decompress(data).decode("utf-8"))
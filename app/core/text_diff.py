@@ -0,0 +1,128 @@
+from typing import Sequence
+
+from app.core.text_delta import tokenize
+
+EQUAL, DELETE, INSERT = "equal", "delete", "insert"
+
+
+class DiffTooLarge(Exception):
+    """The shortest edit script needs more than the allowed number of edits"""
+
+
+def split_tokens(text: str, granularity: str) -> list[str]:
+    """Split text into the units compared by `myers_diff` ("line" or "word")"""
+    if granularity == "line":
+        return text.splitlines(keepends=True)
+    return tokenize(text)
+
+
+def _middle_snake(a: Sequence, a_lo: int, a_hi: int, b: Sequence, b_lo: int, b_hi: int, max_edits: int | None):
+    """
+    Find the middle snake of a shortest edit script between a[a_lo:a_hi] and b[b_lo:b_hi].
+
+    Returns (x, y, u, v) relative to the slices: the snake runs diagonally from
+    (x, y) to (u, v) and lies on some shortest path. Raises DiffTooLarge once
+    the script is known to need more than `max_edits` edits.
+    """
+    n, m = a_hi - a_lo, b_hi - b_lo
+    delta = n - m
+    odd = delta % 2 != 0
+    offset = n + m + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+
+    for d in range((n + m + 1) // 2 + 1):
+        # the snake is found at d = ceil(D / 2) for a script of D edits
+        if max_edits is not None and 2 * d - 1 > max_edits:
+            raise DiffTooLarge()
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            # reverse diagonal c = delta - k; it was reached with d - 1 edits
+            if odd and -(d - 1) <= delta - k <= d - 1:
+                if x + backward[offset + delta - k] >= n:
+                    return start_x, start_y, x, y
+
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[a_hi - 1 - x] == b[b_hi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if not odd and -d <= delta - k <= d:
+                if x + forward[offset + delta - k] >= n:
+                    return n - x, m - y, n - start_x, m - start_y
+
+    raise AssertionError("middle snake not found")
+
+
+def myers_diff(a: Sequence, b: Sequence, max_edits: int | None = None) -> list[tuple[str, int, int, int, int]]:
+    """
+    Shortest edit script from `a` to `b` using Myers' linear-space refinement.
+
+    Returns difflib-style opcodes `(tag, i1, i2, j1, j2)` with tags
+    "equal", "delete" and "insert", adjacent opcodes never sharing a tag.
+    The work grows with (len(a) + len(b)) * edits, so pass `max_edits` to
+    give up with DiffTooLarge on inputs that differ too much.
+    """
+    ops: list[tuple[str, int, int, int, int]] = []
+
+    def emit(tag, i1, i2, j1, j2):
+        if i1 == i2 and j1 == j2:
+            return
+        if ops and ops[-1][0] == tag:
+            _, p1, _, q1, _ = ops[-1]
+            ops[-1] = (tag, p1, i2, q1, j2)
+        else:
+            ops.append((tag, i1, i2, j1, j2))
+
+    # Explicit stack instead of recursion. Items are popped in output order:
+    # ("solve", ...) splits a subproblem, ("equal", ...) emits a matched run.
+    stack = [("solve", 0, len(a), 0, len(b))]
+    while stack:
+        kind, a_lo, a_hi, b_lo, b_hi = stack.pop()
+        if kind == EQUAL:
+            emit(EQUAL, a_lo, a_hi, b_lo, b_hi)
+            continue
+
+        # Common prefix and suffix are free and keep the subproblems small
+        prefix = 0
+        while a_lo + prefix < a_hi and b_lo + prefix < b_hi and a[a_lo + prefix] == b[b_lo + prefix]:
+            prefix += 1
+        suffix = 0
+        while (
+            a_hi - suffix > a_lo + prefix
+            and b_hi - suffix > b_lo + prefix
+            and a[a_hi - 1 - suffix] == b[b_hi - 1 - suffix]
+        ):
+            suffix += 1
+
+        emit(EQUAL, a_lo, a_lo + prefix, b_lo, b_lo + prefix)
+        if suffix:
+            stack.append((EQUAL, a_hi - suffix, a_hi, b_hi - suffix, b_hi))
+        i1, i2, j1, j2 = a_lo + prefix, a_hi - suffix, b_lo + prefix, b_hi - suffix
+
+        if i1 == i2 or j1 == j2:
+            emit(DELETE, i1, i2, j1, j1)
+            emit(INSERT, i2, i2, j1, j2)
+            continue
+
+        x, y, u, v = _middle_snake(a, i1, i2, b, j1, j2, max_edits)
+        stack.append(("solve", i1 + u, i2, j1 + v, j2))
+        stack.append((EQUAL, i1 + x, i1 + u, j1 + y, j1 + v))
+        stack.append(("solve", i1, i1 + x, j1, j1 + y))
+
+    return ops
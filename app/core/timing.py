@@ -0,0 +1,88 @@
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+
+from app.core.request_context import current_request_context
+
+
+@contextmanager
+def span(stage: str):
+    """Add the time spent inside the block to the current request's `stage`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        context = current_request_context()
+        if context is not None:
+            context.add_stage(stage, (time.perf_counter() - start) * 1000)
+
+
+def timed(stage: str):
+    """Decorator form of `span` for sync and async functions"""
+
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def _mark_endpoint_return(endpoint):
+    """Wrap an endpoint to note when it returns; what follows is response serialization"""
+    if getattr(endpoint, "_marks_return", False):
+        return endpoint
+
+    def mark():
+        context = current_request_context()
+        if context is not None:
+            context.endpoint_returned = time.perf_counter()
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                mark()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                mark()
+    wrapper._marks_return = True
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that times response-model validation and rendering as the "serialize" stage"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _mark_endpoint_return(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request: Request):
+            response = await handler(request)
+            context = current_request_context()
+            if context is not None and context.endpoint_returned is not None:
+                context.add_stage("serialize", (time.perf_counter() - context.endpoint_returned) * 1000)
+            return response
+
+        return timed_handler
@@ -2,34 +2,88 @@ from .crud_user import (
     get_user_by_email,
     get_user_by_id,
     create_user,
+    update_password_hash,
     authenticate_user,
+    get_cached_user,
+    cache_user,
+    invalidate_user,
+)
+from .crud_version_content import (
+    store_version_content,
+    load_version_contents,
+    get_version_contents,
+    delete_unreferenced_version_contents,
+)
+from .crud_user_stats import (
+    get_user_stats,
+    rebuild_user_stats,
+    record_prompt_changes,
 )
 from .crud_prompt import (
     create_prompt,
     get_prompts_by_user,
+    get_prompt_list,
+    PROMPT_LIST_COLUMNS,
     get_prompt_by_id,
+    get_user_prompt,
+    prompt_exists,
     update_prompt,
     delete_prompt,
+    delete_prompts,
+    soft_delete_prompts,
+    purge_deleted_prompts,
     search_user_prompts,
+    fuzzy_search_user_prompts,
     get_prompt_versions,
+    get_prompt_version,
     rollback_prompt_to_version,
     get_prompt_version_count,
     get_total_prompts,
     get_recent_prompts,
+    bulk_create_prompts,
+    embed_pending_prompts,
+    iter_prompt_export,
+    iter_prompt_tombstones,
+    prune_prompt_tombstones,
 )
 
 __all__ = [
+    "get_user_stats",
+    "rebuild_user_stats",
+    "record_prompt_changes",
+    "store_version_content",
+    "load_version_contents",
+    "get_version_contents",
+    "delete_unreferenced_version_contents",
     "get_user_by_email",
     "get_user_by_id",
     "create_user",
+    "update_password_hash",
+    "get_cached_user",
+    "cache_user",
+    "invalidate_user",
     "authenticate_user",
     "create_prompt",
     "get_prompts_by_user",
+    "get_prompt_list",
+    "PROMPT_LIST_COLUMNS",
     "get_prompt_by_id",
+    "get_user_prompt",
+    "prompt_exists",
     "update_prompt",
     "delete_prompt",
+    "delete_prompts",
+    "soft_delete_prompts",
+    "purge_deleted_prompts",
     "search_user_prompts",
+    "fuzzy_search_user_prompts",
     "get_prompt_versions",
+    "get_prompt_version",
     "rollback_prompt_to_version",
     "get_prompt_version_count",
+    "bulk_create_prompts",
+    "embed_pending_prompts",
+    "iter_prompt_export",
+    "iter_prompt_tombstones",
+    "prune_prompt_tombstones",
 ]
@@ -0,0 +1,58 @@
+"""
+Async versions of the reads on the request path.
+
+They reuse the statements built in the sync CRUD modules. Writes and the
+more involved reads run the sync functions through `AsyncSession.run_sync`,
+which executes them on the async connection without blocking the event loop.
+"""
+from datetime import datetime
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.prompt import Prompt
+from app.models.user import User
+from app.crud.crud_user import user_by_email_statement
+from app.crud.crud_prompt import (
+    user_prompt_statement,
+    prompt_exists_statement,
+    prompt_list_statement,
+    prompt_versions_statement,
+)
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
+    """Get a user by email"""
+    return (await db.scalars(user_by_email_statement(email))).first()
+
+
+async def get_user_prompt(db: AsyncSession, prompt_id: int, user_id: int) -> Prompt | None:
+    """Get a prompt only if it belongs to the user, in a single query"""
+    return (await db.scalars(user_prompt_statement(prompt_id, user_id))).first()
+
+
+async def prompt_exists(db: AsyncSession, prompt_id: int) -> bool:
+    """Whether a (not deleted) prompt with this id exists, whoever owns it"""
+    return await db.scalar(prompt_exists_statement(prompt_id))
+
+
+async def get_prompt_list(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+    fields: List[str] | None = None,
+    preview_chars: int | None = None,
+) -> list:
+    """Projected prompt list rows, see `crud_prompt.get_prompt_list`"""
+    result = await db.execute(prompt_list_statement(user_id, skip, limit, after, fields, preview_chars))
+    return result.all()
+
+
+async def get_prompt_versions(
+    db: AsyncSession,
+    prompt_id: int,
+    limit: int | None = None,
+    before_version: int | None = None,
+) -> list:
+    """Versions of a prompt, newest first"""
+    return (await db.scalars(prompt_versions_statement(prompt_id, limit, before_version))).all()
@@ -1,131 +1,592 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import insert, update, delete, select, func, tuple_
 from app.models.prompt import Prompt
 from app.schemas.prompt import PromptCreate, PromptUpdate
-from typing import List
+from typing import List, Iterator
 from app.models.prompt_version import PromptVersion
+from app.models.prompt_tombstone import PromptTombstone
+from app.core.database import insert_replacing_conflicts
+from app.crud.crud_version_content import (
+    store_version_content,
+    store_version_contents,
+    get_version_contents,
+    delete_unreferenced_version_contents,
+)
 from datetime import datetime
+from app.crud.crud_user_stats import record_prompt_changes
 from app.services.prompt_ai_service import PromptAIService
+from app.services.full_text_search_service import FullTextSearchService
+from app.services.fuzzy_search_service import FuzzySearchService
 
-def create_prompt(db: Session, prompt: PromptCreate, user_id: int) -> Prompt:
-    """Create a new prompt"""
-    ai = PromptAIService()
+def create_prompt(db: Session, prompt: PromptCreate, user_id: int, embedding: list[float] | None = None) -> Prompt:
+    """Create a new prompt (pass `embedding` when it was already computed off the event loop)"""
+    content_hash = store_version_content(db, prompt.content)
     db_prompt = Prompt(
         title=prompt.title,
         content=prompt.content,
         description=prompt.description,
-        user_id=user_id
+        user_id=user_id,
+        latest_version=1,
+        version_count=1,
+        latest_content_hash=content_hash,
     )
-    db_prompt.embedding = ai.embed_prompt(prompt.content)
+    db_prompt.embedding = embedding if embedding is not None else PromptAIService().embed_prompt(prompt.content)
     db.add(db_prompt)
-    db.commit()
-    db.refresh(db_prompt)
+    db.flush()
 
     # Create version entry
     version = PromptVersion(
         prompt_id=db_prompt.id,
         version_number=1,
-        content=prompt.content,
+        content_hash=content_hash,
         user_id=user_id
     )
     db.add(version)
+    record_prompt_changes(
+        db, user_id, prompts=1, versions=1,
+        touched=[(db_prompt.id, db_prompt.title, db_prompt.updated_at)],
+    )
     db.commit()
-    db.refresh(version)
     return db_prompt
 
-def get_prompts_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Prompt]:
-    """Get all prompts for a user"""
-    return db.query(Prompt).filter(Prompt.user_id == user_id).offset(skip).limit(limit).all()
+def bulk_create_prompts(db: Session, prompts: List[PromptCreate], user_id: int) -> List[int]:
+    """Insert prompts and their initial versions with executemany statements in one transaction.
+
+    Embeddings are left empty; callers backfill them with `embed_pending_prompts`.
+    """
+    if not prompts:
+        return []
+
+    content_hashes = store_version_contents(db, [p.content for p in prompts])
+    rows = db.execute(
+        insert(Prompt).returning(Prompt.id, Prompt.title, Prompt.updated_at, sort_by_parameter_order=True),
+        [
+            {
+                "title": p.title,
+                "content": p.content,
+                "description": p.description,
+                "user_id": user_id,
+                "latest_version": 1,
+                "version_count": 1,
+                "latest_content_hash": content_hash,
+            }
+            for p, content_hash in zip(prompts, content_hashes)
+        ],
+    ).all()
+    prompt_ids = [row.id for row in rows]
+
+    db.execute(
+        insert(PromptVersion),
+        [
+            {
+                "prompt_id": prompt_id,
+                "version_number": 1,
+                "content_hash": content_hash,
+                "user_id": user_id,
+            }
+            for prompt_id, content_hash in zip(prompt_ids, content_hashes)
+        ],
+    )
+    record_prompt_changes(db, user_id, prompts=len(rows), versions=len(rows), touched=[tuple(row) for row in rows])
+    db.commit()
+    return prompt_ids
+
+def embed_pending_prompts(db: Session, prompt_ids: List[int], batch_size: int = 64) -> int:
+    """Compute missing embeddings for the given prompts in batches, returns the number embedded"""
+    ai = PromptAIService()
+    embedded = 0
+
+    for start in range(0, len(prompt_ids), batch_size):
+        batch_ids = prompt_ids[start:start + batch_size]
+        rows = (
+            db.query(Prompt.id, Prompt.content)
+            .filter(Prompt.id.in_(batch_ids), Prompt.embedding.is_(None))
+            .all()
+        )
+        if not rows:
+            continue
+
+        embeddings = ai.embed_prompts([row.content for row in rows])
+        db.execute(
+            update(Prompt),
+            [
+                {"id": row.id, "embedding": embedding}
+                for row, embedding in zip(rows, embeddings)
+            ],
+        )
+        db.commit()
+        embedded += len(rows)
+
+    return embedded
+
+def _paginate_prompts(query, skip: int, limit: int, after: tuple[datetime, int] | None):
+    """Order prompts newest first and apply a keyset (`after`) or offset (`skip`) page"""
+    query = query.order_by(Prompt.updated_at.desc(), Prompt.id.desc())
+    if after is not None:
+        query = query.filter(tuple_(Prompt.updated_at, Prompt.id) < after)
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def get_prompts_by_user(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+) -> List[Prompt]:
+    """Get prompts for a user, most recently updated first.
+
+    `after` is the (updated_at, id) of the last prompt of the previous page; when
+    given, `skip` is ignored and the page is an index range scan instead of an OFFSET.
+    """
+    query = db.query(Prompt).filter(Prompt.user_id == user_id, Prompt.deleted_at.is_(None))
+    return _paginate_prompts(query, skip, limit, after).all()
+
+# Columns a prompt list can be projected to; id and updated_at are always returned for the cursor
+PROMPT_LIST_COLUMNS = {
+    "id": Prompt.id,
+    "title": Prompt.title,
+    "content": Prompt.content,
+    "description": Prompt.description,
+    "created_at": Prompt.created_at,
+    "updated_at": Prompt.updated_at,
+    "version_count": Prompt.version_count,
+}
+DEFAULT_PROMPT_LIST_FIELDS = ["id", "title", "content", "description", "updated_at"]
+
+def prompt_list_statement(
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+    fields: List[str] | None = None,
+    preview_chars: int | None = None,
+):
+    fields = set(fields or DEFAULT_PROMPT_LIST_FIELDS) | {"id", "updated_at"}
+    columns = []
+    for name, column in PROMPT_LIST_COLUMNS.items():
+        if name not in fields:
+            continue
+        if name == "content" and preview_chars is not None:
+            columns.append(func.substr(Prompt.content, 1, preview_chars).label("content"))
+            columns.append((func.length(Prompt.content) > preview_chars).label("content_truncated"))
+        else:
+            columns.append(column)
+
+    stmt = select(*columns).where(Prompt.user_id == user_id, Prompt.deleted_at.is_(None))
+    return _paginate_prompts(stmt, skip, limit, after)
+
+def get_prompt_list(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[datetime, int] | None = None,
+    fields: List[str] | None = None,
+    preview_chars: int | None = None,
+) -> list:
+    """Like `get_prompts_by_user` but selects only the requested columns as plain rows.
+
+    With `preview_chars` the content is truncated in the database and a
+    `content_truncated` flag is added, so full bodies never leave it.
+    """
+    return db.execute(prompt_list_statement(user_id, skip, limit, after, fields, preview_chars)).all()
+
+def _after_watermark(stmt, time_column, id_column, since: datetime | None, since_id: int | None):
+    """Rows after an export watermark: (time, id) > (since, since_id), or time >= since without an id"""
+    if since is None:
+        return stmt
+    if since_id is None:
+        return stmt.where(time_column >= since)
+    return stmt.where(tuple_(time_column, id_column) > (since, since_id))
+
+def _export_versions(db: Session, prompt_ids: List[int], after_version: int = 0, limit: int | None = None) -> dict[int, List[dict]]:
+    """Versions of the prompts with their full bodies, by prompt id and in version order"""
+    stmt = (
+        select(
+            PromptVersion.prompt_id,
+            PromptVersion.version_number,
+            PromptVersion.content,
+            PromptVersion.content_hash,
+            PromptVersion.created_at,
+        )
+        .where(PromptVersion.prompt_id.in_(prompt_ids), PromptVersion.version_number > after_version)
+        .order_by(PromptVersion.prompt_id, PromptVersion.version_number)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    version_rows = db.execute(stmt).all()
+    contents = get_version_contents(db, version_rows)
+
+    versions: dict[int, List[dict]] = {prompt_id: [] for prompt_id in prompt_ids}
+    for v, content in zip(version_rows, contents):
+        versions[v.prompt_id].append(
+            {
+                "version_number": v.version_number,
+                "content": content,
+                "created_at": v.created_at,
+            }
+        )
+    return versions
+
+def _iter_version_chunks(db: Session, prompt_id: int, chunk_size: int) -> Iterator[List[dict]]:
+    """One prompt's versions, `chunk_size` at a time by keyset on version_number"""
+    last = 0
+    while True:
+        chunk = _export_versions(db, [prompt_id], last, chunk_size)[prompt_id]
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1]["version_number"]
+
+def iter_prompt_export(
+    db: Session,
+    user_id: int,
+    since: datetime | None = None,
+    since_id: int | None = None,
+    batch_size: int = 500,
+    version_chunk_size: int = 1000,
+) -> Iterator[tuple[dict, Iterator[List[dict]]]]:
+    """Stream a user's prompts as (prompt, iterator over chunks of its versions).
+
+    Prompts come from a server-side cursor ordered by (updated_at, id), so the
+    last one exported is the watermark (`since`, `since_id`) of the next
+    incremental export. Versions of consecutive prompts are fetched together
+    up to `version_chunk_size` rows; a longer history is streamed in chunks
+    of that size, so memory stays bounded however deep a history gets.
+    Consume a prompt's versions before advancing to the next prompt.
+    """
+    stmt = (
+        select(
+            Prompt.id,
+            Prompt.title,
+            Prompt.content,
+            Prompt.description,
+            Prompt.created_at,
+            Prompt.updated_at,
+            Prompt.version_count,
+        )
+        .where(Prompt.user_id == user_id, Prompt.deleted_at.is_(None))
+        .order_by(Prompt.updated_at, Prompt.id)
+    )
+    stmt = _after_watermark(stmt, Prompt.updated_at, Prompt.id, since, since_id)
+
+    result = db.execute(stmt.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        group, group_versions = [], 0
+        for row in list(rows) + [None]:
+            # flush the pending group before it would exceed a chunk, and at the end of the partition
+            if group and (row is None or group_versions + row.version_count > version_chunk_size):
+                versions = _export_versions(db, [r.id for r in group])
+                for r in group:
+                    yield _export_prompt(r), iter([versions[r.id]])
+                group, group_versions = [], 0
+            if row is None:
+                break
+            if row.version_count > version_chunk_size:
+                yield _export_prompt(row), _iter_version_chunks(db, row.id, version_chunk_size)
+                continue
+            group.append(row)
+            group_versions += row.version_count
+
+def _export_prompt(row) -> dict:
+    return {
+        "id": row.id,
+        "title": row.title,
+        "content": row.content,
+        "description": row.description,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
+
+def iter_prompt_tombstones(
+    db: Session,
+    user_id: int,
+    since: datetime,
+    since_id: int | None = None,
+    batch_size: int = 500,
+) -> Iterator[dict]:
+    """Prompts deleted after an export watermark, as {"id", "deleted", "updated_at"} in (deleted_at, id) order"""
+    stmt = (
+        select(PromptTombstone.prompt_id, PromptTombstone.deleted_at)
+        .where(PromptTombstone.user_id == user_id)
+        .order_by(PromptTombstone.deleted_at, PromptTombstone.prompt_id)
+    )
+    stmt = _after_watermark(stmt, PromptTombstone.deleted_at, PromptTombstone.prompt_id, since, since_id)
+    for row in db.execute(stmt.execution_options(yield_per=batch_size)):
+        yield {"id": row.prompt_id, "deleted": True, "updated_at": row.deleted_at}
+
+def _record_tombstones(db: Session, user_id: int, prompt_ids: List[int]):
+    if prompt_ids:
+        now = datetime.utcnow()
+        # SQLite hands a deleted prompt's id to the next prompt, so its tombstone may already exist
+        db.execute(
+            insert_replacing_conflicts(db, PromptTombstone, [PromptTombstone.prompt_id], ["user_id", "deleted_at"]),
+            [{"prompt_id": prompt_id, "user_id": user_id, "deleted_at": now} for prompt_id in prompt_ids],
+        )
+
+def prune_prompt_tombstones(db: Session, older_than: datetime) -> int:
+    """Forget deletions older than the retention window; clients that last synced before it do a full export"""
+    result = db.execute(delete(PromptTombstone).where(PromptTombstone.deleted_at < older_than))
+    db.commit()
+    return result.rowcount
 
 def get_prompt_by_id(db: Session, prompt_id: int) -> Prompt | None:
     """Get a single prompt by ID"""
-    return db.query(Prompt).filter(Prompt.id == prompt_id).first()
+    return db.query(Prompt).filter(Prompt.id == prompt_id, Prompt.deleted_at.is_(None)).first()
 
-def update_prompt(db: Session, prompt_id: int, prompt_update: PromptUpdate, user_id: int) -> Prompt | None:
-    """Update a prompt and create a version entry"""
-    ai = PromptAIService()
-    db_prompt = get_prompt_by_id(db, prompt_id)
+# Statements shared by the sync functions here and their async counterparts in crud_async
+
+def user_prompt_statement(prompt_id: int, user_id: int):
+    return select(Prompt).where(Prompt.id == prompt_id, Prompt.user_id == user_id, Prompt.deleted_at.is_(None))
+
+def prompt_exists_statement(prompt_id: int):
+    return select(select(Prompt.id).where(Prompt.id == prompt_id, Prompt.deleted_at.is_(None)).exists())
+
+def get_user_prompt(db: Session, prompt_id: int, user_id: int) -> Prompt | None:
+    """Get a prompt only if it belongs to the user, in a single query"""
+    return db.scalars(user_prompt_statement(prompt_id, user_id)).first()
+
+def prompt_exists(db: Session, prompt_id: int) -> bool:
+    """Whether a (not deleted) prompt with this id exists, whoever owns it"""
+    return db.scalar(prompt_exists_statement(prompt_id))
+
+def _load_prompt(db: Session, prompt_id: int) -> Prompt | None:
+    """Prompt from the session's identity map, so a row the caller already loaded costs no query"""
+    db_prompt = db.get(Prompt, prompt_id)
+    if db_prompt is None or db_prompt.deleted_at is not None:
+        return None
+    return db_prompt
+
+def update_prompt(
+    db: Session,
+    prompt_id: int,
+    prompt_update: PromptUpdate,
+    user_id: int,
+    embedding: list[float] | None = None,
+) -> Prompt | None:
+    """Update a prompt and create a version entry (see `create_prompt` for `embedding`)
+
+    The fields, and for a content change the new version number, content hash
+    and embedding, are written by one UPDATE ... RETURNING. Bumping the counter
+    in SQL holds the row lock until commit, so concurrent edits get distinct
+    version numbers, and the returned row refreshes the loaded prompt.
+    """
+    db_prompt = _load_prompt(db, prompt_id)
     if not db_prompt:
         return None
-    
-    # Only create version if content is being updated
+
+    values = prompt_update.model_dump(exclude_unset=True)
     if prompt_update.content is not None:
-        # Get last version number
-        last_version = (
-            db.query(PromptVersion)
-            .filter(PromptVersion.prompt_id == prompt_id)
-            .order_by(PromptVersion.version_number.desc())
-            .first()
+        # Stored as a delta against the version the caller loaded when possible
+        content_hash = store_version_content(db, prompt_update.content, db_prompt.latest_content_hash)
+        values.update(
+            latest_version=Prompt.latest_version + 1,
+            version_count=Prompt.version_count + 1,
+            latest_content_hash=content_hash,
+            embedding=embedding if embedding is not None else PromptAIService().embed_prompt(prompt_update.content),
         )
-        
-        new_version_number = 1 if not last_version else last_version.version_number + 1
-        
-        # Create version entry
-        version = PromptVersion(
+
+    if values:
+        db.execute(
+            update(Prompt)
+            .where(Prompt.id == prompt_id)
+            .values(**values)
+            .returning(Prompt)
+            .execution_options(populate_existing=True)
+        ).scalar_one()
+
+    if prompt_update.content is not None:
+        db.add(PromptVersion(
             prompt_id=prompt_id,
-            version_number=new_version_number,
-            content=prompt_update.content,
+            version_number=db_prompt.latest_version,
+            content_hash=content_hash,
             user_id=user_id
-        )
-        version.embedding = ai.embed_prompt(prompt_update.content)
-        db.add(version)
-    
-    # Update prompt fields
-    update_data = prompt_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_prompt, field, value)
-    
+        ))
+    record_prompt_changes(
+        db, db_prompt.user_id, versions=1 if prompt_update.content is not None else 0,
+        touched=[(db_prompt.id, db_prompt.title, db_prompt.updated_at)],
+    )
     db.commit()
-    db.refresh(db_prompt)
     return db_prompt
 
-def delete_prompt(db: Session, prompt_id: int) -> bool:
-    """Delete a prompt"""
-    db_prompt = get_prompt_by_id(db, prompt_id)
-    if not db_prompt:
-        return False
-    
-    db.delete(db_prompt)
+def delete_prompt(db: Session, prompt_id: int) -> set[str] | None:
+    """Delete a prompt and its versions with set-based DELETEs (no rows are loaded)
+
+    Returns the content hashes its versions used, for
+    `delete_unreferenced_version_contents`, or None if there was no such prompt.
+    A prompt that was already soft-deleted is purged without being counted again.
+    """
+    content_hashes = set(db.scalars(
+        delete(PromptVersion).where(PromptVersion.prompt_id == prompt_id).returning(PromptVersion.content_hash)
+    ))
+    deleted = db.execute(
+        delete(Prompt)
+        .where(Prompt.id == prompt_id)
+        .returning(Prompt.id, Prompt.user_id, Prompt.version_count, Prompt.deleted_at)
+    ).first()
+    if deleted is not None:
+        _record_deleted(db, deleted.user_id, _live([deleted]))
     db.commit()
-    return True
+    return content_hashes - {None} if deleted is not None else None
 
-def search_user_prompts(db: Session, user_id: int, query: str, skip: int = 0, limit: int = 100) -> List[Prompt]:
-    """Search prompts by title or description for a specific user"""
-    return db.query(Prompt).filter(Prompt.user_id == user_id, or_(Prompt.title.contains(query), Prompt.description.contains(query))).offset(skip).limit(limit).all()
+def delete_prompts(db: Session, user_id: int, prompt_ids: List[int]) -> tuple[List[int], set[str]]:
+    """Delete many of a user's prompts at once
 
-def get_prompt_versions(db: Session, prompt_id: int) -> List:
-    """Get all versions for a prompt, ordered by version number (newest first)"""
-    
+    Returns the ids actually deleted and the content hashes their versions used.
+    Prompts that were already soft-deleted are purged too, but not returned.
+    """
+    owned = select(Prompt.id).where(Prompt.id.in_(prompt_ids), Prompt.user_id == user_id)
+    content_hashes = set(db.scalars(
+        delete(PromptVersion).where(PromptVersion.prompt_id.in_(owned)).returning(PromptVersion.content_hash)
+    ))
+    deleted = db.execute(
+        delete(Prompt)
+        .where(Prompt.id.in_(prompt_ids), Prompt.user_id == user_id)
+        .returning(Prompt.id, Prompt.version_count, Prompt.deleted_at)
+    ).all()
+    deleted = _live(deleted)
+    _record_deleted(db, user_id, deleted)
+    db.commit()
+    return [row.id for row in deleted], content_hashes - {None}
+
+def _live(deleted: list) -> list:
+    """Rows that weren't soft-deleted before; the others were counted and tombstoned then"""
+    return [row for row in deleted if row.deleted_at is None]
+
+def _record_deleted(db: Session, user_id: int, deleted: list):
+    if deleted:
+        record_prompt_changes(
+            db, user_id, prompts=-len(deleted), versions=-sum(row.version_count for row in deleted),
+            removed=[row.id for row in deleted],
+        )
+        _record_tombstones(db, user_id, [row.id for row in deleted])
+
+def soft_delete_prompts(db: Session, user_id: int, prompt_ids: List[int]) -> List[int]:
+    """Hide prompts immediately and leave removing their rows to `purge_deleted_prompts`"""
+    deleted = db.execute(
+        update(Prompt)
+        .where(Prompt.id.in_(prompt_ids), Prompt.user_id == user_id, Prompt.deleted_at.is_(None))
+        .values(deleted_at=datetime.utcnow())
+        .returning(Prompt.id, Prompt.version_count)
+    ).all()
+    _record_deleted(db, user_id, deleted)
+    db.commit()
+    return [row.id for row in deleted]
+
+def purge_deleted_prompts(db: Session, batch_size: int = 5000) -> int:
+    """Remove soft-deleted prompts, deleting their versions in small batches
+
+    Each batch is its own transaction so purging a huge history never holds
+    long locks, and the version bodies it leaves unused are deleted after it.
+    Returns the number of prompts purged.
+    """
+    purged = 0
+    while True:
+        prompt_ids = db.scalars(
+            select(Prompt.id).where(Prompt.deleted_at.isnot(None)).limit(100)
+        ).all()
+        if not prompt_ids:
+            return purged
+
+        for prompt_id in prompt_ids:
+            while True:
+                batch = select(PromptVersion.id).where(PromptVersion.prompt_id == prompt_id).limit(batch_size)
+                content_hashes = db.scalars(
+                    delete(PromptVersion).where(PromptVersion.id.in_(batch)).returning(PromptVersion.content_hash)
+                ).all()
+                db.commit()
+                delete_unreferenced_version_contents(db, content_hashes, batch_size)
+                if len(content_hashes) < batch_size:
+                    break
+            db.execute(delete(Prompt).where(Prompt.id == prompt_id))
+            db.commit()
+            purged += 1
+
+def search_user_prompts(
+    db: Session,
+    user_id: int,
+    query: str,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple[float, int] | None = None,
+) -> List[tuple[Prompt, float, str | None]]:
+    """Full-text search over a user's prompts, returns (prompt, rank, snippet) best match first
+
+    `after` is the (rank, id) of the last result of the previous page.
+    """
+    return FullTextSearchService(db).search(user_id, query, skip, limit, after)
+
+def fuzzy_search_user_prompts(
+    db: Session,
+    user_id: int,
+    query: str,
+    prefix: bool = False,
+    skip: int = 0,
+    limit: int = 10,
+    after: tuple[float, int] | None = None,
+) -> List[tuple[Prompt, float]]:
+    """Typo-tolerant title search for a user, returns (prompt, similarity) most similar first
+
+    With `prefix` only titles starting with `query` match (autocomplete).
+    `skip` is ignored when `after` is given.
+    """
+    return FuzzySearchService(db).search_titles(user_id, query, prefix, skip, limit, after)
+
+def get_prompt_versions(
+    db: Session,
+    prompt_id: int,
+    limit: int | None = None,
+    before_version: int | None = None,
+) -> List:
+    """Get versions for a prompt, ordered by version number (newest first)
+
+    `before_version` is the last version number of the previous page.
+    """
+    return db.scalars(prompt_versions_statement(prompt_id, limit, before_version)).all()
+
+def prompt_versions_statement(prompt_id: int, limit: int | None = None, before_version: int | None = None):
+    stmt = (
+        select(PromptVersion)
+        .where(PromptVersion.prompt_id == prompt_id)
+        .order_by(PromptVersion.version_number.desc())
+    )
+    if before_version is not None:
+        stmt = stmt.where(PromptVersion.version_number < before_version)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def get_prompt_version(db: Session, prompt_id: int, version_number: int) -> PromptVersion | None:
+    """Get a single version of a prompt by its number"""
     return (
         db.query(PromptVersion)
-        .filter(PromptVersion.prompt_id == prompt_id)
-        .order_by(PromptVersion.version_number.desc())
-        .all()
+        .filter(
+            PromptVersion.prompt_id == prompt_id,
+            PromptVersion.version_number == version_number
+        )
+        .first()
     )
 
 def rollback_prompt_to_version(db: Session, prompt_id: int, version_number: int) -> Prompt | None:
     """Rollback a prompt to a specific version"""
     # Get the prompt
-    db_prompt = get_prompt_by_id(db, prompt_id)
+    db_prompt = _load_prompt(db, prompt_id)
     if not db_prompt:
         return None
     
     # Get the version to rollback to
-    version = (
-        db.query(PromptVersion)
-        .filter(
-            PromptVersion.prompt_id == prompt_id,
-            PromptVersion.version_number == version_number
-        )
-        .first()
-    )
+    version = get_prompt_version(db, prompt_id, version_number)
     
     if not version:
         return None
     
     # Restore content from version
-    db_prompt.content = version.content
+    db_prompt.content = get_version_contents(db, [version])[0]
     db_prompt.updated_at = datetime.utcnow()
+    record_prompt_changes(db, db_prompt.user_id, touched=[(db_prompt.id, db_prompt.title, db_prompt.updated_at)])
     
     db.commit()
     db.refresh(db_prompt)
@@ -133,22 +594,18 @@ def rollback_prompt_to_version(db: Session, prompt_id: int, version_number: int)
 
 def get_prompt_version_count(db: Session, prompt_id: int) -> int:
     """Get the total number of versions for a prompt"""
-    
-    return (
-        db.query(PromptVersion)
-        .filter(PromptVersion.prompt_id == prompt_id)
-        .count()
-    )
+    count = db.query(Prompt.version_count).filter(Prompt.id == prompt_id).scalar()
+    return count or 0
 
 def get_total_prompts(db: Session, user_id: int) -> int:
     """Get the total number of prompts for a user"""
-    return db.query(Prompt).filter(Prompt.user_id == user_id).count()
+    return db.query(Prompt).filter(Prompt.user_id == user_id, Prompt.deleted_at.is_(None)).count()
 
 def get_recent_prompts(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Prompt]:
     """Get the most recent prompts for a user"""
     recent_prompts = (
     db.query(Prompt)
-    .filter(Prompt.user_id == user_id)
+    .filter(Prompt.user_id == user_id, Prompt.deleted_at.is_(None))
     .order_by(Prompt.updated_at.desc())
     .limit(5)
     .all()
@@ -1,28 +1,61 @@
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from app.models.user import User
+from app.models.user_stats import UserStats
 from app.schemas.user import UserCreate
+from app.core.config import USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS
+from app.core.lru_cache import TTLCache
 from app.core.security import hash_password, verify_password
 
+# Detached User rows by email for authentication; other workers see changes within the TTL
+_user_cache = TTLCache(USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+def get_cached_user(email: str) -> User | None:
+    """User previously stored with `cache_user`, if still fresh"""
+    return _user_cache.get(email)
+
+def cache_user(user: User) -> None:
+    """Remember a fully loaded, detached User for `get_cached_user`"""
+    _user_cache.put(user.email, user)
+
+def invalidate_user(email: str) -> None:
+    """Drop a user from this worker's cache after changing it"""
+    _user_cache.pop(email)
+
+def user_by_email_statement(email: str):
+    return select(User).where(User.email == email)
+
 def get_user_by_email(db: Session, email: str) -> User | None:
     """Get a user by email"""
-    return db.query(User).filter(User.email == email).first()
+    return db.scalars(user_by_email_statement(email)).first()
 
 def get_user_by_id(db: Session, user_id: int) -> User | None:
     """Get a user by ID"""
     return db.query(User).filter(User.id == user_id).first()
 
-def create_user(db: Session, user: UserCreate) -> User:
-    """Create a new user"""
-    hashed_password = hash_password(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: bytes | None = None) -> User:
+    """Create a new user, hashing the password inline unless a hash is passed in"""
+    if hashed_password is None:
+        hashed_password = hash_password(user.password)
     db_user = User(
         email=user.email,
         hashed_password=hashed_password
     )
     db.add(db_user)
+    db.flush()
+    # the write paths only ever UPDATE this row, so it exists before the first prompt
+    db.add(UserStats(user_id=db_user.id))
     db.commit()
     db.refresh(db_user)
+    invalidate_user(db_user.email)
     return db_user
 
+def update_password_hash(db: Session, user: User, hashed_password: bytes) -> None:
+    """Replace a user's stored hash (e.g. after the bcrypt cost changed)"""
+    db.execute(update(User).where(User.id == user.id).values(hashed_password=hashed_password))
+    db.commit()
+    invalidate_user(user.email)
+
 def authenticate_user(db: Session, email: str, password: str) -> User | None:
     """Authenticate a user by email and password"""
     user = get_user_by_email(db, email)
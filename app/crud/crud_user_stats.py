@@ -0,0 +1,151 @@
+from datetime import datetime
+from typing import Iterable
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session
+from app.core.config import USER_STATS_RECENT_SIZE, USER_STATS_CACHE_SIZE, USER_STATS_CACHE_TTL_SECONDS
+from app.core.database import insert_ignoring_conflicts
+from app.core.lru_cache import TTLCache
+from app.models.prompt import Prompt
+from app.models.user_stats import UserStats
+
+
+# Dashboard payloads by user id, written through when a transaction that changed them commits;
+# writes made by other workers show up once the entry expires
+_stats_cache = TTLCache(USER_STATS_CACHE_SIZE, ttl=USER_STATS_CACHE_TTL_SECONDS)
+
+
+def _recent_entry(prompt_id: int, title: str, updated_at: datetime) -> dict:
+    return {"id": prompt_id, "title": title, "updated_at": updated_at.isoformat()}
+
+
+def _stats_payload(prompt_count: int, version_count: int, recent_prompts: list) -> dict:
+    return {
+        "total_prompts": prompt_count,
+        "total_versions": version_count,
+        "last_updated": recent_prompts[0]["updated_at"] if recent_prompts else None,
+        "recent_prompts": recent_prompts,
+    }
+
+
+def _recent_prompts_from_db(db: Session, user_id: int) -> list[dict]:
+    rows = db.execute(
+        select(Prompt.id, Prompt.title, Prompt.updated_at)
+        .where(Prompt.user_id == user_id, Prompt.deleted_at.is_(None))
+        .order_by(Prompt.updated_at.desc(), Prompt.id.desc())
+        .limit(USER_STATS_RECENT_SIZE)
+    )
+    return [_recent_entry(*row) for row in rows]
+
+
+def _stage_payload(db: Session, user_id: int, payload: dict):
+    """Remember a payload to publish to the cache once the session commits"""
+    db.info.setdefault("user_stats", {})[user_id] = payload
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_user_stats(session):
+    for user_id, payload in session.info.pop("user_stats", {}).items():
+        _stats_cache.put(user_id, payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_stats(session):
+    for user_id in session.info.pop("user_stats", {}):
+        _stats_cache.pop(user_id)
+
+
+def rebuild_user_stats(db: Session, user_id: int) -> dict:
+    """Recompute a user's stats from the prompts table (first use, or repair)"""
+    # Users created before user_stats existed get their row here; ON CONFLICT
+    # makes concurrent first requests safe instead of a primary key violation
+    db.execute(insert_ignoring_conflicts(db, UserStats).values(user_id=user_id))
+
+    prompt_count, version_count = db.execute(
+        select(func.count(Prompt.id), func.coalesce(func.sum(Prompt.version_count), 0))
+        .where(Prompt.user_id == user_id, Prompt.deleted_at.is_(None))
+    ).one()
+    recent = _recent_prompts_from_db(db, user_id)
+    db.execute(
+        update(UserStats)
+        .where(UserStats.user_id == user_id)
+        .values(
+            prompt_count=prompt_count,
+            version_count=version_count,
+            recent_prompts=recent,
+            last_updated=datetime.fromisoformat(recent[0]["updated_at"]) if recent else None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    payload = _stats_payload(prompt_count, version_count, recent)
+    _stage_payload(db, user_id, payload)
+    return payload
+
+
+def record_prompt_changes(
+    db: Session,
+    user_id: int,
+    prompts: int = 0,
+    versions: int = 0,
+    touched: Iterable[tuple[int, str, datetime]] = (),
+    removed: Iterable[int] = (),
+):
+    """Apply a prompt write to the user's stats inside the caller's transaction.
+
+    Call after the change is flushed and before commit. `touched` holds the
+    (id, title, updated_at) of created or edited prompts, `removed` the ids
+    of deleted ones.
+    """
+    touched = sorted(touched, key=lambda t: (t[2], t[0]), reverse=True)
+    removed_ids = set(removed) | {t[0] for t in touched}
+
+    # The counter UPDATE also locks the row (on Postgres), so the recent list below isn't raced
+    row = db.execute(
+        update(UserStats)
+        .where(UserStats.user_id == user_id)
+        .values(
+            prompt_count=UserStats.prompt_count + prompts,
+            version_count=UserStats.version_count + versions,
+        )
+        .returning(UserStats.prompt_count, UserStats.version_count, UserStats.recent_prompts)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        rebuild_user_stats(db, user_id)
+        return
+
+    recent = [_recent_entry(*t) for t in touched[:USER_STATS_RECENT_SIZE]]
+    recent += [entry for entry in row.recent_prompts if entry["id"] not in removed_ids]
+    if len(recent) < min(USER_STATS_RECENT_SIZE, row.prompt_count):
+        # a prompt dropped out of the list; refill it with one indexed query
+        recent = _recent_prompts_from_db(db, user_id)
+    recent = recent[:USER_STATS_RECENT_SIZE]
+
+    if touched or removed_ids:
+        db.execute(
+            update(UserStats)
+            .where(UserStats.user_id == user_id)
+            .values(
+                recent_prompts=recent,
+                last_updated=datetime.fromisoformat(recent[0]["updated_at"]) if recent else None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    _stage_payload(db, user_id, _stats_payload(row.prompt_count, row.version_count, recent))
+
+
+def get_user_stats(db: Session, user_id: int) -> dict:
+    """Dashboard stats for a user: from the cache, else one primary-key lookup"""
+    payload = _stats_cache.get(user_id)
+    if payload is not None:
+        return payload
+
+    stats = db.get(UserStats, user_id)
+    if stats is None:
+        payload = rebuild_user_stats(db, user_id)
+        db.commit()
+        return payload
+
+    payload = _stats_payload(stats.prompt_count, stats.version_count, stats.recent_prompts)
+    _stats_cache.put(user_id, payload)
+    return payload
@@ -0,0 +1,171 @@
+import hashlib
+from typing import Iterable, List
+from sqlalchemy import and_, delete, exists, select
+from sqlalchemy.exc import IntegrityError
+from app.core.database import insert_ignoring_conflicts
+from sqlalchemy.orm import Session, aliased
+from app.core.config import VERSION_SNAPSHOT_INTERVAL, VERSION_CONTENT_CACHE_SIZE
+from app.core.lru_cache import LRUCache
+from app.core.text_delta import make_delta, apply_delta, pack, unpack
+from app.models.prompt_version import PromptVersion
+from app.models.version_content import VersionContent
+
+
+# Reconstructed bodies by hash; bodies are immutable so entries never go stale
+_content_cache = LRUCache(VERSION_CONTENT_CACHE_SIZE)
+
+
+def hash_content(content: str) -> str:
+    """Content address of a version body"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def store_version_content(db: Session, content: str, base_hash: str | None = None) -> str:
+    """Store a version body and return its hash
+
+    Identical bodies are stored once. Otherwise the body is saved as a delta
+    against `base_hash` (usually the previous version), or as a full snapshot
+    when there is no base, the delta chain would reach VERSION_SNAPSHOT_INTERVAL
+    or the delta isn't smaller than the body itself.
+    """
+    content_hash = hash_content(content)
+    # the body itself and its base in one round-trip
+    known = {
+        row.hash: row
+        for row in db.scalars(
+            select(VersionContent).where(VersionContent.hash.in_({content_hash, base_hash} - {None}))
+        )
+    }
+    if content_hash in known:
+        return content_hash
+
+    row = {"hash": content_hash, "base_hash": None, "depth": 0, "data": pack(content), "size": len(content)}
+    base = known.get(base_hash)
+    if base is not None and base.depth + 1 < VERSION_SNAPSHOT_INTERVAL:
+        base_content = load_version_contents(db, [base_hash])[base_hash]
+        delta_data = pack(make_delta(base_content, content))
+        if len(delta_data) < len(row["data"]):
+            row.update(base_hash=base_hash, depth=base.depth + 1, data=delta_data)
+
+    # a body stored concurrently by another request is kept as it is
+    db.execute(insert_ignoring_conflicts(db, VersionContent).values(**row))
+    _content_cache.put(content_hash, content)
+    return content_hash
+
+
+def store_version_contents(db: Session, contents: List[str]) -> List[str]:
+    """Store many bodies as full snapshots with one executemany, returns their hashes in order"""
+    hashes = [hash_content(content) for content in contents]
+    existing = set(
+        db.scalars(select(VersionContent.hash).where(VersionContent.hash.in_(set(hashes))))
+    )
+
+    rows = {}
+    for content_hash, content in zip(hashes, contents):
+        if content_hash not in existing and content_hash not in rows:
+            rows[content_hash] = {
+                "hash": content_hash,
+                "base_hash": None,
+                "depth": 0,
+                "data": pack(content),
+                "size": len(content),
+            }
+    if rows:
+        # bodies stored concurrently by another import are kept as they are
+        db.execute(insert_ignoring_conflicts(db, VersionContent), list(rows.values()))
+    return hashes
+
+
+def load_version_contents(db: Session, hashes: Iterable[str]) -> dict[str, str]:
+    """Reconstruct bodies by hash, fetching each delta chain with one recursive query"""
+    contents = {}
+    missing = set()
+    for content_hash in set(hashes):
+        cached = _content_cache.get(content_hash)
+        if cached is not None:
+            contents[content_hash] = cached
+        else:
+            missing.add(content_hash)
+    if not missing:
+        return contents
+
+    chain = (
+        select(VersionContent.hash, VersionContent.base_hash, VersionContent.data)
+        .where(VersionContent.hash.in_(missing))
+        .cte("chain", recursive=True)
+    )
+    chain = chain.union(
+        select(VersionContent.hash, VersionContent.base_hash, VersionContent.data)
+        .join(chain, VersionContent.hash == chain.c.base_hash)
+    )
+    rows = {row.hash: row for row in db.execute(select(chain))}
+
+    def resolve(content_hash: str) -> str:
+        content = contents.get(content_hash) or _content_cache.get(content_hash)
+        if content is None:
+            row = rows[content_hash]
+            payload = unpack(row.data)
+            if row.base_hash is None:
+                content = payload
+            else:
+                content = apply_delta(resolve(row.base_hash), payload)
+            _content_cache.put(content_hash, content)
+        contents[content_hash] = content
+        return content
+
+    for content_hash in missing:
+        resolve(content_hash)
+    return contents
+
+
+def get_version_contents(db: Session, versions: list) -> List[str]:
+    """Full bodies for version rows (anything with `content` and `content_hash`), in order"""
+    hashes = [v.content_hash for v in versions if v.content_hash]
+    contents = load_version_contents(db, hashes) if hashes else {}
+    return [
+        contents[v.content_hash] if v.content_hash else v.content
+        for v in versions
+    ]
+
+
+def delete_unreferenced_version_contents(
+    db: Session, hashes: Iterable[str] | None = None, batch_size: int = 5000
+) -> int:
+    """Remove bodies no version uses any more, in batches; returns the number of rows deleted
+
+    Pass the hashes of deleted versions to check only those (and, as they go,
+    the bases of their chains); without `hashes` the whole table is swept.
+    A row is kept while a version points at it or another row is stored as a
+    delta against it, so a chain is freed from its tip down to the snapshot.
+    Each batch is its own transaction. A body that a concurrent write starts
+    reusing makes the batch fail; it is left for a later run.
+    """
+    dependant = aliased(VersionContent)
+    unreferenced = and_(
+        ~exists().where(PromptVersion.content_hash == VersionContent.hash),
+        ~exists().where(dependant.base_hash == VersionContent.hash),
+    )
+    candidates = None if hashes is None else set(hashes) - {None}
+    deleted = 0
+    while candidates is None or candidates:
+        if candidates is None:
+            batch = select(VersionContent.hash).where(unreferenced).limit(batch_size)
+        else:
+            batch = [candidates.pop() for _ in range(min(batch_size, len(candidates)))]
+        try:
+            bases = db.scalars(
+                delete(VersionContent)
+                .where(VersionContent.hash.in_(batch), unreferenced)
+                .returning(VersionContent.base_hash)
+            ).all()
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return deleted
+        deleted += len(bases)
+        if candidates is None:
+            if not bases:
+                return deleted
+        else:
+            candidates.update(base for base in bases if base is not None)
+    return deleted
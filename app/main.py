@@ -1,13 +1,19 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import router as api_v1_router
-from app.core.database import Base, engine
-from app.models import User, Prompt, PromptVersion
+from app.core.database import Base, engine, async_engine, replica_engines, async_replica_engines
+from app.models import User, Prompt, PromptVersion, VersionContent, UserStats, PromptTombstone
 from app.core.logging_config import logger
 from app.core.error_handler import global_exception_handler, domain_error_handler
 from app.core.domain_error import DomainError
 from app.core.request_logging import RequestLoggingMiddleware
+from app.core.request_context import RequestContextMiddleware, QUERY_COUNT_HEADER, install_sql_instrumentation
+from app.core.replica_router import ReadYourWritesMiddleware, LAST_WRITE_HEADER
+from app.core.password_hasher import password_hasher
 from app.core.config import IS_PROD
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.services.full_text_search_service import setup_full_text_search
+from app.services.fuzzy_search_service import setup_trigram_search
 
 app = FastAPI(
     title="FastAPI Auth & Prompts",
@@ -17,6 +23,9 @@ app = FastAPI(
 
 app.add_exception_handler(Exception, global_exception_handler)
 app.add_exception_handler(DomainError, domain_error_handler)
+app.add_middleware(RequestContextMiddleware)
+if replica_engines:
+    app.add_middleware(ReadYourWritesMiddleware)
 app.add_middleware(RequestLoggingMiddleware)
 
 if IS_PROD:
@@ -37,6 +46,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, QUERY_COUNT_HEADER, LAST_WRITE_HEADER],
 )
 
 # Include routes
@@ -44,6 +54,10 @@ app.include_router(api_v1_router, prefix="/api/v1")
 
 # Create database tables
 Base.metadata.create_all(bind=engine) # later will remove this and use alembic migrations 
+setup_full_text_search(engine)
+setup_trigram_search(engine)
+for sync_engine in [engine, *replica_engines, *(e.sync_engine for e in [async_engine, *async_replica_engines])]:
+    install_sql_instrumentation(sync_engine)
 
 @app.get("/")
 def root():
@@ -64,4 +78,8 @@ async def startup():
 
 @app.on_event("shutdown")
 async def shutdown():
+    password_hasher.shutdown()
+    await async_engine.dispose()
+    for replica in async_replica_engines:
+        await replica.dispose()
     logger.info("Application shutdown")
@@ -1,5 +1,8 @@
 from .user import User
 from .prompt import Prompt
 from .prompt_version import PromptVersion
+from .version_content import VersionContent
+from .user_stats import UserStats
+from .prompt_tombstone import PromptTombstone
 
-__all__ = ["User", "Prompt", "PromptVersion"]
\ No newline at end of file
+__all__ = ["User", "Prompt", "PromptVersion", "VersionContent", "UserStats", "PromptTombstone"]
\ No newline at end of file
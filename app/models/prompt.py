@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index, text
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from sqlalchemy import JSON
 
@@ -7,20 +7,38 @@ from app.core.database import Base
 
 class Prompt(Base):
     __tablename__ = "prompts"
+    __table_args__ = (
+        # keyset pagination: WHERE user_id = ? AND deleted_at IS NULL ORDER BY updated_at DESC, id DESC.
+        # Partial, so counting a user's live prompts needs no heap lookups for deleted_at
+        Index(
+            "ix_prompts_live_user_id_updated_at_id",
+            "user_id",
+            "updated_at",
+            "id",
+            postgresql_where=text("deleted_at IS NULL"),
+            sqlite_where=text("deleted_at IS NULL"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True, nullable=False)
     content = Column(Text, nullable=False)
     description = Column(Text, nullable=True)
-    embedding = Column(JSON, nullable=True)
+    embedding = deferred(Column(JSON, nullable=True))  # large; only loaded where it is used
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    latest_version = Column(Integer, nullable=False, default=0, server_default="0")
+    version_count = Column(Integer, nullable=False, default=0, server_default="0")
+    latest_content_hash = Column(String(64), nullable=True)
+    deleted_at = Column(DateTime, nullable=True)  # soft-deleted, waiting for the background purge
     user = relationship("User", back_populates="prompts")
 
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # passive_deletes: let ON DELETE CASCADE remove versions instead of loading them first
     versions = relationship(
         "PromptVersion",
         back_populates="prompt",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
+from datetime import datetime
+
+from app.core.database import Base
+
+class PromptTombstone(Base):
+    """Marks a deleted prompt so incremental exports can tell clients to drop it"""
+    __tablename__ = "prompt_tombstones"
+    __table_args__ = (
+        # incremental export: WHERE user_id = ? AND (deleted_at, prompt_id) > (?, ?) ORDER BY deleted_at, prompt_id
+        Index("ix_prompt_tombstones_user_id_deleted_at_prompt_id", "user_id", "deleted_at", "prompt_id"),
+    )
+
+    prompt_id = Column(Integer, primary_key=True)  # the prompt row itself is gone, so no foreign key
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
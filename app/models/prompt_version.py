@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -6,12 +6,17 @@ from app.core.database import Base
 
 class PromptVersion(Base):
     __tablename__ = "prompt_versions"
+    __table_args__ = (
+        # one row per version number; also serves keyset pagination (ORDER BY version_number DESC)
+        Index("ix_prompt_versions_prompt_id_version_number", "prompt_id", "version_number", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     prompt_id = Column(Integer, ForeignKey("prompts.id", ondelete="CASCADE"), index=True)
     version_number = Column(Integer, nullable=False)
-    content = Column(Text, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    content = Column(Text, nullable=True)  # legacy full copy; new versions only set content_hash
+    content_hash = Column(String(64), ForeignKey("version_contents.hash"), nullable=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     prompt = relationship("Prompt", back_populates="versions")
\ No newline at end of file
@@ -12,7 +12,7 @@ class User(Base):
     hashed_password = Column(LargeBinary, nullable=False)
     
     # Relationship with prompts
-    prompts = relationship("Prompt", back_populates="user", cascade="all, delete-orphan")
+    prompts = relationship("Prompt", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
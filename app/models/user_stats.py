@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, JSON
+from datetime import datetime
+
+from app.core.database import Base
+
+class UserStats(Base):
+    """Per-user dashboard summary, kept up to date by the prompt write paths"""
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    prompt_count = Column(Integer, nullable=False, default=0)
+    version_count = Column(Integer, nullable=False, default=0)
+    last_updated = Column(DateTime, nullable=True)  # updated_at of the most recently edited prompt
+    recent_prompts = Column(JSON, nullable=False, default=list)  # [{id, title, updated_at}], newest first
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, LargeBinary
+from datetime import datetime
+
+from app.core.database import Base
+
+class VersionContent(Base):
+    """Content-addressed version body, stored either in full or as a delta against `base_hash`"""
+    __tablename__ = "version_contents"
+
+    hash = Column(String(64), primary_key=True)  # sha256 of the full body
+    base_hash = Column(String(64), ForeignKey("version_contents.hash"), nullable=True, index=True)  # None = full snapshot
+    depth = Column(Integer, nullable=False, default=0)  # deltas to apply from the nearest snapshot
+    data = Column(LargeBinary, nullable=False)  # zlib-compressed body or delta
+    size = Column(Integer, nullable=False)  # length of the full body
+    created_at = Column(DateTime, default=datetime.utcnow)
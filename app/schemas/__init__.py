@@ -1,6 +1,6 @@
 from .user import UserBase, UserCreate, UserOut, UserLogin, Token
-from .prompt import PromptCreate, PromptUpdate, PromptOut
-from .prompt_version import PromptVersionCreate, PromptVersionOut, PromptAIRequest
+from .prompt import PromptCreate, PromptUpdate, PromptOut, PromptListItem, PromptSearchResult, PromptImportError, PromptImportResult, PromptBulkDelete, PromptBulkDeleteResult
+from .prompt_version import PromptVersionCreate, PromptVersionOut, VersionDiffChange, VersionDiffHunk, VersionDiffOut, PromptAIRequest
 
 __all__ = [
     "UserBase",
@@ -11,7 +11,16 @@ __all__ = [
     "PromptCreate",
     "PromptUpdate",
     "PromptOut",
+    "PromptListItem",
+    "PromptSearchResult",
+    "PromptImportError",
+    "PromptImportResult",
+    "PromptBulkDelete",
+    "PromptBulkDeleteResult",
     "PromptVersionCreate",
     "PromptVersionOut",
+    "VersionDiffChange",
+    "VersionDiffHunk",
+    "VersionDiffOut",
     "PromptAIRequest",
 ]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 
 class PromptCreate(BaseModel):
@@ -36,4 +36,36 @@ class PromptOut(BaseModel):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PromptListItem(BaseModel):
+    """A row of the prompt list; only the requested `fields` are present"""
+    id: int
+    updated_at: datetime
+    title: str | None = None
+    content: str | None = None
+    content_truncated: bool | None = None
+    description: str | None = None
+    created_at: datetime | None = None
+    version_count: int | None = None
+
+class PromptSearchResult(PromptOut):
+    rank: float
+    snippet: str | None = None
+
+class PromptImportError(BaseModel):
+    row: int
+    error: str
+
+class PromptImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: list[PromptImportError]
+
+class PromptBulkDelete(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=1000)
+    soft: bool = False
+
+class PromptBulkDeleteResult(BaseModel):
+    deleted: list[int]
+    not_found: list[int]
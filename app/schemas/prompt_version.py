@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import List, Literal
 
 class PromptVersionCreate(BaseModel):
     content: str
@@ -8,12 +9,33 @@ class PromptVersionOut(BaseModel):
     id: int
     prompt_id: int
     version_number: int
-    content: str
+    content: str | None = None  # omitted when listing with include_content=false
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class VersionDiffChange(BaseModel):
+    op: Literal["equal", "delete", "insert"]
+    text: str
+
+class VersionDiffHunk(BaseModel):
+    from_start: int
+    from_count: int
+    to_start: int
+    to_count: int
+    changes: List[VersionDiffChange]
+
+class VersionDiffOut(BaseModel):
+    prompt_id: int
+    from_version: int
+    to_version: int
+    granularity: Literal["line", "word"]
+    insertions: int
+    deletions: int
+    exact: bool = True  # False when the changed region was too different to diff and is one replacement
+    hunks: List[VersionDiffHunk]
+
 class PromptAIRequest(BaseModel):
     mode: str
     extra_context: str | None = None
@@ -0,0 +1,160 @@
+import re
+from typing import List
+from sqlalchemy import Float, cast, func, inspect, literal_column, or_, select, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from app.core.logging_config import logger
+from app.models.prompt import Prompt
+
+SNIPPET_START = "<mark>"
+SNIPPET_STOP = "</mark>"
+
+_fts_ready: dict[str, bool] = {}
+
+
+def setup_full_text_search(engine: Engine):
+    """
+    Check whether the full-text index exists for the engine's dialect. The index
+    itself is created by the migrations (alembic/versions/*_full_text_search.py).
+
+    Postgres uses a generated `tsvector` column with a GIN index, SQLite an FTS5
+    external-content table kept current by triggers. Other databases (SQLite
+    builds without FTS5, or a database that hasn't been migrated) fall back to
+    substring matching.
+    """
+    dialect = engine.dialect.name
+    try:
+        inspector = inspect(engine)
+        if dialect == "postgresql":
+            ready = "search_vector" in {column["name"] for column in inspector.get_columns("prompts")}
+        elif dialect == "sqlite":
+            ready = "prompts_fts" in inspector.get_table_names()
+        else:
+            ready = False
+    except DBAPIError as e:
+        logger.warning(f"Could not check for full-text search on {dialect}: {e}")
+        ready = False
+    if not ready and dialect in ("postgresql", "sqlite"):
+        logger.warning(f"Full-text search index missing on {dialect}, using substring search; run alembic upgrade head")
+    _fts_ready[dialect] = ready
+
+
+def _sqlite_match_query(query: str) -> str:
+    """Quote every word so user input can't inject FTS5 query syntax"""
+    terms = re.findall(r"\w+", query)
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def postgres_ranked_page(user_id: int, tsquery, skip: int, limit: int, after: tuple[float, int] | None):
+    """(id, rank) of one page of a user's prompts matching `tsquery` on Postgres, best first"""
+    vector = literal_column("prompts.search_vector")
+    # ts_rank_cd() is a float4; as float8 it equals the rank a cursor round-trips through JSON
+    rank = cast(func.ts_rank_cd(vector, tsquery), Float(53))
+
+    page = (
+        select(Prompt.id, rank.label("rank"))
+        .where(Prompt.user_id == user_id, Prompt.deleted_at.is_(None), vector.op("@@")(tsquery))
+        .order_by(rank.desc(), Prompt.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        page = page.where(tuple_(rank, Prompt.id) < after)
+    elif skip:
+        page = page.offset(skip)
+    return page
+
+
+class FullTextSearchService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def search(
+        self,
+        user_id: int,
+        query: str,
+        skip: int = 0,
+        limit: int = 100,
+        after: tuple[float, int] | None = None,
+    ) -> List[tuple[Prompt, float, str | None]]:
+        """
+        Return (prompt, rank, snippet) for the user's prompts matching `query`,
+        best match first. `after` is the (rank, id) of the previous page's last row.
+        """
+        if not _fts_ready.get(self.dialect):
+            return self._search_substring(user_id, query, skip, limit, after)
+        if self.dialect == "postgresql":
+            return self._search_postgres(user_id, query, skip, limit, after)
+        return self._search_sqlite(user_id, query, skip, limit, after)
+
+    def _search_postgres(self, user_id, query, skip, limit, after):
+        tsquery = func.websearch_to_tsquery("english", query)
+        # Rank and page first, so ts_headline only runs on the rows returned
+        page = postgres_ranked_page(user_id, tsquery, skip, limit, after).subquery()
+
+        snippet = func.ts_headline(
+            "english",
+            Prompt.content,
+            tsquery,
+            f"StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, MaxWords=35, MinWords=15",
+        )
+        rows = self.db.execute(
+            select(Prompt, page.c.rank, snippet.label("snippet"))
+            .join(page, page.c.id == Prompt.id)
+            .order_by(page.c.rank.desc(), Prompt.id.desc())
+        ).all()
+        return [(row.Prompt, float(row.rank), row.snippet) for row in rows]
+
+    def _search_sqlite(self, user_id, query, skip, limit, after):
+        match = _sqlite_match_query(query)
+        if not match:
+            return []
+
+        # bm25() is "lower is better"; negate it so rank sorts like ts_rank
+        sql = f"""
+            SELECT p.id AS id,
+                   -bm25(prompts_fts, 10.0, 5.0, 1.0) AS rank,
+                   snippet(prompts_fts, -1, '{SNIPPET_START}', '{SNIPPET_STOP}', '…', 16) AS snippet
+            FROM prompts_fts
+            JOIN prompts p ON p.id = prompts_fts.rowid
+            WHERE prompts_fts MATCH :match AND p.user_id = :user_id AND p.deleted_at IS NULL
+            {"AND (-bm25(prompts_fts, 10.0, 5.0, 1.0), p.id) < (:after_rank, :after_id)" if after else ""}
+            ORDER BY rank DESC, p.id DESC
+            LIMIT :limit OFFSET :skip
+        """
+        params = {
+            "match": match,
+            "user_id": user_id,
+            "limit": limit,
+            "skip": 0 if after else skip,
+        }
+        if after:
+            params["after_rank"], params["after_id"] = after
+
+        hits = self.db.execute(text(sql), params).all()
+        if not hits:
+            return []
+
+        prompts = {
+            p.id: p
+            for p in self.db.query(Prompt).filter(Prompt.id.in_([hit.id for hit in hits]))
+        }
+        return [(prompts[hit.id], float(hit.rank), hit.snippet) for hit in hits if hit.id in prompts]
+
+    def _search_substring(self, user_id, query, skip, limit, after):
+        db_query = self.db.query(Prompt).filter(
+            Prompt.user_id == user_id,
+            Prompt.deleted_at.is_(None),
+            or_(
+                Prompt.title.contains(query),
+                Prompt.description.contains(query),
+                Prompt.content.contains(query),
+            ),
+        )
+        if after is not None:
+            db_query = db_query.filter(Prompt.id < after[1])
+        elif skip:
+            db_query = db_query.offset(skip)
+        prompts = db_query.order_by(Prompt.id.desc()).limit(limit).all()
+        return [(p, 0.0, None) for p in prompts]
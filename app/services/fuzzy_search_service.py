@@ -0,0 +1,229 @@
+import bisect
+import re
+from collections import defaultdict
+from typing import List
+from sqlalchemy import Float, cast, func, literal, select, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from app.core.config import FUZZY_SIMILARITY_THRESHOLD, FUZZY_INDEX_CACHE_SIZE
+from app.core.logging_config import logger
+from app.core.lru_cache import LRUCache
+from app.models.prompt import Prompt
+
+_pg_trgm_ready: dict[str, bool] = {}
+
+
+def setup_trigram_search(engine: Engine):
+    """
+    Check for pg_trgm and the trigram title index on Postgres; both are created
+    by the migrations (alembic/versions/*_trigram_title_index.py). Without them
+    (SQLite, or no privilege to create the extension) titles are matched with
+    the in-process TrigramIndex instead.
+    """
+    dialect = engine.dialect.name
+    if dialect != "postgresql":
+        _pg_trgm_ready[dialect] = False
+        return
+    try:
+        with engine.connect() as conn:
+            ready = conn.execute(
+                text("SELECT 1 FROM pg_indexes WHERE tablename = 'prompts' AND indexname = 'ix_prompts_title_trgm'")
+            ).first() is not None
+    except DBAPIError as e:
+        logger.warning(f"Could not check for pg_trgm: {e}")
+        ready = False
+    if not ready:
+        logger.warning("pg_trgm title index missing, using in-process trigram index")
+    _pg_trgm_ready[dialect] = ready
+
+
+def trigrams(value: str) -> set[str]:
+    """Trigrams of every word in `value`, padded the same way pg_trgm does"""
+    grams = set()
+    for word in re.findall(r"\w+", value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: set[str], b: set[str]) -> float:
+    """pg_trgm-compatible similarity of two trigram sets"""
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+def word_similarity(query: set[str], title: set[str]) -> float:
+    """
+    Share of the query's trigrams found in the title, an approximation of
+    pg_trgm's word_similarity() that doesn't penalise long titles.
+    """
+    if not query:
+        return 0.0
+    return len(query & title) / len(query)
+
+
+class TrigramIndex:
+    """
+    Inverted trigram index over one user's prompt titles.
+
+    `stamp` identifies the state of the user's prompts the index was built from
+    so callers can tell when it has gone stale.
+    """
+
+    def __init__(self, titles: list[tuple[int, str]], stamp: tuple):
+        self.stamp = stamp
+        self.grams: dict[int, set[str]] = {}
+        self.postings: dict[str, set[int]] = defaultdict(set)
+        self.sorted_titles: list[tuple[str, int]] = []
+
+        for prompt_id, title in titles:
+            grams = trigrams(title)
+            self.grams[prompt_id] = grams
+            for gram in grams:
+                self.postings[gram].add(prompt_id)
+            self.sorted_titles.append((title.lower(), prompt_id))
+        self.sorted_titles.sort()
+
+    def search(self, query: str, threshold: float) -> list[tuple[int, float]]:
+        """(prompt_id, word similarity) for every title at least `threshold` similar to `query`"""
+        query_grams = trigrams(query)
+        candidates: set[int] = set()
+        for gram in query_grams:
+            candidates |= self.postings.get(gram, set())
+
+        scored = []
+        for prompt_id in candidates:
+            score = word_similarity(query_grams, self.grams[prompt_id])
+            if score >= threshold:
+                scored.append((prompt_id, score))
+        return scored
+
+    def prefix(self, query: str) -> list[tuple[int, float]]:
+        """(prompt_id, similarity) for every title starting with `query` (case-insensitive)"""
+        needle = query.lower()
+        query_grams = trigrams(query)
+        start = bisect.bisect_left(self.sorted_titles, (needle, -1))
+
+        matches = []
+        for title, prompt_id in self.sorted_titles[start:]:
+            if not title.startswith(needle):
+                break
+            matches.append((prompt_id, similarity(query_grams, self.grams[prompt_id])))
+        return matches
+
+
+class TrigramIndexCache:
+    """Bounded LRU of per-user TrigramIndex instances"""
+
+    def __init__(self, max_users: int):
+        self._indexes = LRUCache(max_users)
+
+    def get(self, db: Session, user_id: int) -> TrigramIndex:
+        # count + max(updated_at) reads only the partial (user_id, updated_at, id)
+        # WHERE deleted_at IS NULL index (an index-only scan on Postgres), and
+        # changes whenever a title is added, edited or deleted.
+        stamp = tuple(
+            db.execute(
+                select(func.count(Prompt.id), func.max(Prompt.updated_at))
+                .where(Prompt.user_id == user_id, Prompt.deleted_at.is_(None))
+            ).one()
+        )
+
+        index = self._indexes.get(user_id)
+        if index is not None and index.stamp == stamp:
+            return index
+
+        titles = db.execute(
+            select(Prompt.id, Prompt.title).where(Prompt.user_id == user_id, Prompt.deleted_at.is_(None))
+        ).all()
+        index = TrigramIndex([(row.id, row.title) for row in titles], stamp)
+
+        self._indexes.put(user_id, index)
+        return index
+
+
+trigram_indexes = TrigramIndexCache(FUZZY_INDEX_CACHE_SIZE)
+
+
+def postgres_title_matches(
+    user_id: int, query: str, prefix: bool, skip: int, limit: int, after: tuple[float, int] | None
+):
+    """(Prompt, score) for one page of a user's titles matching `query` with pg_trgm, most similar first"""
+    if prefix:
+        score = func.similarity(Prompt.title, query)
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        match = Prompt.title.ilike(f"{escaped}%", escape="\\")
+    else:
+        score = func.word_similarity(query, Prompt.title)
+        match = literal(query).op("<%")(Prompt.title)
+    # pg_trgm scores are float4; as float8 they equal the score a cursor round-trips through JSON
+    score = cast(score, Float(53))
+
+    stmt = (
+        select(Prompt, score.label("score"))
+        .where(Prompt.user_id == user_id, Prompt.deleted_at.is_(None), match)
+        .order_by(score.desc(), Prompt.id.desc())
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(score, Prompt.id) < after)
+    elif skip:
+        stmt = stmt.offset(skip)
+    return stmt
+
+
+class FuzzySearchService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def search_titles(
+        self,
+        user_id: int,
+        query: str,
+        prefix: bool = False,
+        skip: int = 0,
+        limit: int = 10,
+        after: tuple[float, int] | None = None,
+    ) -> List[tuple[Prompt, float]]:
+        """
+        Return (prompt, similarity) for titles similar to `query` (or starting with
+        it when `prefix` is set), most similar first. `after` is the (similarity, id)
+        of the previous page's last row and takes precedence over `skip`.
+        """
+        if _pg_trgm_ready.get(self.dialect):
+            return self._search_postgres(user_id, query, prefix, skip, limit, after)
+        return self._search_in_process(user_id, query, prefix, skip, limit, after)
+
+    def _search_postgres(self, user_id, query, prefix, skip, limit, after):
+        stmt = postgres_title_matches(user_id, query, prefix, skip, limit, after)
+        if not prefix:
+            # `<%` uses pg_trgm.word_similarity_threshold; keep it in line with the in-process index
+            self.db.execute(
+                text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                {"threshold": str(FUZZY_SIMILARITY_THRESHOLD)},
+            )
+        return [(row.Prompt, float(row.score)) for row in self.db.execute(stmt)]
+
+    def _search_in_process(self, user_id, query, prefix, skip, limit, after):
+        index = trigram_indexes.get(self.db, user_id)
+        if prefix:
+            scored = index.prefix(query)
+        else:
+            scored = index.search(query, FUZZY_SIMILARITY_THRESHOLD)
+
+        if after is not None:
+            scored = [(prompt_id, score) for prompt_id, score in scored if (score, prompt_id) < after]
+            skip = 0
+        top = sorted(scored, key=lambda hit: (hit[1], hit[0]), reverse=True)[skip:skip + limit]
+        if not top:
+            return []
+
+        prompts = {
+            p.id: p
+            for p in self.db.query(Prompt).filter(Prompt.id.in_([prompt_id for prompt_id, _ in top]))
+        }
+        return [(prompts[prompt_id], score) for prompt_id, score in top if prompt_id in prompts]
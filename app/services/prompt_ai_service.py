@@ -101,6 +101,16 @@ class PromptAIService:
             logger.error(f"PromptAIService.embed_prompt error: {e}")
             return []
 
+    def embed_prompts(self, texts: list[str]):
+        """
+        Convert a batch of prompt texts into vector embeddings in one call.
+        """
+        try:
+            return self.ai.embed_texts(texts)
+        except Exception as e:
+            logger.error(f"PromptAIService.embed_prompts error: {e}")
+            return [[] for _ in texts]
+
     def suggest_next_version(self, text: str):
         system_prompt = """
             You are an expert prompt engineer.
@@ -0,0 +1,102 @@
+import heapq
+import json
+import zlib
+from datetime import datetime
+from typing import Iterator
+from app.core.config import EXPORT_BATCH_SIZE, EXPORT_VERSION_CHUNK_SIZE
+from app.core.database import SessionLocal, engine
+from app.core.logging_config import logger
+from app.crud import iter_prompt_export, iter_prompt_tombstones
+
+# Bytes buffered before a chunk is handed to the response
+FLUSH_SIZE = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, default=_json_default)
+
+
+def _watermark(record: tuple) -> tuple:
+    return record[0]["updated_at"], record[0]["id"]
+
+
+class PromptExportService:
+    def __init__(self, user_id: int, since: datetime | None = None, since_id: int | None = None, bind=None):
+        self.user_id = user_id
+        self.since = since
+        self.since_id = since_id
+        self.bind = bind or engine  # a read replica when the caller picked one
+
+    def _records(self, db) -> Iterator[tuple[dict, Iterator | None]]:
+        """(prompt, version chunks) and, for incremental exports, (tombstone, None) in watermark order"""
+        prompts = iter_prompt_export(
+            db, self.user_id, self.since, self.since_id, EXPORT_BATCH_SIZE, EXPORT_VERSION_CHUNK_SIZE
+        )
+        if self.since is None:
+            return prompts
+        tombstones = (
+            (tombstone, None)
+            for tombstone in iter_prompt_tombstones(db, self.user_id, self.since, self.since_id, EXPORT_BATCH_SIZE)
+        )
+        return heapq.merge(prompts, tombstones, key=_watermark)
+
+    def iter_ndjson(self) -> Iterator[bytes]:
+        """
+        Yield NDJSON: one line per prompt with nested versions, plus one
+        `{"id", "deleted": true, "updated_at"}` line per prompt deleted since
+        the watermark of an incremental export.
+
+        Uses its own session so the export outlives the request dependency.
+        A prompt's versions are written as they are read, so memory stays
+        bounded even for one very long history.
+        """
+        db = SessionLocal(bind=self.bind)
+        exported = deleted = 0
+        parts, size = [], 0
+        try:
+            for record, version_chunks in self._records(db):
+                if version_chunks is None:
+                    deleted += 1
+                    pieces = [_dumps(record), "\n"]
+                else:
+                    exported += 1
+                    pieces = self._prompt_pieces(record, version_chunks)
+                for piece in pieces:
+                    parts.append(piece)
+                    size += len(piece)
+                    if size >= FLUSH_SIZE:
+                        yield "".join(parts).encode("utf-8")
+                        parts, size = [], 0
+            if parts:
+                yield "".join(parts).encode("utf-8")
+        finally:
+            db.close()
+            logger.info(f"Exported {exported} prompts and {deleted} deletions for user {self.user_id}")
+
+    @staticmethod
+    def _prompt_pieces(prompt: dict, version_chunks: Iterator) -> Iterator[str]:
+        """The prompt's JSON line, written piecewise: fields, then each chunk of versions"""
+        yield _dumps(prompt)[:-1] + ', "versions": ['
+        first = True
+        for chunk in version_chunks:
+            for version in chunk:
+                yield ("" if first else ", ") + _dumps(version)
+                first = False
+        yield "]}\n"
+
+    def iter_gzip(self) -> Iterator[bytes]:
+        """
+        Same stream as `iter_ndjson`, gzip-compressed on the fly.
+        """
+        compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+        for chunk in self.iter_ndjson():
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
@@ -0,0 +1,170 @@
+import codecs
+import csv
+import heapq
+import json
+from typing import AsyncIterator, List
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.core.config import IMPORT_CHUNK_SIZE, IMPORT_MAX_ERRORS, EMBEDDING_BATCH_SIZE
+from app.core.database import SessionLocal
+from app.core.logging_config import logger
+from app.crud import bulk_create_prompts, embed_pending_prompts
+from app.schemas.prompt import PromptCreate
+
+CSV_CONTENT_TYPES = ("text/csv", "application/csv")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Re-assemble an upload stream into text lines without buffering the whole body.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """
+    Yield (row_number, data, error) for every non-blank NDJSON line.
+    """
+    row = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(data, dict):
+            yield row, None, "Each line must be a JSON object"
+            continue
+        yield row, data, None
+
+
+async def iter_csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """
+    Yield (row_number, data, error) for every CSV record after the header.
+
+    Quoted fields may span lines, so lines are buffered until the quote count
+    of the pending record is balanced.
+    """
+    header = None
+    pending = []
+    row = 0
+    async for line in iter_lines(chunks):
+        pending.append(line)
+        record = "\n".join(pending)
+        if record.count('"') % 2:
+            continue
+        pending = []
+        if not record.strip():
+            continue
+
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+
+        row += 1
+        if len(values) != len(header):
+            yield row, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row, {name: value or None for name, value in zip(header, values)}, None
+
+    if pending:
+        row += 1
+        yield row, None, "Unterminated quoted field"
+
+
+class PromptImportService:
+    def __init__(self, db: Session, user_id: int):
+        self.db = db
+        self.user_id = user_id
+        self.imported_ids: List[int] = []
+        self.failed = 0
+        # the IMPORT_MAX_ERRORS lowest rows as (-row, error), so a huge malformed file can't grow the response
+        self._errors: List[tuple[int, str]] = []
+
+    def _reject(self, row: int, error: str):
+        self.failed += 1
+        if len(self._errors) < IMPORT_MAX_ERRORS:
+            heapq.heappush(self._errors, (-row, error))
+        elif IMPORT_MAX_ERRORS and -self._errors[0][0] > row:
+            heapq.heapreplace(self._errors, (-row, error))
+
+    @property
+    def errors(self) -> List[dict]:
+        return [{"row": -row, "error": error} for row, error in sorted(self._errors, reverse=True)]
+
+    async def import_stream(self, chunks: AsyncIterator[bytes], content_type: str | None = None):
+        """
+        Validate rows as they arrive and insert them in chunked transactions.
+        Invalid rows are reported individually and never abort the import.
+        """
+        is_csv = (content_type or "").split(";")[0].strip().lower() in CSV_CONTENT_TYPES
+        rows = iter_csv_rows(chunks) if is_csv else iter_ndjson_rows(chunks)
+
+        batch: List[tuple[int, PromptCreate]] = []
+        async for row, data, error in rows:
+            if error:
+                self._reject(row, error)
+                continue
+            try:
+                batch.append((row, PromptCreate(**data)))
+            except ValidationError as e:
+                self._reject(row, self._format_validation_error(e))
+                continue
+
+            if len(batch) >= IMPORT_CHUNK_SIZE:
+                await run_in_threadpool(self._flush, batch)
+                batch = []
+
+        if batch:
+            await run_in_threadpool(self._flush, batch)
+
+        return {
+            "imported": len(self.imported_ids),
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+    def _flush(self, batch: List[tuple[int, PromptCreate]]):
+        try:
+            ids = bulk_create_prompts(self.db, [prompt for _, prompt in batch], self.user_id)
+            self.imported_ids.extend(ids)
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Prompt import chunk failed for user {self.user_id}: {e}")
+            for row, _ in batch:
+                self._reject(row, "Could not be saved")
+
+    @staticmethod
+    def _format_validation_error(exc: ValidationError) -> str:
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+            for err in exc.errors()
+        )
+
+
+def embed_imported_prompts(prompt_ids: List[int]):
+    """
+    Background pass that fills in embeddings skipped during import.
+    """
+    db = SessionLocal()
+    try:
+        embedded = embed_pending_prompts(db, prompt_ids, EMBEDDING_BATCH_SIZE)
+        logger.info(f"Embedded {embedded} imported prompts")
+    except Exception as e:
+        logger.error(f"Deferred embedding pass failed: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+from app.core.config import PURGE_BATCH_SIZE, EXPORT_TOMBSTONE_RETENTION_DAYS
+from app.core.database import SessionLocal
+from app.core.logging_config import logger
+from app.crud import purge_deleted_prompts, prune_prompt_tombstones, delete_unreferenced_version_contents
+
+
+def purge_deleted_prompts_task():
+    """
+    Background task that removes soft-deleted prompts and their history.
+    Also picks up prompts left over by an earlier purge that didn't finish,
+    and forgets export tombstones past their retention.
+    """
+    db = SessionLocal()
+    try:
+        purged = purge_deleted_prompts(db, PURGE_BATCH_SIZE)
+        pruned = prune_prompt_tombstones(db, datetime.utcnow() - timedelta(days=EXPORT_TOMBSTONE_RETENTION_DAYS))
+        logger.info(f"Purged {purged} soft-deleted prompts, pruned {pruned} tombstones")
+    except Exception as e:
+        logger.error(f"Prompt purge failed: {e}")
+    finally:
+        db.close()
+
+
+def delete_version_contents_task(content_hashes: set[str]):
+    """
+    Background task that deletes the version bodies of hard-deleted prompts
+    once no other version uses them.
+    """
+    db = SessionLocal()
+    try:
+        deleted = delete_unreferenced_version_contents(db, content_hashes, PURGE_BATCH_SIZE)
+        logger.info(f"Deleted {deleted} unused version bodies")
+    except Exception as e:
+        logger.error(f"Version body cleanup failed: {e}")
+    finally:
+        db.close()
@@ -1,5 +1,5 @@
 import numpy as np 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, undefer
 from app.models.prompt import Prompt
 from app.services.prompt_ai_service import PromptAIService
 
@@ -19,7 +19,8 @@ class SemanticSearchService:
 
         prompts = (
             self.db.query(Prompt)
-            .filter(Prompt.embedding.isnot(None))
+            .options(undefer(Prompt.embedding))
+            .filter(Prompt.embedding.isnot(None), Prompt.deleted_at.is_(None))
             .all()
         )
 
@@ -0,0 +1,151 @@
+from sqlalchemy.orm import Session
+from app.core.config import VERSION_DIFF_CACHE_SIZE, VERSION_DIFF_MAX_TOKENS, VERSION_DIFF_MAX_EDITS
+from app.core.domain_error import DiffTooLargeError, VersionNotFound
+from app.core.lru_cache import LRUCache
+from app.core.text_diff import EQUAL, DELETE, INSERT, DiffTooLarge, myers_diff, split_tokens
+from app.crud import get_prompt_version, get_version_contents
+from app.crud.crud_version_content import hash_content
+
+# Versions never change once written, so a diff keyed by the two body hashes stays valid forever
+_diff_cache = LRUCache(VERSION_DIFF_CACHE_SIZE)
+
+
+def _replace_opcodes(a: list[str], b: list[str]) -> list[tuple[str, int, int, int, int]]:
+    """Opcodes that keep the common prefix and suffix and replace everything between"""
+    prefix = 0
+    while prefix < min(len(a), len(b)) and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < min(len(a), len(b)) - prefix and a[-1 - suffix] == b[-1 - suffix]:
+        suffix += 1
+    opcodes = [
+        (EQUAL, 0, prefix, 0, prefix),
+        (DELETE, prefix, len(a) - suffix, prefix, prefix),
+        (INSERT, len(a) - suffix, len(a) - suffix, prefix, len(b) - suffix),
+        (EQUAL, len(a) - suffix, len(a), len(b) - suffix, len(b)),
+    ]
+    return [op for op in opcodes if op[1] != op[2] or op[3] != op[4]]
+
+
+def build_hunks(
+    old: str,
+    new: str,
+    granularity: str = "line",
+    context: int = 3,
+    max_tokens: int = VERSION_DIFF_MAX_TOKENS,
+    max_edits: int = VERSION_DIFF_MAX_EDITS,
+) -> dict:
+    """
+    Diff two texts and group the changes into hunks with `context` unchanged
+    tokens around them. Unchanged regions outside the hunks are not returned.
+
+    Texts with more than `max_tokens` tokens together are rejected. When the
+    shortest diff needs more than `max_edits` edits, everything between the
+    common prefix and suffix is returned as one replacement and `exact` is False.
+    """
+    a = split_tokens(old, granularity)
+    b = split_tokens(new, granularity)
+    if len(a) + len(b) > max_tokens:
+        raise DiffTooLargeError(len(a) + len(b), max_tokens)
+    exact = True
+    try:
+        opcodes = myers_diff(a, b, max_edits)
+    except DiffTooLarge:
+        opcodes = _replace_opcodes(a, b)
+        exact = False
+
+    hunks = []
+    current = None
+    insertions = deletions = 0
+
+    for index, (tag, i1, i2, j1, j2) in enumerate(opcodes):
+        if tag == EQUAL:
+            if current is None:
+                continue
+            is_last = index == len(opcodes) - 1
+            # Close the hunk when the unchanged gap is wider than both contexts
+            if is_last or i2 - i1 > 2 * context:
+                tail = min(context, i2 - i1)
+                if tail:
+                    current["changes"].append({"op": EQUAL, "text": "".join(a[i1:i1 + tail])})
+                current["from_count"] = i1 + tail - current["from_start"]
+                current["to_count"] = j1 + tail - current["to_start"]
+                hunks.append(current)
+                current = None
+            else:
+                current["changes"].append({"op": EQUAL, "text": "".join(a[i1:i2])})
+            continue
+
+        if current is None:
+            # Open a hunk, pulling in up to `context` tokens of the preceding equal run
+            lead = 0
+            if index > 0:
+                _, p1, p2, _, _ = opcodes[index - 1]
+                lead = min(context, p2 - p1)
+            current = {"from_start": i1 - lead, "to_start": j1 - lead, "changes": []}
+            if lead:
+                current["changes"].append({"op": EQUAL, "text": "".join(a[i1 - lead:i1])})
+
+        if tag == DELETE:
+            deletions += i2 - i1
+            current["changes"].append({"op": DELETE, "text": "".join(a[i1:i2])})
+        else:
+            insertions += j2 - j1
+            current["changes"].append({"op": INSERT, "text": "".join(b[j1:j2])})
+        current["from_count"] = i2 - current["from_start"]
+        current["to_count"] = j2 - current["to_start"]
+
+    if current is not None:
+        hunks.append(current)
+
+    # 1-based positions, like unified diff line numbers
+    for hunk in hunks:
+        hunk["from_start"] += 1
+        hunk["to_start"] += 1
+
+    return {"insertions": insertions, "deletions": deletions, "exact": exact, "hunks": hunks}
+
+
+class VersionDiffService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def diff_versions(
+        self,
+        prompt_id: int,
+        from_version: int,
+        to_version: int,
+        granularity: str = "line",
+        context: int = 3,
+    ) -> dict:
+        """
+        Diff two versions of a prompt, serving repeated requests from the LRU cache.
+        """
+        versions = []
+        for number in (from_version, to_version):
+            version = get_prompt_version(self.db, prompt_id, number)
+            if not version:
+                raise VersionNotFound(number)
+            versions.append(version)
+
+        hashes = [v.content_hash for v in versions]
+        contents = None
+        if not all(hashes):
+            # legacy rows without a content address
+            contents = get_version_contents(self.db, versions)
+            hashes = [hash_content(content) for content in contents]
+
+        key = (hashes[0], hashes[1], granularity, context)
+        diff = _diff_cache.get(key)
+        if diff is None:
+            old, new = contents or get_version_contents(self.db, versions)
+            diff = build_hunks(old, new, granularity, context)
+            _diff_cache.put(key, diff)
+
+        return {
+            "prompt_id": prompt_id,
+            "from_version": from_version,
+            "to_version": to_version,
+            "granularity": granularity,
+            **diff,
+        }
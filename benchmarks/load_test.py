@@ -0,0 +1,373 @@
+"""
+Drive the API with a concurrent mix of scenarios and report throughput and latency per scenario.
+
+By default the app runs in-process through httpx's ASGI transport, against a
+temporary SQLite database with the AI client in mock mode. Pass --target with
+a base URL to load a running server instead. Results can be written as JSON
+and compared with a stored baseline; any regression beyond --tolerance makes
+the run exit with status 1.
+
+Scenarios: auth (signup + login), read (list + get), crud (create, update,
+versions, delete), search (full-text), semantic (semantic search), ai (improve
+with the mock provider).
+
+Usage:
+    python -m benchmarks.load_test --duration 20 --concurrency 32 --output results.json
+    python -m benchmarks.load_test --mix read=8,search=2 --baseline results.json
+    python -m benchmarks.load_test --target http://localhost:8000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--target", default="asgi", help='"asgi" for in-process, or a base URL like http://localhost:8000')
+parser.add_argument("--concurrency", type=int, default=16, help="simulated clients issuing requests back to back")
+parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+parser.add_argument("--warmup", type=float, default=2.0, help="seconds run before measuring, results discarded")
+parser.add_argument("--mix", default="auth=1,read=8,crud=3,search=3,semantic=2,ai=1", help="scenario weights")
+parser.add_argument("--users", type=int, default=8, help="accounts the clients share")
+parser.add_argument("--prompts", type=int, default=20, help="prompts created per account before the run")
+parser.add_argument("--bcrypt-rounds", type=int, help="BCRYPT_ROUNDS for the in-process app")
+parser.add_argument("--output", help="write results as JSON to this file")
+parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression, 0.2 = 20%%")
+parser.add_argument("--seed", type=int, default=42)
+
+API = "/api/v1"
+PASSWORD = "load-test-password"
+
+VOCABULARY = (
+    "summarize translate classify extract rewrite explain review outline draft critique "
+    "email report article code tests invoice contract meeting notes tweet essay"
+).split()
+
+
+class RequestFailed(Exception):
+    def __init__(self, response: httpx.Response):
+        self.key = f"{response.request.method} {response.request.url.path} [{response.status_code}]"
+        super().__init__(self.key)
+
+
+class Account:
+    """A signed-in user and the prompts it owned before the run"""
+
+    def __init__(self, email: str, headers: dict, prompt_ids: list[int]):
+        self.email = email
+        self.headers = headers
+        self.prompt_ids = prompt_ids
+
+
+class Session:
+    """One simulated client: its HTTP client, account and random source"""
+
+    def __init__(self, client: httpx.AsyncClient, account: Account, rng: random.Random):
+        self.client = client
+        self.account = account
+        self.rng = rng
+        self.requests = 0
+
+    async def call(self, method: str, path: str, expected: int = 200, **kwargs) -> httpx.Response:
+        self.requests += 1
+        response = await self.client.request(method, API + path, headers=self.account.headers, **kwargs)
+        if response.status_code != expected:
+            raise RequestFailed(response)
+        return response
+
+    def words(self, count: int) -> str:
+        return " ".join(self.rng.choice(VOCABULARY) for _ in range(count))
+
+    def prompt_id(self) -> int:
+        return self.rng.choice(self.account.prompt_ids)
+
+
+def prompt_body(rng: random.Random, index: int) -> dict:
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(20, 120))]
+    return {"title": f"{words[0].capitalize()} {words[1]} #{index}", "content": " ".join(words)}
+
+
+async def scenario_auth(session: Session):
+    email = f"load-{uuid.uuid4().hex}@example.com"
+    credentials = {"email": email, "password": PASSWORD}
+    await session.call("POST", "/signup", 201, json=credentials)
+    await session.call("POST", "/login", json=credentials)
+
+
+async def scenario_read(session: Session):
+    await session.call("GET", "/prompts/", params={"limit": 20})
+    await session.call("GET", f"/prompts/{session.prompt_id()}")
+
+
+async def scenario_crud(session: Session):
+    created = await session.call("POST", "/prompts/", 201, json=prompt_body(session.rng, 0))
+    prompt_id = created.json()["id"]
+    await session.call("PUT", f"/prompts/{prompt_id}", json={"content": session.words(40)})
+    await session.call("GET", f"/prompts/{prompt_id}/versions")
+    await session.call("DELETE", f"/prompts/{prompt_id}", 204)
+
+
+async def scenario_search(session: Session):
+    await session.call("GET", "/prompts/search", params={"query": session.words(1), "limit": 20})
+
+
+async def scenario_semantic(session: Session):
+    await session.call("GET", "/prompts/search/semantic", params={"q": session.words(4)})
+
+
+async def scenario_ai(session: Session):
+    await session.call("POST", f"/prompts/{session.prompt_id()}/ai", json={"mode": "improve"})
+
+
+SCENARIOS = {
+    "auth": scenario_auth,
+    "read": scenario_read,
+    "crud": scenario_crud,
+    "search": scenario_search,
+    "semantic": scenario_semantic,
+    "ai": scenario_ai,
+}
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}, expected one of {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+class Results:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self.failures: dict[str, int] = {}  # "METHOD /path [status]" -> count
+        self.requests = 0
+
+    def record(self, name: str, duration_ms: float, failure: str | None):
+        if failure is None:
+            self.latencies.setdefault(name, []).append(duration_ms)
+        else:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            self.failures[failure] = self.failures.get(failure, 0) + 1
+
+
+async def client_loop(session: Session, weights: dict[str, float], deadline: float, results: Results):
+    names, scenario_weights = list(weights), list(weights.values())
+    while time.perf_counter() < deadline:
+        name = session.rng.choices(names, scenario_weights)[0]
+        before = session.requests
+        start = time.perf_counter()
+        failure = None
+        try:
+            await SCENARIOS[name](session)
+        except RequestFailed as e:
+            failure = e.key
+        except Exception as e:  # a broken connection or response fails the scenario, not the run
+            failure = f"{type(e).__name__}"
+        results.record(name, (time.perf_counter() - start) * 1000, failure)
+        results.requests += session.requests - before
+
+
+async def run_phase(client, accounts, weights, concurrency: int, seconds: float, seed: int) -> tuple[Results, float]:
+    results = Results()
+    sessions = [
+        Session(client, accounts[i % len(accounts)], random.Random(seed + i))
+        for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    deadline = start + seconds
+    await asyncio.gather(*(client_loop(session, weights, deadline, results) for session in sessions))
+    return results, time.perf_counter() - start
+
+
+async def create_accounts(client: httpx.AsyncClient, rng: random.Random, users: int, prompts: int) -> list[Account]:
+    run = uuid.uuid4().hex[:8]
+
+    async def create(i: int) -> Account:
+        credentials = {"email": f"load-{run}-{i}@example.com", "password": PASSWORD}
+        await client.post(f"{API}/signup", json=credentials)
+        response = await client.post(f"{API}/login", json=credentials)
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        prompt_ids = []
+        for p in range(prompts):
+            response = await client.post(f"{API}/prompts/", json=prompt_body(rng, p), headers=headers)
+            response.raise_for_status()
+            prompt_ids.append(response.json()["id"])
+        return Account(credentials["email"], headers, prompt_ids)
+
+    return await asyncio.gather(*(create(i) for i in range(users)))
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))] if ordered else 0.0
+
+
+def summarize(args: argparse.Namespace, results: Results, elapsed: float, weights: dict[str, float]) -> dict:
+    scenarios = {}
+    for name in weights:
+        samples = results.latencies.get(name, [])
+        errors = results.errors.get(name, 0)
+        scenarios[name] = {
+            "iterations": len(samples) + errors,
+            "errors": errors,
+            "throughput_per_s": round(len(samples) / elapsed, 2),
+            "mean_ms": round(statistics.mean(samples), 3) if samples else 0.0,
+            "p50_ms": round(percentile(samples, 0.50), 3),
+            "p90_ms": round(percentile(samples, 0.90), 3),
+            "p99_ms": round(percentile(samples, 0.99), 3),
+            "max_ms": round(max(samples, default=0.0), 3),
+        }
+    return {
+        "meta": {
+            "target": args.target,
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 3),
+            "mix": weights,
+            "users": args.users,
+            "prompts_per_user": args.prompts,
+            "commit": git_commit(),
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "total": {
+            "requests": results.requests,
+            "requests_per_s": round(results.requests / elapsed, 2),
+            "errors": sum(results.errors.values()),
+        },
+        "scenarios": scenarios,
+        "failures": dict(sorted(results.failures.items(), key=lambda f: f[1], reverse=True)),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions beyond the tolerance: slower p50/p99, lower throughput, or new errors"""
+    regressions = []
+    for name, now in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        for metric in ("p50_ms", "p99_ms"):
+            if before[metric] and now[metric] > before[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {before[metric]:.2f} -> {now[metric]:.2f}")
+        if now["throughput_per_s"] < before["throughput_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {before['throughput_per_s']:.1f}/s -> {now['throughput_per_s']:.1f}/s"
+            )
+        if now["errors"] and not before["errors"]:
+            regressions.append(f"{name}: {now['errors']} errors, baseline had none")
+    return regressions
+
+
+def print_report(summary: dict):
+    meta, total = summary["meta"], summary["total"]
+    print(
+        f"{meta['target']}: {meta['concurrency']} clients for {meta['duration_s']:.1f}s, "
+        f"{total['requests']} requests ({total['requests_per_s']:.1f}/s), {total['errors']} failed scenarios"
+    )
+    print()
+    print(f"{'scenario':<12}{'runs':>8}{'errors':>8}{'per s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, s in summary["scenarios"].items():
+        print(
+            f"{name:<12}{s['iterations']:>8}{s['errors']:>8}{s['throughput_per_s']:>10.1f}"
+            f"{s['p50_ms']:>10.2f}{s['p90_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}"
+        )
+    if summary["failures"]:
+        print()
+        print("failures:")
+        for key, count in list(summary["failures"].items())[:10]:
+            print(f"  {count:>6}  {key}")
+
+
+def asgi_app(bcrypt_rounds: int | None):
+    """Import the app configured for an in-process run; only the parent process does this"""
+    db_file = os.path.join(tempfile.mkdtemp(), "load_test.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+    os.environ.pop("GROQ_API_KEY", None)  # AI calls take the mock path
+    if bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(bcrypt_rounds)
+
+    from app.main import app, shutdown
+    from app.core.logging_config import logger
+    logger.setLevel(logging.ERROR)  # per-request lines would bury the report
+    return app, shutdown
+
+
+async def run(args: argparse.Namespace) -> dict:
+    weights = parse_mix(args.mix)
+    shutdown = None
+    if args.target == "asgi":
+        app, shutdown = asgi_app(args.bcrypt_rounds)
+        # an unhandled error becomes a 500 response, counted like one from a real server
+        transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+        client = httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=60)
+    else:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        client = httpx.AsyncClient(base_url=args.target.rstrip("/"), limits=limits, timeout=60)
+
+    try:
+        rng = random.Random(args.seed)
+        print(f"Creating {args.users} accounts with {args.prompts} prompts each...")
+        accounts = await create_accounts(client, rng, args.users, args.prompts)
+        if args.warmup > 0:
+            await run_phase(client, accounts, weights, args.concurrency, args.warmup, args.seed)
+        results, elapsed = await run_phase(
+            client, accounts, weights, args.concurrency, args.duration, args.seed + args.concurrency
+        )
+    finally:
+        await client.aclose()
+        if shutdown is not None:
+            await shutdown()
+    return summarize(args, results, elapsed, weights)
+
+
+def main():
+    args = parser.parse_args()
+    summary = asyncio.run(run(args))
+    print()
+    print_report(summary)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(summary, baseline, args.tolerance)
+        print()
+        if regressions:
+            print(f"REGRESSIONS vs {args.baseline} (commit {baseline['meta'].get('commit')}, tolerance {args.tolerance:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"no regressions vs {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
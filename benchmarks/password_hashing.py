@@ -0,0 +1,65 @@
+"""
+Logins per second with bcrypt run inline on request threads versus in the password hasher's process pool.
+
+Usage:
+    python -m benchmarks.password_hashing --rounds 10 --workers 4 --logins 200
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.password_hasher import PasswordHasher
+from app.core.security import hash_password, verify_password
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--rounds", type=int, default=12, help="BCRYPT_ROUNDS")
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="PASSWORD_HASH_WORKERS")
+parser.add_argument("--threads", type=int, default=40, help="request threadpool size for the inline run")
+parser.add_argument("--logins", type=int, default=100, help="verifications per run")
+
+PASSWORD = "correct horse battery staple"
+
+
+def inline(hashed: bytes, threads: int, logins: int) -> float:
+    """bcrypt on the request threads, as the sync routes used to do"""
+    with ThreadPoolExecutor(threads) as pool:
+        start = time.perf_counter()
+        list(pool.map(lambda _: verify_password(PASSWORD, hashed), range(logins)))
+        return time.perf_counter() - start
+
+
+async def pooled(hashed: bytes, workers: int, logins: int, rounds: int) -> float:
+    hasher = PasswordHasher(workers, max_pending=logins, rounds=rounds)
+    await hasher.verify(PASSWORD, hashed)  # start the worker processes outside the timing
+    await asyncio.gather(*(hasher.verify(PASSWORD, hashed) for _ in range(workers * 2)))
+    start = time.perf_counter()
+    await asyncio.gather(*(hasher.verify(PASSWORD, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+    return elapsed
+
+
+def main():
+    args = parser.parse_args()
+    hashed = hash_password(PASSWORD, args.rounds)
+    t0 = time.perf_counter()
+    verify_password(PASSWORD, hashed)
+    single_ms = (time.perf_counter() - t0) * 1000
+
+    # bcrypt releases the GIL, so inline threads can use every core
+    results = {f"inline ({args.threads} threads)": (inline(hashed, args.threads, args.logins), min(args.threads, os.cpu_count() or 1))}
+    for workers in sorted({1, args.workers}):
+        results[f"process pool ({workers})"] = (asyncio.run(pooled(hashed, workers, args.logins, args.rounds)), workers)
+
+    print(f"bcrypt cost {args.rounds}: {single_ms:.1f} ms per verification, {args.logins} logins per run")
+    print()
+    print(f"{'mode':<26}{'seconds':>10}{'logins/s':>12}{'per core':>12}")
+    for name, (elapsed, cores) in results.items():
+        rate = args.logins / elapsed
+        print(f"{name:<26}{elapsed:>10.2f}{rate:>12.1f}{rate / cores:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
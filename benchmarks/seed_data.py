@@ -0,0 +1,336 @@
+"""
+Bulk-generate a synthetic dataset: users, prompts with log-normal sizes, version histories and pseudo-embeddings.
+
+Everything is written with Core executemany inserts in batches, so a million
+rows load in minutes on SQLite or Postgres. Core rather than ORM bulk inserts:
+the ORM drops None values and splits a batch into one statement per key set.
+Primary keys are assigned here instead of read back with RETURNING, which
+SQLite can only do one row at a time; run it against an otherwise idle database.
+Version bodies are delta-compressed like the app does; --no-deltas skips the
+diffing, which dominates the run time for long histories. Output is deterministic for a given
+--seed; embeddings are derived from each prompt's content, so identical text
+gets identical vectors. Every user's password is --password.
+
+The default --embedding-dim matches the mock AI client, so semantic search
+works against the seeded data without an API key.
+
+Usage:
+    python -m benchmarks.seed_data --users 1000 --prompts 200 --versions 4 --reset
+    python -m benchmarks.seed_data --database-url postgresql://localhost/prompts_scale --users 10000
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, insert, select, text
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--database-url", help="defaults to DATABASE_URL")
+parser.add_argument("--users", type=int, default=100)
+parser.add_argument("--prompts", type=int, default=100, help="prompts per user")
+parser.add_argument("--versions", type=float, default=3.0, help="mean versions per prompt (geometric)")
+parser.add_argument("--max-versions", type=int, default=50, help="cap on versions per prompt")
+parser.add_argument("--median-words", type=int, default=120, help="median prompt length in words")
+parser.add_argument("--size-sigma", type=float, default=1.0, help="spread of the log-normal length distribution")
+parser.add_argument("--no-deltas", action="store_true", help="store every version body in full; loads faster")
+parser.add_argument("--embedding-dim", type=int, default=4, help="0 leaves embeddings empty")
+parser.add_argument("--days", type=int, default=365, help="spread creation times over this many past days")
+parser.add_argument("--batch-size", type=int, default=1000, help="prompts per insert batch and commit")
+parser.add_argument("--email-prefix", default="seed", help="users are <prefix>-<n>@example.com")
+parser.add_argument("--password", default="password123")
+parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+parser.add_argument("--seed", type=int, default=42)
+
+VOCABULARY = (
+    "you are an expert assistant write clear concise answers explain each step use examples "
+    "avoid jargon respond in json format include a summary list the assumptions cite sources "
+    "keep the tone friendly limit the answer to three paragraphs ask clarifying questions "
+    "translate classify extract review outline draft critique email report article code "
+    "tests invoice contract meeting notes customer support marketing legal medical finance"
+).split()
+
+MIN_WORDS, MAX_WORDS = 5, 20000
+
+
+def body_length(rng: random.Random, args: argparse.Namespace) -> int:
+    """Words in a new prompt: log-normal, most are short and a few are very long"""
+    words = int(rng.lognormvariate(np.log(args.median_words), args.size_sigma))
+    return max(MIN_WORDS, min(MAX_WORDS, words))
+
+
+def random_sentence(rng: random.Random) -> str:
+    return " ".join(rng.choices(VOCABULARY, k=rng.randint(6, 16))).capitalize() + "."
+
+
+def initial_body(rng: random.Random, args: argparse.Namespace) -> str:
+    target = body_length(rng, args)
+    lines, words = [], 0
+    while words < target:
+        sentence = random_sentence(rng)
+        words += sentence.count(" ") + 1
+        lines.append(sentence)
+    return "\n".join(lines)
+
+
+def edit(rng: random.Random, body: str) -> str:
+    """Typical prompt edits: tweak a word, add a sentence or drop one"""
+    lines = body.split("\n")
+    index = rng.randrange(len(lines))
+    roll = rng.random()
+    if roll < 0.6:
+        words = lines[index].split(" ")
+        words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+        lines[index] = " ".join(words)
+    elif roll < 0.9 or len(lines) == 1:
+        lines.insert(index, random_sentence(rng))
+    else:
+        del lines[index]
+    return "\n".join(lines)
+
+
+def version_depth(rng: random.Random, args: argparse.Namespace) -> int:
+    """Versions of one prompt: geometric with mean --versions, at least 1"""
+    if args.versions <= 1:
+        return 1
+    p = 1 / args.versions
+    depth = 1
+    while depth < args.max_versions and rng.random() > p:
+        depth += 1
+    return depth
+
+
+def pseudo_embedding(content_hash: str, dim: int) -> list[float] | None:
+    """Unit vector seeded by the content hash"""
+    if dim <= 0:
+        return None
+    vector = np.random.default_rng(int(content_hash[:16], 16)).standard_normal(dim)
+    return np.round(vector / np.linalg.norm(vector), 5).tolist()
+
+
+def prepare_database(reset: bool):
+    from app.core.database import Base, engine
+    from app.services.full_text_search_service import setup_full_text_search
+
+    if reset:
+        with engine.begin() as conn:
+            if engine.dialect.name == "sqlite":
+                # external-content FTS table isn't in the metadata; recreated below
+                conn.execute(text("DROP TABLE IF EXISTS prompts_fts"))
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    setup_full_text_search(engine)
+
+
+def create_users(db, hashed_password: bytes, args: argparse.Namespace) -> list[int]:
+    from app.models import User
+
+    taken = db.scalar(select(func.count()).select_from(User).where(User.email.like(f"{args.email_prefix}-%")))
+    if taken:
+        parser.error(f"{taken} users named {args.email_prefix}-* already exist; pass --reset or another --email-prefix")
+
+    first_id = next_id(db, User)
+    user_ids = list(range(first_id, first_id + args.users))
+    for start in range(0, args.users, args.batch_size):
+        db.execute(
+            insert(User.__table__),
+            [
+                {"id": user_id, "email": f"{args.email_prefix}-{i}@example.com", "hashed_password": hashed_password}
+                for i, user_id in enumerate(user_ids[start:start + args.batch_size], start=start)
+            ],
+        )
+    db.commit()
+    return user_ids
+
+
+def next_id(db, model) -> int:
+    return (db.scalar(select(func.max(model.id))) or 0) + 1
+
+
+def sync_sequences(db):
+    """Move Postgres id sequences past the ids assigned here"""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for table in ("users", "prompts", "prompt_versions"):
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT coalesce(max(id), 1) FROM {table}))"
+        ))
+    db.commit()
+
+
+class PromptHistory:
+    """A generated prompt and the bodies and timestamps of its versions"""
+
+    def __init__(self, rng: random.Random, user_id: int, now: datetime, args: argparse.Namespace):
+        from app.crud.crud_version_content import hash_content
+
+        self.user_id = user_id
+        self.title = " ".join(rng.choices(VOCABULARY, k=rng.randint(2, 6))).capitalize()
+        self.description = random_sentence(rng) if rng.random() < 0.3 else None
+        body = initial_body(rng, args)
+        self.bodies = [body]
+        for _ in range(version_depth(rng, args) - 1):
+            body = edit(rng, body)
+            self.bodies.append(body)
+        self.hashes = [hash_content(b) for b in self.bodies]
+
+        created = now - timedelta(seconds=rng.uniform(0, args.days * 86400))
+        self.times = [created]
+        for _ in self.bodies[1:]:
+            self.times.append(self.times[-1] + timedelta(seconds=rng.expovariate(1 / 86400)))
+        self.times = [min(t, now) for t in self.times]
+
+
+def content_rows(db, histories: list[PromptHistory], no_deltas: bool) -> list[dict]:
+    """Version bodies not stored yet, as delta chains that start a new snapshot every VERSION_SNAPSHOT_INTERVAL"""
+    from app.core.config import VERSION_SNAPSHOT_INTERVAL
+    from app.core.text_delta import make_delta, pack
+    from app.models import VersionContent
+
+    all_hashes = {h for history in histories for h in history.hashes}
+    known = set(db.scalars(select(VersionContent.hash).where(VersionContent.hash.in_(all_hashes))))
+
+    rows, depths = {}, {}
+    for history in histories:
+        previous = None
+        for body, content_hash in zip(history.bodies, history.hashes):
+            if content_hash not in known and content_hash not in rows:
+                row = {"hash": content_hash, "base_hash": None, "depth": 0, "data": pack(body), "size": len(body)}
+                # depth of a body stored by an earlier run is unknown, so a snapshot follows it
+                if not no_deltas and previous is not None and depths.get(previous[1], VERSION_SNAPSHOT_INTERVAL) + 1 < VERSION_SNAPSHOT_INTERVAL:
+                    delta = pack(make_delta(previous[0], body))
+                    if len(delta) < len(row["data"]):
+                        row.update(base_hash=previous[1], depth=depths[previous[1]] + 1, data=delta)
+                rows[content_hash] = row
+                depths[content_hash] = row["depth"]
+            previous = (body, content_hash)
+    return list(rows.values())
+
+
+def insert_batch(db, histories: list[PromptHistory], stats: dict[int, list], args: argparse.Namespace) -> tuple[int, int]:
+    from app.core.config import USER_STATS_RECENT_SIZE
+    from app.models import Prompt, PromptVersion, VersionContent
+
+    contents = content_rows(db, histories, args.no_deltas)
+    if contents:
+        db.execute(insert(VersionContent.__table__), contents)
+
+    first_id = next_id(db, Prompt)
+    prompt_ids = list(range(first_id, first_id + len(histories)))
+    db.execute(
+        insert(Prompt.__table__),
+        [
+            {
+                "id": prompt_id,
+                "title": h.title,
+                "content": h.bodies[-1],
+                "description": h.description,
+                "embedding": pseudo_embedding(h.hashes[-1], args.embedding_dim),
+                "user_id": h.user_id,
+                "latest_version": len(h.bodies),
+                "version_count": len(h.bodies),
+                "latest_content_hash": h.hashes[-1],
+                "created_at": h.times[0],
+                "updated_at": h.times[-1],
+            }
+            for prompt_id, h in zip(prompt_ids, histories)
+        ],
+    )
+
+    versions = [
+        {
+            "prompt_id": prompt_id,
+            "version_number": number,
+            "content_hash": content_hash,
+            "user_id": h.user_id,
+            "created_at": created_at,
+        }
+        for prompt_id, h in zip(prompt_ids, histories)
+        for number, (content_hash, created_at) in enumerate(zip(h.hashes, h.times), start=1)
+    ]
+    db.execute(insert(PromptVersion.__table__), versions)
+    db.commit()
+
+    for prompt_id, h in zip(prompt_ids, histories):
+        entry = stats.setdefault(h.user_id, [0, 0, []])
+        entry[0] += 1
+        entry[1] += len(h.bodies)
+        entry[2].append((h.times[-1], prompt_id, h.title))
+    for user_id in {h.user_id for h in histories}:
+        stats[user_id][2] = sorted(stats[user_id][2], reverse=True)[:USER_STATS_RECENT_SIZE]
+    return len(versions), len(contents)
+
+
+def insert_user_stats(db, stats: dict[int, list], batch_size: int):
+    """Dashboard rows the write paths would have maintained"""
+    from app.crud.crud_user_stats import _recent_entry
+    from app.models import UserStats
+
+    rows = []
+    for user_id, (prompt_count, version_count, recent) in stats.items():
+        recent_prompts = [_recent_entry(prompt_id, title, updated_at) for updated_at, prompt_id, title in recent]
+        rows.append({
+            "user_id": user_id,
+            "prompt_count": prompt_count,
+            "version_count": version_count,
+            "recent_prompts": recent_prompts,
+            "last_updated": recent[0][0] if recent else None,
+        })
+    for start in range(0, len(rows), batch_size):
+        db.execute(insert(UserStats.__table__), rows[start:start + batch_size])
+    db.commit()
+
+
+def main():
+    args = parser.parse_args()
+    # Configure the app before importing it
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from app.core.database import SessionLocal
+    from app.core.security import hash_password
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    prepare_database(args.reset)
+    db = SessionLocal()
+
+    start = time.perf_counter()
+    user_ids = create_users(db, hash_password(args.password), args)
+    total_prompts = len(user_ids) * args.prompts
+    print(f"{db.get_bind().dialect.name}: {len(user_ids)} users, generating {total_prompts} prompts...")
+
+    stats: dict[int, list] = {}
+    versions = contents = done = 0
+    batch: list[PromptHistory] = []
+    for user_id in user_ids:
+        for _ in range(args.prompts):
+            batch.append(PromptHistory(rng, user_id, now, args))
+            if len(batch) >= args.batch_size:
+                v, c = insert_batch(db, batch, stats, args)
+                versions, contents, done = versions + v, contents + c, done + len(batch)
+                batch = []
+                elapsed = time.perf_counter() - start
+                print(f"  {done}/{total_prompts} prompts, {versions} versions ({done / elapsed:,.0f} prompts/s)")
+    if batch:
+        v, c = insert_batch(db, batch, stats, args)
+        versions, contents, done = versions + v, contents + c, done + len(batch)
+    insert_user_stats(db, stats, args.batch_size)
+    sync_sequences(db)
+    db.close()
+
+    elapsed = time.perf_counter() - start
+    rows = len(user_ids) * 2 + done + versions + contents  # users and user_stats, prompts, versions, bodies
+    print()
+    print(f"users            : {len(user_ids)}")
+    print(f"prompts          : {done}")
+    print(f"versions         : {versions} ({versions / max(done, 1):.2f} per prompt)")
+    print(f"stored bodies    : {contents}")
+    print(f"rows inserted    : {rows} in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    print(f"password         : {args.password}")
+
+
+if __name__ == "__main__":
+    main()
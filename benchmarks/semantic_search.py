@@ -0,0 +1,270 @@
+"""
+Query latency, build time, memory and recall of semantic search engines as the corpus grows.
+
+Engines:
+    loop       the current path: SemanticSearchService.cosine_similarity over every
+               embedding (as lists, the way the JSON column loads them), then a full sort
+    loop_json  the same, plus decoding each embedding from JSON on every query,
+               which the app also pays because the column is re-read per search
+    matrix     a prebuilt normalized float32 matrix: one matrix-vector product and
+               an argpartition per query
+
+Vectors are synthetic: clustered Gaussians, with queries drawn near corpus points.
+Recall@k is measured against an exact float64 search. Cells whose estimated
+memory exceeds --memory-limit-gb are skipped, and each engine stops querying
+after --max-query-seconds. Pass --csv to append the rows to a file for tracking
+over time.
+
+Usage:
+    python -m benchmarks.semantic_search --sizes 1000,10000,100000 --dims 256,1024,3072
+    python -m benchmarks.semantic_search --sizes 1000000 --dims 256 --engines matrix --memory-limit-gb 16
+    python -m benchmarks.semantic_search --csv semantic_search.csv
+"""
+import argparse
+import csv
+import functools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="corpus sizes")
+parser.add_argument("--dims", default="256,1024,3072", help="embedding dimensions")
+parser.add_argument("--engines", default="loop,loop_json,matrix")
+parser.add_argument("--queries", type=int, default=50, help="queries per engine and cell")
+parser.add_argument("--max-query-seconds", type=float, default=10.0, help="stop an engine's queries after this long")
+parser.add_argument("--k", type=int, default=5, help="results per query (the service returns 5)")
+parser.add_argument("--clusters", type=int, default=100, help="topics the synthetic vectors are drawn around")
+parser.add_argument("--memory-limit-gb", type=float, default=4.0, help="skip cells estimated to need more")
+parser.add_argument("--csv", help="append results to this CSV file")
+parser.add_argument("--seed", type=int, default=42)
+
+# Configure the app before importing it; only the service module is used
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'semantic_search.db')}")
+
+from app.services.semantic_search_service import SemanticSearchService  # noqa: E402
+
+# cosine_similarity doesn't touch the service instance
+cosine_similarity = functools.partial(SemanticSearchService.cosine_similarity, None)
+
+FLOAT_BYTES = sys.getsizeof(1.0)
+LIST_SLOT_BYTES = 8
+
+
+class LoopEngine:
+    """SemanticSearchService.search_prompts without the database: score every embedding, sort all"""
+
+    name = "loop"
+
+    def __init__(self, vectors: np.ndarray):
+        self.embeddings = vectors.tolist()
+
+    def nbytes(self) -> int:
+        per_row = sys.getsizeof(self.embeddings[0]) + len(self.embeddings[0]) * FLOAT_BYTES
+        return len(self.embeddings) * per_row
+
+    def search(self, query: np.ndarray, k: int) -> list[int]:
+        query = query.tolist()
+        scored = [(cosine_similarity(query, embedding), i) for i, embedding in enumerate(self.rows())]
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return [i for _, i in scored[:k]]
+
+    def rows(self):
+        return self.embeddings
+
+
+class LoopJsonEngine(LoopEngine):
+    """The loop path including the per-query JSON decode of the embedding column"""
+
+    name = "loop_json"
+
+    def __init__(self, vectors: np.ndarray):
+        self.encoded = [json.dumps(row) for row in vectors.tolist()]
+
+    def nbytes(self) -> int:
+        return sum(sys.getsizeof(s) for s in self.encoded)
+
+    def rows(self):
+        return (json.loads(s) for s in self.encoded)
+
+
+class MatrixEngine:
+    """Normalized float32 matrix, scored with one matrix-vector product per query"""
+
+    name = "matrix"
+
+    def __init__(self, vectors: np.ndarray):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.matrix = (vectors / np.maximum(norms, 1e-12)).astype(np.float32)
+
+    def nbytes(self) -> int:
+        return self.matrix.nbytes
+
+    def search(self, query: np.ndarray, k: int) -> list[int]:
+        scores = self.matrix @ (query / np.linalg.norm(query)).astype(np.float32)
+        if k < len(scores):
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        return top[np.argsort(-scores[top])].tolist()
+
+
+ENGINES = {engine.name: engine for engine in (LoopEngine, LoopJsonEngine, MatrixEngine)}
+
+# Rough bytes per vector component for each engine's index, to skip cells that won't fit
+INDEX_BYTES_PER_VALUE = {"loop": FLOAT_BYTES + LIST_SLOT_BYTES, "loop_json": 21, "matrix": 4}
+
+
+def parse_ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def synthetic_vectors(n: int, dim: int, queries: int, clusters: int, seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """Clustered corpus vectors and queries perturbed from random corpus points"""
+    rng = np.random.default_rng([seed, n, dim])
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    corpus = np.empty((n, dim), dtype=np.float32)
+    chunk = 65536
+    for start in range(0, n, chunk):
+        size = min(chunk, n - start)
+        corpus[start:start + size] = centers[rng.integers(clusters, size=size)]
+        corpus[start:start + size] += 0.6 * rng.standard_normal((size, dim), dtype=np.float32)
+    picks = rng.integers(n, size=queries)
+    query_vectors = corpus[picks] + 0.3 * rng.standard_normal((queries, dim), dtype=np.float32)
+    return corpus, query_vectors
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> list[set[int]]:
+    """Ground truth by cosine in float64, a chunk of rows at a time"""
+    q = queries.astype(np.float64)
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    best_scores = np.full((len(q), 0), -np.inf)
+    best_ids = np.empty((len(q), 0), dtype=np.int64)
+    chunk = 16384
+    for start in range(0, len(corpus), chunk):
+        rows = corpus[start:start + chunk].astype(np.float64)
+        rows /= np.linalg.norm(rows, axis=1, keepdims=True)
+        scores = np.concatenate([best_scores, q @ rows.T], axis=1)
+        ids = np.concatenate([best_ids, np.broadcast_to(np.arange(start, start + len(rows)), (len(q), len(rows)))], axis=1)
+        keep = np.argsort(-scores, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, keep, axis=1)
+        best_ids = np.take_along_axis(ids, keep, axis=1)
+    return [set(row.tolist()) for row in best_ids]
+
+
+def estimated_bytes(engine: str, n: int, dim: int) -> int:
+    corpus = n * dim * 4
+    ground_truth_chunk = 16384 * dim * 8
+    return corpus + ground_truth_chunk + n * dim * INDEX_BYTES_PER_VALUE[engine]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run_engine(
+    name: str, corpus: np.ndarray, queries: np.ndarray, truth: list[set[int]], k: int, max_query_seconds: float
+) -> dict:
+    start = time.perf_counter()
+    engine = ENGINES[name](corpus)
+    build_s = time.perf_counter() - start
+    index_bytes = engine.nbytes()
+
+    latencies, hits = [], 0
+    deadline = time.perf_counter() + max_query_seconds
+    for query, expected in zip(queries, truth):
+        t0 = time.perf_counter()
+        found = engine.search(query, k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        hits += len(expected.intersection(found))
+        if time.perf_counter() > deadline:
+            break
+    del engine
+
+    return {
+        "build_s": build_s,
+        "index_mib": index_bytes / 2**20,
+        "queries": len(latencies),
+        "p50_ms": percentile(latencies, 0.50),
+        "p99_ms": percentile(latencies, 0.99),
+        "qps": 1000 / statistics.mean(latencies),
+        "recall": hits / (len(latencies) * min(k, len(corpus))),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def append_csv(path: str, rows: list[dict]):
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    args = parser.parse_args()
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        parser.error(f"unknown engines {unknown}, expected some of {', '.join(ENGINES)}")
+    limit = args.memory_limit_gb * 2**30
+    run_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    commit = git_commit()
+
+    print(f"{'engine':<11}{'corpus':>10}{'dim':>6}{'build s':>10}{'index MiB':>11}"
+          f"{'queries':>9}{'p50 ms':>11}{'p99 ms':>11}{'qps':>10}{f'recall@{args.k}':>11}")
+    rows = []
+    for dim in parse_ints(args.dims):
+        for n in parse_ints(args.sizes):
+            runnable = [e for e in engines if estimated_bytes(e, n, dim) <= limit]
+            for name in sorted(set(engines) - set(runnable), key=engines.index):
+                need = estimated_bytes(name, n, dim) / 2**30
+                print(f"{name:<11}{n:>10}{dim:>6}  skipped: needs ~{need:.1f} GiB (--memory-limit-gb {args.memory_limit_gb:g})")
+            if not runnable:
+                continue
+
+            corpus, queries = synthetic_vectors(n, dim, args.queries, args.clusters, args.seed)
+            truth = exact_top_k(corpus, queries, args.k)
+            for name in runnable:
+                result = run_engine(name, corpus, queries, truth, args.k, args.max_query_seconds)
+                print(
+                    f"{name:<11}{n:>10}{dim:>6}{result['build_s']:>10.2f}{result['index_mib']:>11.1f}"
+                    f"{result['queries']:>9}{result['p50_ms']:>11.2f}{result['p99_ms']:>11.2f}"
+                    f"{result['qps']:>10.1f}{result['recall']:>11.3f}",
+                    flush=True,
+                )
+                rows.append({
+                    "run_at": run_at,
+                    "commit": commit,
+                    "engine": name,
+                    "corpus": n,
+                    "dim": dim,
+                    "k": args.k,
+                    **{key: round(value, 4) if isinstance(value, float) else value for key, value in result.items()},
+                })
+            del corpus, queries
+
+    if args.csv and rows:
+        append_csv(args.csv, rows)
+        print(f"\n{len(rows)} rows appended to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Compare full-copy version storage against delta-compressed, content-addressed storage.
+
+Usage:
+    python -m benchmarks.version_storage --prompts 50 --edits 200
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import insert, select, func
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--prompts", type=int, default=50, help="number of prompts")
+parser.add_argument("--edits", type=int, default=200, help="versions per prompt")
+parser.add_argument("--words", type=int, default=400, help="approximate words in the initial body")
+parser.add_argument("--snapshot-interval", type=int, default=10, help="VERSION_SNAPSHOT_INTERVAL")
+parser.add_argument("--reads", type=int, default=2000, help="random version reads to time")
+parser.add_argument("--seed", type=int, default=42)
+
+VOCABULARY = (
+    "you are an expert assistant write clear concise answers explain each step use examples "
+    "avoid jargon respond in json format include a summary list the assumptions cite sources "
+    "keep the tone friendly limit the answer to three paragraphs ask clarifying questions"
+).split()
+
+
+def random_sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(6, 16))).capitalize() + "."
+
+
+def initial_body(rng: random.Random, target_words: int) -> str:
+    lines = []
+    words = 0
+    while words < target_words:
+        sentence = random_sentence(rng)
+        words += sentence.count(" ") + 1
+        lines.append(sentence)
+    return "\n".join(lines)
+
+
+def edit(rng: random.Random, body: str, history: list[str]) -> str:
+    """Typical prompt edits: tweak a word, add or drop a sentence, or roll back"""
+    roll = rng.random()
+    if roll < 0.05 and len(history) > 2:
+        return rng.choice(history[:-1])
+    lines = body.split("\n")
+    index = rng.randrange(len(lines))
+    if roll < 0.55:
+        words = lines[index].split(" ")
+        words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+        lines[index] = " ".join(words)
+    elif roll < 0.85:
+        lines.insert(index, random_sentence(rng))
+    elif len(lines) > 1:
+        del lines[index]
+    return "\n".join(lines)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    args = parser.parse_args()
+
+    # Configure the app before importing it
+    db_file = os.path.join(tempfile.mkdtemp(), "version_storage.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+    os.environ["VERSION_SNAPSHOT_INTERVAL"] = str(args.snapshot_interval)
+
+    from app.core.database import Base, SessionLocal, engine
+    from app.models import User, Prompt, PromptVersion, VersionContent
+    from app.crud import crud_version_content
+    from app.crud.crud_version_content import store_version_content, load_version_contents
+
+    rng = random.Random(args.seed)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+
+    user = User(email="bench@example.com", hashed_password=b"x")
+    db.add(user)
+    db.commit()
+
+    print(f"Generating {args.prompts} prompts x {args.edits} versions...")
+    start = time.perf_counter()
+    full_rows, delta_rows = [], []
+    for p in range(args.prompts):
+        body = initial_body(rng, args.words)
+        history = [body]
+        prompt = Prompt(title=f"Prompt {p}", content=body, user_id=user.id)
+        db.add(prompt)
+        db.flush()
+
+        base_hash = None
+        for number in range(1, args.edits + 1):
+            if number > 1:
+                body = edit(rng, body, history)
+                history.append(body)
+            base_hash = store_version_content(db, body, base_hash)
+            full_rows.append({"prompt_id": prompt.id, "version_number": number, "content": body, "user_id": user.id})
+            delta_rows.append({"prompt_id": prompt.id, "version_number": number, "content_hash": base_hash, "user_id": user.id})
+        db.commit()
+    write_seconds = time.perf_counter() - start
+
+    # Legacy full copies and content-addressed rows side by side, marked by version_number sign
+    db.execute(insert(PromptVersion), full_rows)
+    db.execute(insert(PromptVersion), [{**row, "version_number": -row["version_number"]} for row in delta_rows])
+    db.commit()
+
+    full_bytes = sum(len(row["content"].encode("utf-8")) for row in full_rows)
+    delta_bytes = db.scalar(select(func.sum(func.length(VersionContent.data))))
+    blobs = db.scalar(select(func.count()).select_from(VersionContent))
+
+    full_ids = [v for (v,) in db.execute(select(PromptVersion.id).where(PromptVersion.version_number > 0))]
+    delta_ids = [v for (v,) in db.execute(select(PromptVersion.id).where(PromptVersion.version_number < 0))]
+    picks = [rng.randrange(len(full_ids)) for _ in range(args.reads)]
+
+    def time_reads(read) -> list[float]:
+        samples = []
+        for i in picks:
+            t0 = time.perf_counter()
+            read(i)
+            samples.append((time.perf_counter() - t0) * 1000)
+        return samples
+
+    def read_full(i):
+        db.scalar(select(PromptVersion.content).where(PromptVersion.id == full_ids[i]))
+
+    def read_delta(i):
+        content_hash = db.scalar(select(PromptVersion.content_hash).where(PromptVersion.id == delta_ids[i]))
+        load_version_contents(db, [content_hash])
+
+    def read_delta_cold(i):
+        crud_version_content._content_cache.clear()
+        read_delta(i)
+
+    results = {
+        "full copy": time_reads(read_full),
+        "delta (cold cache)": time_reads(read_delta_cold),
+        "delta (warm cache)": time_reads(read_delta),
+    }
+    db.close()
+
+    versions = len(full_rows)
+    print()
+    print(f"versions stored      : {versions} ({blobs} distinct bodies, snapshot every {args.snapshot_interval})")
+    print(f"delta write time     : {write_seconds:.2f}s ({write_seconds / versions * 1000:.3f} ms/version)")
+    print(f"full copy storage    : {full_bytes / 1024:,.1f} KiB")
+    print(f"delta storage        : {delta_bytes / 1024:,.1f} KiB ({full_bytes / delta_bytes:.1f}x smaller)")
+    print()
+    print(f"{'read path':<22}{'p50 ms':>10}{'p99 ms':>10}{'mean ms':>10}")
+    for name, samples in results.items():
+        print(f"{name:<22}{percentile(samples, 0.50):>10.3f}{percentile(samples, 0.99):>10.3f}{statistics.mean(samples):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
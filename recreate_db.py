@@ -1,56 +1,57 @@
-from app.core.database import engine
-from sqlalchemy import text
+"""
+Drop every table and rebuild the schema from the migrations. Development only:
+this deletes all data.
+
+Usage:
+    python recreate_db.py --yes
+"""
+import argparse
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+
+import app.models  # noqa: F401  registers every table on Base.metadata
+from app.core.database import Base, engine
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--yes", action="store_true", help="don't ask for confirmation")
+args = parser.parse_args()
+
+if not args.yes:
+    answer = input(f"Delete ALL data in {engine.url.render_as_string(hide_password=True)}? [y/N] ")
+    if answer.strip().lower() != "y":
+        raise SystemExit("Aborted")
 
 print("=" * 60)
-print("FORCE DROPPING TABLES USING SQL")
+print("DROPPING TABLES")
 print("=" * 60)
 
-with engine.connect() as conn:
-    # Drop tables in correct order (prompts first due to foreign key)
-    try:
-        conn.execute(text("DROP TABLE IF EXISTS prompts CASCADE"))
-        conn.commit()
-        print("✓ Dropped prompts table")
-    except Exception as e:
-        print(f"Error dropping prompts: {e}")
-    
-    try:
-        conn.execute(text("DROP TABLE IF EXISTS users CASCADE"))
-        conn.commit()
-        print("✓ Dropped users table")
-    except Exception as e:
-        print(f"Error dropping users: {e}")
+# Tables from the models, in foreign-key order, on any backend
+Base.metadata.drop_all(bind=engine)
+# Created by migrations rather than the models
+with engine.begin() as conn:
+    for table in ("prompts_fts", "alembic_version"):
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+print("✓ Dropped all tables")
 
 print("\n" + "=" * 60)
-print("CREATING NEW TABLES WITH CORRECT SCHEMA")
+print("APPLYING MIGRATIONS")
 print("=" * 60)
 
-# Import models
-from app.models.user import User
-from app.models.prompt import Prompt
-from app.core.database import Base
-
-# Create all tables
-Base.metadata.create_all(bind=engine)
-print("✓ Created all tables")
+command.upgrade(Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")), "head")
+print("✓ Schema is at the latest migration")
 
 print("\n" + "=" * 60)
 print("VERIFYING NEW SCHEMA")
 print("=" * 60)
 
-from sqlalchemy import inspect
-
 inspector = inspect(engine)
-
-print("\n--- Users table columns ---")
-cols = inspector.get_columns('users')
-for c in cols:
-    print(f"  {c['name']}: {c['type']}")
-
-print("\n--- Prompts table columns ---")
-cols = inspector.get_columns('prompts')
-for c in cols:
-    print(f"  {c['name']}: {c['type']}")
+for table in sorted(inspector.get_table_names()):
+    print(f"\n--- {table} table columns ---")
+    for c in inspector.get_columns(table):
+        print(f"  {c['name']}: {c['type']}")
 
 print("\n" + "=" * 60)
 print("DATABASE RECREATION COMPLETE!")
@@ -3,6 +3,14 @@
 WORKERS=${WORKERS:-4}
 BIND=${BIND:-0.0.0.0:8000}
 
+# Workers write their metrics here and /metrics merges them; start each server with a clean slate.
+# Only the metrics files are removed, in case METRICS_DIR points at a directory with other contents.
+export METRICS_DIR=${METRICS_DIR:-/tmp/prompt-api-metrics}
+mkdir -p "$METRICS_DIR" && rm -f "$METRICS_DIR"/*.metrics
+
+# Bring the schema up to date once, before any worker starts serving
+alembic upgrade head || exit 1
+
 echo "Starting Gunicorn with $WORKERS workers and binding to $BIND"
 
 gunicorn app.main:app \
@@ -0,0 +1,71 @@
+import os
+import tempfile
+
+# Configure the app before importing it. Tests create and drop every table, so
+# they never run against DATABASE_URL; set TEST_DATABASE_URL to use another database.
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+)
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+import pytest  # noqa: E402
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+import app.models  # noqa: E402,F401  registers every table on Base.metadata
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import Prompt, User  # noqa: E402
+from app.services.full_text_search_service import setup_full_text_search  # noqa: E402
+
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic")
+
+
+@pytest.fixture
+def db():
+    """A session on freshly created tables, dropped again after the test"""
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def migrated_db():
+    """
+    Like `db`, but the schema is built by the migrations, so it has the full-text
+    index too. Override `db` with it in modules that need that.
+    """
+    config = Config()  # no ini file: alembic's logging setup would disable the app's loggers
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    command.upgrade(config, "head")
+    setup_full_text_search(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+        with engine.begin() as conn:
+            for table in ("prompts_fts", "alembic_version"):
+                conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        setup_full_text_search(engine)
+
+
+@pytest.fixture
+def user(db):
+    user = User(email="user@example.com", hashed_password=b"not-a-real-hash")
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def prompt(db, user):
+    prompt = Prompt(title="Prompt", content="", user_id=user.id)
+    db.add(prompt)
+    db.commit()
+    return prompt
@@ -0,0 +1,17 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.crud import invalidate_user, rebuild_user_stats
+from app.main import app
+
+
+@pytest.fixture
+def client(db, user):
+    """A client authenticated as `user`, with the stats row created and the user cache cold"""
+    invalidate_user(user.email)
+    rebuild_user_stats(db, user.id)
+    db.commit()
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token({'sub': user.email})}"
+    return client
@@ -0,0 +1,107 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from jose import jwt
+
+from app.core import security
+from app.core.config import ALGORITHM, SECRET_KEY, USER_CACHE_TTL_SECONDS
+from app.crud import crud_async, get_cached_user, update_password_hash
+
+PROMPTS = "/api/v1/prompts/"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Shift the time.monotonic() clock the caches expire on: `clock(seconds)` moves it forward"""
+    offset = 0.0
+    monotonic = time.monotonic
+
+    def advance(seconds: float):
+        nonlocal offset
+        offset += seconds
+
+    monkeypatch.setattr(time, "monotonic", lambda: monotonic() + offset)
+    return advance
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    """Emails get_current_user loaded from the database"""
+    emails = []
+    get_user_by_email = crud_async.get_user_by_email
+
+    async def spy(db, email):
+        emails.append(email)
+        return await get_user_by_email(db, email)
+
+    monkeypatch.setattr(crud_async, "get_user_by_email", spy)
+    return emails
+
+
+def token(email: str, expires_in: timedelta) -> str:
+    return jwt.encode({"sub": email, "exp": datetime.utcnow() + expires_in}, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def bearer(value: str) -> dict:
+    return {"Authorization": f"Bearer {value}"}
+
+
+def test_user_is_loaded_once_then_served_from_the_cache(client, user, lookups):
+    for _ in range(3):
+        assert client.get(PROMPTS).status_code == 200
+
+    assert lookups == [user.email]
+
+
+def test_expired_token_is_rejected(client, user):
+    response = client.get(PROMPTS, headers=bearer(token(user.email, timedelta(minutes=-1))))
+
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+
+def test_verified_token_is_cached_until_it_expires(client, user, clock):
+    short_lived = token(user.email, timedelta(seconds=30))
+    assert client.get(PROMPTS, headers=bearer(short_lived)).status_code == 200
+    assert security._token_cache.get(short_lived) is not None
+
+    clock(31)
+
+    assert security._token_cache.get(short_lived) is None
+
+
+def test_user_cache_expires_after_its_ttl(client, user, lookups, clock):
+    client.get(PROMPTS)
+    clock(USER_CACHE_TTL_SECONDS - 1)
+    assert get_cached_user(user.email) is not None
+
+    clock(2)
+    assert get_cached_user(user.email) is None
+    assert client.get(PROMPTS).status_code == 200
+    assert lookups == [user.email, user.email]
+
+
+def test_password_change_invalidates_the_cached_user(client, db, user, lookups):
+    client.get(PROMPTS)
+
+    update_password_hash(db, user, b"new-hash")
+
+    assert get_cached_user(user.email) is None
+    assert client.get(PROMPTS).status_code == 200
+    assert get_cached_user(user.email).hashed_password == b"new-hash"
+    assert lookups == [user.email, user.email]
+
+
+def test_deleted_user_is_rejected_once_the_cache_entry_expires(client, db, user, clock):
+    client.get(PROMPTS)
+    db.delete(user)
+    db.commit()
+
+    # another worker deleting the user can't reach this worker's cache; the TTL bounds the staleness
+    assert client.get(PROMPTS).status_code == 200
+    clock(USER_CACHE_TTL_SECONDS)
+
+    response = client.get(PROMPTS)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "User not found"
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models import Prompt, PromptVersion, VersionContent
+from app.services import prompt_import_service
+
+IMPORT = "/api/v1/prompts/import"
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(prompt_import_service, "IMPORT_CHUNK_SIZE", 2)
+
+
+def ndjson(*rows) -> bytes:
+    return "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+
+
+def count(db, model) -> int:
+    return db.scalar(select(func.count()).select_from(model))
+
+
+def test_duplicate_bodies_within_and_across_chunks(client, db):
+    rows = [{"title": f"Prompt {i}", "content": body} for i, body in enumerate(["same", "same", "other", "same", "other"])]
+
+    response = client.post(IMPORT, content=ndjson(*rows))
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {"imported": 5, "failed": 0, "errors": []}
+    assert count(db, Prompt) == count(db, PromptVersion) == 5
+    assert count(db, VersionContent) == 2
+
+
+def test_reimporting_the_same_bodies(client, db):
+    body = ndjson({"title": "One", "content": "shared"}, {"title": "Two", "content": "shared"})
+
+    for _ in range(2):
+        assert client.post(IMPORT, content=body).json()["imported"] == 2
+
+    assert count(db, Prompt) == 4
+    assert count(db, VersionContent) == 1
+
+
+def test_invalid_rows_are_reported_and_skipped(client, db):
+    body = b"\n".join([
+        json.dumps({"title": "Good", "content": "body"}).encode(),
+        b"{not json",
+        b"[1, 2]",
+        json.dumps({"content": "no title"}).encode(),
+        json.dumps({"title": "Also good", "content": "body"}).encode(),
+    ])
+
+    result = client.post(IMPORT, content=body).json()
+
+    assert (result["imported"], result["failed"]) == (2, 3)
+    assert [error["row"] for error in result["errors"]] == [2, 3, 4]
+    assert result["errors"][0]["error"].startswith("Invalid JSON")
+    assert "title" in result["errors"][2]["error"]
+
+
+def test_csv_with_multiline_fields(client, db):
+    body = b'title,content,description\nFirst,"line one\nline two",\nSecond,plain,with description\n'
+
+    result = client.post(IMPORT, content=body, headers={"Content-Type": "text/csv"}).json()
+
+    assert result == {"imported": 2, "failed": 0, "errors": []}
+    contents = db.scalars(select(Prompt.content).order_by(Prompt.id)).all()
+    assert contents == ["line one\nline two", "plain"]
+
+
+def test_error_list_is_capped(client, db, monkeypatch):
+    monkeypatch.setattr(prompt_import_service, "IMPORT_MAX_ERRORS", 2)
+
+    result = client.post(IMPORT, content=b"x\n" * 5).json()
+
+    assert result["failed"] == 5
+    assert [error["row"] for error in result["errors"]] == [1, 2]
@@ -0,0 +1,102 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor
+from app.models import Prompt
+
+PROMPTS = "/api/v1/prompts/"
+
+
+def add_prompts(db, user, *updated_at):
+    prompts = [Prompt(title=f"Prompt {i}", content="", user_id=user.id, updated_at=at) for i, at in enumerate(updated_at)]
+    db.add_all(prompts)
+    db.commit()
+    return prompts
+
+
+def all_pages(client, url, limit):
+    """Follow `X-Next-Cursor` until the last page, returning the ids of every page"""
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, params=params)
+        assert response.status_code == 200, response.text
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_through_tied_updated_at_once(client, db, user):
+    now = datetime(2024, 1, 1, 12)
+    prompts = add_prompts(db, user, now + timedelta(minutes=1), *[now] * 5, now - timedelta(minutes=1))
+
+    pages = all_pages(client, PROMPTS, limit=2)
+
+    newest, *tied, oldest = prompts
+    expected = [newest.id, *sorted((p.id for p in tied), reverse=True), oldest.id]
+    assert [id for page in pages for id in page] == expected
+    assert [len(page) for page in pages] == [2, 2, 2, 1]
+
+
+def test_last_page_has_no_next_cursor(client, db, user):
+    add_prompts(db, user, *[datetime(2024, 1, 1) + timedelta(minutes=i) for i in range(4)])
+
+    # a full last page still hands out a cursor, which then leads to an empty page
+    assert [len(page) for page in all_pages(client, PROMPTS, limit=2)] == [2, 2, 0]
+    assert [len(page) for page in all_pages(client, PROMPTS, limit=3)] == [3, 1]
+
+
+def test_cursor_skips_deleted_prompts(client, db, user):
+    first, second, third = add_prompts(db, user, *[datetime(2024, 1, 1) + timedelta(minutes=i) for i in range(3)])
+    cursor = client.get(PROMPTS, params={"limit": 1}).headers[NEXT_CURSOR_HEADER]
+    second.deleted_at = datetime.utcnow()
+    db.commit()
+
+    assert [item["id"] for item in client.get(PROMPTS, params={"cursor": cursor}).json()] == [first.id]
+
+
+def urlsafe(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    urlsafe(b"\xff\xfe"),
+    urlsafe(json.dumps([1, 2]).encode()),
+    encode_cursor(id=1),
+    encode_cursor(u="yesterday", id=1),
+    encode_cursor(u="2024-01-01T00:00:00", id="x"),
+    encode_cursor(v=1),
+])
+def test_invalid_cursor_is_rejected(client, db, user, cursor):
+    response = client.get(PROMPTS, params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["error"] == "InvalidCursorError"
+
+
+def test_tampered_cursor_is_rejected(client, db, user):
+    add_prompts(db, user, datetime(2024, 1, 1), datetime(2024, 1, 2))
+    cursor = client.get(PROMPTS, params={"limit": 1}).headers[NEXT_CURSOR_HEADER]
+
+    response = client.get(PROMPTS, params={"cursor": cursor[:-3]})
+
+    assert response.status_code == 400
+    assert response.json()["error"] == "InvalidCursorError"
+
+
+def test_version_cursor_pages_newest_first(client, db, user):
+    prompt_id = client.post(PROMPTS, json={"title": "Versioned", "content": "v1"}).json()["id"]
+    for i in range(2, 6):
+        assert client.put(f"{PROMPTS}{prompt_id}", json={"content": f"v{i}"}).status_code == 200
+
+    url = f"{PROMPTS}{prompt_id}/versions"
+    pages = all_pages(client, url, limit=2)
+
+    versions = client.get(url).json()
+    assert [version["version_number"] for version in versions] == [5, 4, 3, 2, 1]
+    assert pages == [[v["id"] for v in versions[:2]], [v["id"] for v in versions[2:4]], [versions[4]["id"]]]
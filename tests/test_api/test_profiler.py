@@ -0,0 +1,80 @@
+from collections import Counter
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1 import metrics as metrics_routes
+from app.core import deps
+from app.core.profiler import StackSampler, collapsed, top_functions, without_idle
+from app.main import app
+
+PROFILE = "/api/v1/metrics/profile"
+
+
+@pytest.fixture
+def sampler(monkeypatch):
+    sampler = StackSampler(interval_ms=1)
+    monkeypatch.setattr(metrics_routes, "stack_sampler", sampler)
+    return sampler
+
+
+@pytest.fixture
+def admin(monkeypatch, user):
+    monkeypatch.setattr(deps, "ADMIN_EMAILS", {user.email})
+
+
+def test_profiler_is_off_by_default(client, sampler, monkeypatch):
+    monkeypatch.setattr(sampler, "sample", lambda *args: pytest.fail("sampled without an admin"))
+
+    assert deps.ADMIN_EMAILS == set()
+    response = client.get(PROFILE, params={"seconds": 0.01})
+    assert response.status_code == 403
+    assert response.json()["error"] == "UnauthorizedActionError"
+    assert TestClient(app).get(PROFILE, params={"seconds": 0.01}).status_code == 401
+
+
+def test_admin_gets_the_busiest_frames(client, sampler, admin):
+    response = client.get(PROFILE, params={"seconds": 0.05, "format": "json", "idle": True})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["rounds"] > 0 and body["samples"] > 0
+    assert body["interval_ms"] == 1
+    assert 0 < sum(frame["samples"] for frame in body["top"]) <= body["samples"]
+
+
+def test_sampling_time_is_capped(client, sampler, admin):
+    assert client.get(PROFILE, params={"seconds": 3600}).status_code == 422
+
+
+def test_only_one_session_at_a_time(client, sampler, admin):
+    # hold the only session slot, as a running profile would
+    assert sampler._sessions.acquire(blocking=False)
+    try:
+        response = client.get(PROFILE, params={"seconds": 0.01})
+    finally:
+        sampler._sessions.release()
+
+    assert response.status_code == 503
+    assert response.json()["error"] == "ServiceBusyError"
+    assert client.get(PROFILE, params={"seconds": 0.01}).status_code == 200
+
+
+def test_stack_formats():
+    stacks = Counter({
+        "MainThread;serve (app.py:1);handle (app.py:9)": 3,
+        "MainThread;serve (app.py:1);hash (app.py:20)": 1,
+        "worker;_bootstrap (threading.py:1);wait (threading.py:300)": 5,
+    })
+
+    busy = without_idle(stacks)
+
+    assert set(busy) == set(stacks) - {"worker;_bootstrap (threading.py:1);wait (threading.py:300)"}
+    assert collapsed(busy).splitlines() == [
+        "MainThread;serve (app.py:1);handle (app.py:9) 3",
+        "MainThread;serve (app.py:1);hash (app.py:20) 1",
+    ]
+    assert top_functions(busy) == [
+        {"frame": "handle (app.py:9)", "samples": 3, "percent": 75.0},
+        {"frame": "hash (app.py:20)", "samples": 1, "percent": 25.0},
+    ]
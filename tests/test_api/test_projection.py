@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+from app.crud import rebuild_user_stats
+from app.crud.crud_prompt import PROMPT_LIST_COLUMNS
+from app.models import Prompt
+from app.schemas import PromptListItem, PromptOut
+
+PROMPTS = "/api/v1/prompts/"
+DASHBOARD = "/api/v1/dashboard/"
+
+
+def add_prompts(db, user, count):
+    prompts = [
+        Prompt(
+            title=f"Prompt {i}",
+            content=f"body {i} " * 10,
+            description="described" if i % 2 else None,
+            user_id=user.id,
+            updated_at=datetime(2024, 1, 1) + timedelta(minutes=i),
+            version_count=i + 1,
+        )
+        for i in range(count)
+    ]
+    db.add_all(prompts)
+    db.commit()
+    return prompts[::-1]  # newest first, as listed
+
+
+def test_default_list_keeps_the_full_prompt_shape(client, db, user):
+    prompts = add_prompts(db, user, 3)
+
+    items = client.get(PROMPTS).json()
+
+    # the list used to return PromptOut; the projected rows must still carry all of it
+    assert [set(item) for item in items] == [set(PromptOut.model_fields)] * 3
+    assert [PromptOut.model_validate(item).model_dump() for item in items] == [
+        PromptOut.model_validate(prompt).model_dump() for prompt in prompts
+    ]
+
+
+def test_fields_returns_only_the_requested_columns(client, db, user):
+    prompts = add_prompts(db, user, 2)
+
+    items = client.get(PROMPTS, params={"fields": "title, version_count"}).json()
+
+    assert items == [
+        {
+            "id": prompt.id,
+            "updated_at": prompt.updated_at.isoformat(),
+            "title": prompt.title,
+            "version_count": prompt.version_count,
+        }
+        for prompt in prompts
+    ]
+
+
+def test_every_column_can_be_projected(client, db, user):
+    prompt = add_prompts(db, user, 1)[0]
+
+    (item,) = client.get(PROMPTS, params={"fields": ",".join(PROMPT_LIST_COLUMNS)}).json()
+
+    assert set(item) == set(PROMPT_LIST_COLUMNS)
+    assert PromptListItem.model_validate(item) == PromptListItem.model_validate(prompt, from_attributes=True)
+
+
+def test_preview_chars_truncates_content(client, db, user):
+    long, short = add_prompts(db, user, 2)
+    short.content = "tiny"
+    db.commit()
+
+    items = client.get(PROMPTS, params={"preview_chars": 8}).json()
+
+    previews = {item["id"]: (item["content"], item["content_truncated"]) for item in items}
+    assert previews == {long.id: (long.content[:8], True), short.id: ("tiny", False)}
+    assert all(set(item) == set(PromptOut.model_fields) | {"content_truncated"} for item in items)
+
+
+def test_unknown_fields_are_rejected(client):
+    response = client.get(PROMPTS, params={"fields": "title,embedding"})
+
+    assert response.status_code == 400
+    assert response.json() == {"error": "InvalidFieldsError", "message": "Unknown fields: embedding"}
+
+
+def test_dashboard_serves_the_precomputed_summary(client, db, user):
+    prompts = add_prompts(db, user, 7)
+    rebuild_user_stats(db, user.id)
+    db.commit()
+
+    dashboard = client.get(DASHBOARD).json()
+
+    recent = [{"id": p.id, "title": p.title, "updated_at": p.updated_at.isoformat()} for p in prompts[:5]]
+    assert dashboard == {
+        "total_prompts": 7,
+        "total_versions": sum(p.version_count for p in prompts),
+        "last_updated": recent[0]["updated_at"],
+        "recent_prompts": recent,
+    }
@@ -0,0 +1,94 @@
+import pytest
+
+from app.core import request_context
+from app.core.request_context import QUERY_COUNT_HEADER, RequestContextMiddleware, query_budget
+from app.crud import crud_user_stats, invalidate_user
+
+PROMPTS = "/api/v1/prompts"
+
+
+@pytest.fixture
+def client(client):
+    client.get(f"{PROMPTS}/")  # caches the user, as on every request after the first
+    return client
+
+
+def assert_within_budget(response, method: str, route_path: str):
+    assert response.status_code < 300, response.text
+    count = int(response.headers[QUERY_COUNT_HEADER])
+    assert count <= query_budget(method, route_path), f"{method} {route_path} ran {count} statements"
+
+
+def test_prompt_write_paths_stay_within_budget(client):
+    for i in range(3):
+        response = client.post(f"{PROMPTS}/", json={"title": f"Prompt {i}", "content": f"body {i}\n" * 20})
+        assert_within_budget(response, "POST", f"{PROMPTS}/")
+    prompt_id = response.json()["id"]
+
+    for i in range(3):
+        response = client.put(f"{PROMPTS}/{prompt_id}", json={"content": f"edit {i}\n" * 20})
+        assert_within_budget(response, "PUT", f"{PROMPTS}/{{prompt_id}}")
+    assert response.json()["content"] == "edit 2\n" * 20
+
+    response = client.put(f"{PROMPTS}/{prompt_id}", json={"title": "Renamed"})
+    assert_within_budget(response, "PUT", f"{PROMPTS}/{{prompt_id}}")
+
+    response = client.post(f"{PROMPTS}/{prompt_id}/rollback/1")
+    assert_within_budget(response, "POST", f"{PROMPTS}/{{prompt_id}}/rollback/{{version_number}}")
+
+    response = client.delete(f"{PROMPTS}/{prompt_id}")
+    assert_within_budget(response, "DELETE", f"{PROMPTS}/{{prompt_id}}")
+
+
+def test_prompt_read_paths_stay_within_budget(client):
+    prompt_id = client.post(f"{PROMPTS}/", json={"title": "Prompt", "content": "one\n"}).json()["id"]
+    client.put(f"{PROMPTS}/{prompt_id}", json={"content": "one\ntwo\n"})
+
+    for path, route_path, params in [
+        (f"{PROMPTS}/", f"{PROMPTS}/", {}),
+        (f"{PROMPTS}/{prompt_id}", f"{PROMPTS}/{{prompt_id}}", {}),
+        (f"{PROMPTS}/{prompt_id}/versions", f"{PROMPTS}/{{prompt_id}}/versions", {}),
+        (f"{PROMPTS}/{prompt_id}/diff", f"{PROMPTS}/{{prompt_id}}/diff", {"from": 1, "to": 2}),
+        (f"{PROMPTS}/{prompt_id}/version_count", f"{PROMPTS}/{{prompt_id}}/version_count", {}),
+    ]:
+        assert_within_budget(client.get(path, params=params), "GET", route_path)
+
+
+def test_dashboard_is_one_lookup(client, user):
+    crud_user_stats._stats_cache.pop(user.id)  # as on a worker that hasn't cached it yet
+    assert_within_budget(client.get("/api/v1/dashboard/"), "GET", "/api/v1/dashboard/")
+
+
+def test_budgets_hold_with_a_cold_user_cache(client, user):
+    for method, path, route_path, body in [
+        ("POST", f"{PROMPTS}/", f"{PROMPTS}/", {"title": "Prompt", "content": "one\n"}),
+        ("GET", f"{PROMPTS}/", f"{PROMPTS}/", None),
+    ]:
+        invalidate_user(user.email)  # first request on a worker, or after USER_CACHE_TTL_SECONDS
+        response = client.request(method, path, json=body)
+        assert_within_budget(response, method, route_path)
+
+
+def test_strict_mode_fails_reads_but_not_committed_writes(client, monkeypatch):
+    monkeypatch.setattr(request_context, "QUERY_BUDGET_STRICT", True)
+    monkeypatch.setitem(request_context.QUERY_BUDGETS, f"POST {PROMPTS}/", 0)
+    monkeypatch.setitem(request_context.QUERY_BUDGETS, f"GET {PROMPTS}/", 0)
+
+    response = client.post(f"{PROMPTS}/", json={"title": "Saved", "content": "body\n"})
+    assert response.status_code == 201
+
+    response = client.get(f"{PROMPTS}/")
+    assert response.status_code == 500
+    assert response.json()["error"] == "QueryBudgetExceeded"
+
+
+def test_background_tasks_are_not_counted(client, monkeypatch):
+    prompt_id = client.post(f"{PROMPTS}/", json={"title": "Prompt", "content": "body\n"}).json()["id"]
+    counts = []
+    monkeypatch.setattr(
+        RequestContextMiddleware, "_report", staticmethod(lambda context, method, path: counts.append(context.count))
+    )
+
+    response = client.delete(f"{PROMPTS}/{prompt_id}")  # frees the version bodies in a background task
+
+    assert counts == [int(response.headers[QUERY_COUNT_HEADER])]
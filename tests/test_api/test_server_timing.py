@@ -0,0 +1,72 @@
+import asyncio
+import re
+
+from app.core import request_context
+from app.core.request_context import SERVER_TIMING, count_queries
+from app.core.timing import span, timed
+
+PROMPTS = "/api/v1/prompts/"
+STAGE = re.compile(r'^(?P<stage>\w+);dur=\d+\.\d{2};desc="(?P<spans>\d+)x"$')
+TOTAL = re.compile(r"^total;dur=(?P<ms>\d+\.\d{2})$")
+
+
+def parse(header: str) -> tuple[dict[str, int], float]:
+    """Server-Timing value -> ({stage: spans}, total ms), asserting every entry is well formed"""
+    *stages, total = header.split(", ")
+    spans = {}
+    for entry in stages:
+        match = STAGE.match(entry)
+        assert match, entry
+        spans[match["stage"]] = int(match["spans"])
+    match = TOTAL.match(total)
+    assert match, total
+    return spans, float(match["ms"])
+
+
+def test_header_lists_each_stage_then_the_total(client):
+    spans, total = parse(client.get(PROMPTS).headers[SERVER_TIMING])
+
+    # the first request loads the user: its lookup is a "db" span inside "auth", the listing is the other one
+    assert spans == {"auth": 1, "db": 2, "serialize": 1}
+    assert total > 0
+
+
+def test_cached_user_skips_the_auth_stage(client):
+    client.get(PROMPTS)
+
+    spans, _ = parse(client.get(PROMPTS).headers[SERVER_TIMING])
+
+    assert spans == {"db": 1, "serialize": 1}
+
+
+def test_header_can_be_switched_off(client, monkeypatch):
+    monkeypatch.setattr(request_context, "SERVER_TIMING_HEADER", False)
+
+    response = client.get(PROMPTS)
+
+    assert SERVER_TIMING not in response.headers
+    assert "X-Query-Count" in response.headers
+
+
+def test_spans_and_timed_functions_add_up_per_stage():
+    @timed("ai")
+    def complete():
+        return "done"
+
+    @timed("ai")
+    async def complete_async():
+        return "done"
+
+    with count_queries() as context:
+        assert complete() == "done"
+        assert asyncio.run(complete_async()) == "done"
+        with span("auth"):
+            pass
+
+    assert {stage: spans for stage, (_, spans) in context.stages.items()} == {"ai": 2, "auth": 1}
+    assert parse(context.server_timing(1.5))[1] == 1.5
+
+
+def test_spans_outside_a_request_are_ignored():
+    with span("ai"):
+        pass  # no current context: nothing to record, and no error
@@ -0,0 +1,75 @@
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+
+from app.core.logging_config import DroppingQueueHandler, JsonFormatter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def record(msg: str, *args, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("promptVault", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def run(code: str) -> list[dict]:
+    """Run `code` in a fresh interpreter and return the JSON log lines it printed before exiting"""
+    env = {**os.environ, "PASSWORD_HASH_WORKERS": "0"}
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return [json.loads(line) for line in result.stdout.splitlines() if line.startswith("{")]
+
+
+def test_queued_records_are_written_before_the_process_exits():
+    lines = run("from app.core.logging_config import logger\nfor i in range(2000): logger.info(f'record {i}')")
+
+    assert [line["message"] for line in lines] == [f"record {i}" for i in range(2000)]
+
+
+def test_shutdown_is_logged():
+    lines = run(
+        "from fastapi.testclient import TestClient\n"
+        "from app.main import app\n"
+        "with TestClient(app): pass\n"
+    )
+
+    assert [line["message"] for line in lines][-2:] == ["Application startup", "Application shutdown"]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(2))
+
+    for i in range(5):
+        handler.emit(record(f"record {i}"))
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_queued_records_keep_their_structured_fields():
+    handler = DroppingQueueHandler(queue.Queue())
+
+    handler.emit(record("%s took %d ms", "GET /", 12, fields={"status": 200}))
+
+    queued = handler.queue.get_nowait()
+    assert (queued.getMessage(), queued.args) == ("GET / took 12 ms", None)
+    line = json.loads(JsonFormatter().format(queued))
+    assert line["message"] == "GET / took 12 ms"
+    assert line["status"] == 200
+    assert line["level"] == "INFO"
+
+
+def test_messages_with_quotes_stay_valid_json():
+    try:
+        raise ValueError('bad "value"')
+    except ValueError:
+        failed = record('said "hi"\nthen left', exc_info=sys.exc_info())
+
+    line = json.loads(JsonFormatter().format(failed))
+
+    assert line["message"] == 'said "hi"\nthen left'
+    assert 'ValueError: bad "value"' in line["exception"]
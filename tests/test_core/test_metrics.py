@@ -0,0 +1,53 @@
+import re
+import subprocess
+import sys
+
+from app.core.metrics import (
+    LATENCY_BUCKETS,
+    METRICS_FILE_SUFFIX,
+    RETIRED_METRICS_FILE,
+    Histogram,
+    MetricsStore,
+    _prometheus_histogram,
+    latency_bucket,
+)
+from app.core.metrics_file import MetricsFile
+
+
+def test_prometheus_buckets_double_from_the_minimum():
+    histogram = Histogram()
+    for duration_ms in (0.04, 0.1, 0.15, 12.8, 5000):
+        histogram.buckets[latency_bucket(duration_ms)] += 1
+
+    lines = _prometheus_histogram("latency", {}, histogram)
+    buckets = {
+        match.group(1): int(match.group(2))
+        for match in (re.search(r'le="([^"]+)"\} (\d+)', line) for line in lines)
+        if match
+    }
+
+    assert list(buckets)[:5] == ["5e-05", "0.0001", "0.0002", "0.0004", "0.0008"]
+    assert buckets["5e-05"] == 1
+    assert buckets["0.0001"] == 2
+    assert buckets["0.0002"] == 3
+    assert buckets["0.0128"] == 4
+    assert buckets["+Inf"] == 5
+
+
+def test_files_of_exited_workers_are_folded_into_one(tmp_path):
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    dead_file = MetricsFile(str(tmp_path / f"worker-{int(exited.stdout)}{METRICS_FILE_SUFFIX}"))
+    dead_file.add(("counter", "requests"), 0, 3)
+    dead_file.observe(("latency", "GET", "/", "2xx"), latency_bucket(900), LATENCY_BUCKETS + 1, 900)
+    dead_file.close()
+
+    store = MetricsStore(str(tmp_path))
+    store.observe_request("GET", "/", 200, 10)
+    before = store.snapshot()
+
+    assert not (tmp_path / f"worker-{int(exited.stdout)}{METRICS_FILE_SUFFIX}").exists()
+    assert (tmp_path / RETIRED_METRICS_FILE).exists()
+    assert before["total_requests"] == 4
+    assert before["latency"]["count"] == 2
+    assert before["latency"]["max_ms"] == 900
+    assert store.snapshot() == before
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.domain_error import ServiceBusyError
+from app.core.password_hasher import PasswordHasher
+
+
+def test_cancelled_caller_keeps_the_slot_until_the_hash_finishes():
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_hash():
+        started.set()
+        finish.wait(5)
+        return b"hash"
+
+    async def scenario():
+        hasher = PasswordHasher(workers=0, max_pending=1, rounds=4)
+        try:
+            task = asyncio.create_task(hasher._run(slow_hash))
+            await asyncio.to_thread(started.wait, 5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            # the cancelled hash is still running, so it still counts
+            with pytest.raises(ServiceBusyError):
+                await hasher._run(lambda: b"other")
+
+            finish.set()
+            for _ in range(100):
+                if hasher._pending == 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert await hasher._run(lambda: b"other") == b"other"
+        finally:
+            finish.set()
+            hasher.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,28 @@
+import time
+
+from starlette.requests import Request
+
+from app.core.config import READ_YOUR_WRITES_SECONDS
+from app.core.replica_router import LAST_WRITE_COOKIE, LAST_WRITE_HEADER, wrote_recently
+
+
+def request_with(headers: dict) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def test_recent_write_from_header_or_cookie():
+    now = f"{time.time():.3f}"
+    assert wrote_recently(request_with({LAST_WRITE_HEADER: now}))
+    assert wrote_recently(request_with({"Cookie": f"{LAST_WRITE_COOKIE}={now}"}))
+
+
+def test_old_future_missing_or_malformed_writes_are_not_recent():
+    assert not wrote_recently(request_with({LAST_WRITE_HEADER: str(time.time() - READ_YOUR_WRITES_SECONDS - 1)}))
+    assert not wrote_recently(request_with({LAST_WRITE_HEADER: str(time.time() + READ_YOUR_WRITES_SECONDS + 1)}))
+    assert not wrote_recently(request_with({}))
+    assert not wrote_recently(request_with({LAST_WRITE_HEADER: "yesterday"}))
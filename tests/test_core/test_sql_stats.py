@@ -0,0 +1,64 @@
+import logging
+
+import pytest
+from sqlalchemy import select
+
+import app.main  # noqa: F401  installs the SQL instrumentation on the engines
+from app.core import request_context, sql_stats
+from app.core.config import N_PLUS_ONE_THRESHOLD
+from app.core.request_context import count_queries
+from app.core.sql_stats import SqlStats, normalize_statement, report_repeated_statements
+from app.models import Prompt
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    """SQL stats switched on, into an empty store"""
+    stats = SqlStats(100)
+    monkeypatch.setattr(request_context, "SQL_STATS_ENABLED", True)
+    monkeypatch.setattr(sql_stats, "sql_stats", stats)
+    return stats
+
+
+@pytest.mark.parametrize("statement, normalized", [
+    ("SELECT * FROM prompts WHERE id = 42", "SELECT * FROM prompts WHERE id = ?"),
+    ("SELECT *\n  FROM prompts WHERE title = 'it''s'", "SELECT * FROM prompts WHERE title = ?"),
+    ("SELECT * FROM prompts WHERE id IN (?, ?, ?)", "SELECT * FROM prompts WHERE id IN (...)"),
+    ("SELECT * FROM prompts WHERE id IN (%(id_1)s, %(id_2)s)", "SELECT * FROM prompts WHERE id IN (...)"),
+    ("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4), ($5, $6)", "INSERT INTO t (a, b) VALUES (...), ..."),
+    ("SELECT x2, -1.5 FROM t", "SELECT x2, ? FROM t"),
+])
+def test_statements_are_grouped_without_their_values(statement, normalized):
+    assert normalize_statement(statement) == normalized
+
+
+def test_looped_query_is_reported_as_n_plus_one(db, user, stats, caplog):
+    prompts = [Prompt(title=f"Prompt {i}", content="", user_id=user.id) for i in range(N_PLUS_ONE_THRESHOLD)]
+    db.add_all(prompts)
+    db.commit()
+    ids = [prompt.id for prompt in prompts]
+
+    with count_queries() as context:
+        for prompt_id in ids:
+            db.scalar(select(Prompt.title).where(Prompt.id == prompt_id))
+        db.scalar(select(Prompt.content).where(Prompt.id == ids[0]))
+
+    with caplog.at_level(logging.WARNING, logger="promptVault"):
+        report_repeated_statements("GET /api/v1/prompts/", context.repeats)
+
+    (warning,) = [record.getMessage() for record in caplog.records if "N+1" in record.getMessage()]
+    assert warning.startswith(f"Possible N+1: GET /api/v1/prompts/ ran {N_PLUS_ONE_THRESHOLD}x: SELECT prompts.title")
+    (looped,) = [entry for entry in stats.top(10) if entry["n_plus_one_requests"]]
+    assert looped["statement"].startswith("SELECT prompts.title")
+    assert looped["calls"] == N_PLUS_ONE_THRESHOLD
+
+
+def test_statements_below_the_threshold_are_not_reported(stats, caplog):
+    repeats = {"SELECT ? FROM t": N_PLUS_ONE_THRESHOLD - 1}
+
+    with caplog.at_level(logging.WARNING, logger="promptVault"):
+        report_repeated_statements("GET /", repeats)
+
+    assert not caplog.records
+    assert stats.top(10) == []
+
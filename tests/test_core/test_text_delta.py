@@ -0,0 +1,51 @@
+import pytest
+
+from app.core.text_delta import apply_delta, make_delta, pack, tokenize, unpack
+
+TEXTS = [
+    "",
+    "one",
+    "Summarize the following email in three bullet points.",
+    "  leading and trailing whitespace  \n",
+    "tabs\tand\nnew\r\nlines\n\n\nkept exactly",
+    "unicode: café, naïve, 日本語, emoji 🚀",
+    "word " * 500,
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_tokenize_concatenates_back(text):
+    assert "".join(tokenize(text)) == text
+
+
+@pytest.mark.parametrize("base", TEXTS)
+@pytest.mark.parametrize("target", TEXTS)
+def test_delta_round_trip(base, target):
+    delta = make_delta(base, target)
+    assert apply_delta(base, delta) == target
+
+
+def test_delta_of_small_edit_copies_unchanged_ranges():
+    base = "You are a helpful assistant. Answer briefly and cite sources."
+    target = "You are a helpful assistant. Answer in detail and cite sources."
+    delta = make_delta(base, target)
+
+    assert apply_delta(base, delta) == target
+    assert [op for op in delta if isinstance(op, str)] == ["in detail "]
+
+
+def test_delta_against_empty_base_is_the_target():
+    assert make_delta("", "new text") == ["new text"]
+
+
+@pytest.mark.parametrize("value", ["", "body text 🚀", [[0, 3], "inserted ", [5, 9]], []])
+def test_pack_round_trip(value):
+    data = pack(value)
+    assert isinstance(data, bytes)
+    assert unpack(data) == value
+
+
+def test_packed_delta_round_trip():
+    base = "line one\nline two\nline three\n"
+    target = "line one\nline 2\nline three\nline four\n"
+    assert apply_delta(base, unpack(pack(make_delta(base, target)))) == target
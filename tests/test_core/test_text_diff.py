@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from app.core.text_diff import DELETE, EQUAL, INSERT, DiffTooLarge, myers_diff, split_tokens
+
+
+def edit_distance(a, b) -> int:
+    """Insertions plus deletions of a shortest edit script, via the LCS table"""
+    lcs = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) - 1, -1, -1):
+        for j in range(len(b) - 1, -1, -1):
+            lcs[i][j] = lcs[i + 1][j + 1] + 1 if a[i] == b[j] else max(lcs[i + 1][j], lcs[i][j + 1])
+    return len(a) + len(b) - 2 * lcs[0][0]
+
+
+def check_opcodes(a, b, opcodes):
+    """Opcodes cover both sequences in order and turn `a` into `b`"""
+    i = j = 0
+    rebuilt = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == EQUAL:
+            assert a[i1:i2] == b[j1:j2]
+            rebuilt.extend(a[i1:i2])
+        elif tag == DELETE:
+            assert j1 == j2
+        else:
+            assert tag == INSERT and i1 == i2
+            rebuilt.extend(b[j1:j2])
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    assert rebuilt == list(b)
+    assert all(x[0] != y[0] for x, y in zip(opcodes, opcodes[1:]))
+
+
+def edits(opcodes) -> int:
+    return sum(i2 - i1 if tag == DELETE else j2 - j1 for tag, i1, i2, j1, j2 in opcodes if tag != EQUAL)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("", ""),
+    ("abc", ""),
+    ("", "abc"),
+    ("abc", "abc"),
+    ("abcabba", "cbabac"),
+    ("kitten", "sitting"),
+    ("aaaa", "aa"),
+])
+def test_myers_diff_is_a_shortest_edit_script(a, b):
+    opcodes = myers_diff(a, b)
+    check_opcodes(a, b, opcodes)
+    assert edits(opcodes) == edit_distance(a, b)
+
+
+def test_myers_diff_random_inputs():
+    rng = random.Random(7)
+    for _ in range(200):
+        a = [rng.choice("abcd") for _ in range(rng.randint(0, 30))]
+        b = [rng.choice("abcd") for _ in range(rng.randint(0, 30))]
+        opcodes = myers_diff(a, b)
+        check_opcodes(a, b, opcodes)
+        assert edits(opcodes) == edit_distance(a, b)
+
+
+def test_myers_diff_within_max_edits_is_unchanged():
+    a = split_tokens("one\ntwo\nthree\nfour\n", "line")
+    b = split_tokens("one\n2\nthree\nfour\nfive\n", "line")
+    assert myers_diff(a, b, max_edits=3) == myers_diff(a, b)
+
+
+@pytest.mark.parametrize("max_edits", [0, 1, 2])
+def test_myers_diff_gives_up_beyond_max_edits(max_edits):
+    a = split_tokens("one\ntwo\nthree\nfour\n", "line")
+    b = split_tokens("one\n2\nthree\nfour\nfive\n", "line")
+    with pytest.raises(DiffTooLarge):
+        myers_diff(a, b, max_edits=max_edits)
+
+
+def test_myers_diff_gives_up_quickly_on_unrelated_inputs():
+    a = [f"a{i}\n" for i in range(5000)]
+    b = [f"b{i}\n" for i in range(5000)]
+    with pytest.raises(DiffTooLarge):
+        myers_diff(a, b, max_edits=100)
+
+
+def test_split_tokens_round_trip():
+    text = "first line\n  indented line\n\nlast line without newline"
+    for granularity in ("line", "word"):
+        assert "".join(split_tokens(text, granularity)) == text
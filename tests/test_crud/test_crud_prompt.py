@@ -0,0 +1,98 @@
+from app.crud import (
+    create_prompt,
+    delete_prompt,
+    delete_prompts,
+    get_user_prompt,
+    iter_prompt_tombstones,
+    purge_deleted_prompts,
+    soft_delete_prompts,
+    update_prompt,
+)
+from app.models import Prompt, PromptTombstone, PromptVersion, User, UserStats, VersionContent
+from app.schemas.prompt import PromptCreate, PromptUpdate
+
+
+def new_prompt(db, user, title="Prompt", content="body\n"):
+    return create_prompt(db, PromptCreate(title=title, content=content), user.id, embedding=[0.0])
+
+
+def test_deleting_a_reused_id_refreshes_its_tombstone(db, user):
+    first = new_prompt(db, user)
+    first_id = first.id
+    delete_prompt(db, first_id)
+    deleted_at = db.get(PromptTombstone, first_id).deleted_at
+
+    second = new_prompt(db, user)
+    assert second.id == first_id  # SQLite reuses the highest rowid once it's deleted
+    assert delete_prompt(db, second.id) is not None
+
+    db.expire_all()
+    assert db.query(PromptTombstone).count() == 1
+    assert db.get(PromptTombstone, first_id).deleted_at >= deleted_at
+    assert [t["id"] for t in iter_prompt_tombstones(db, user.id, deleted_at)] == [first_id]
+
+
+def stats(db, user):
+    db.expire_all()
+    row = db.get(UserStats, user.id)
+    return row.prompt_count, row.version_count
+
+
+def test_delete_removes_the_prompt_and_its_versions(db, user):
+    kept = new_prompt(db, user, "Kept")
+    doomed = new_prompt(db, user, "Doomed", "only here\n")
+    doomed_id = doomed.id
+    update_prompt(db, doomed_id, PromptUpdate(content="only here\nand here\n"), user.id, embedding=[0.0])
+
+    content_hashes = delete_prompt(db, doomed_id)
+
+    assert len(content_hashes) == 2
+    assert db.get(Prompt, doomed_id) is None
+    assert db.query(PromptVersion).filter(PromptVersion.prompt_id == doomed_id).count() == 0
+    assert stats(db, user) == (1, 1)
+    assert db.get(PromptTombstone, doomed_id).user_id == user.id
+    assert delete_prompt(db, doomed_id) is None
+    assert db.get(Prompt, kept.id) is not None
+
+
+def test_bulk_delete_only_touches_the_users_prompts(db, user):
+    other = User(email="other@example.com", hashed_password=b"not-a-real-hash")
+    db.add(other)
+    db.commit()
+    mine = [new_prompt(db, user, f"Mine {i}").id for i in range(3)]
+    theirs = new_prompt(db, other, "Theirs").id
+
+    deleted, _ = delete_prompts(db, user.id, [mine[0], mine[1], theirs, 12345])
+
+    assert sorted(deleted) == mine[:2]
+    assert db.get(Prompt, theirs) is not None
+    assert stats(db, user) == (1, 1)
+    assert {t.prompt_id for t in db.query(PromptTombstone)} == set(mine[:2])
+
+
+def test_soft_delete_hides_the_prompt_until_it_is_purged(db, user):
+    prompt_id = new_prompt(db, user).id
+
+    assert soft_delete_prompts(db, user.id, [prompt_id]) == [prompt_id]
+    assert soft_delete_prompts(db, user.id, [prompt_id]) == []  # already gone
+    assert get_user_prompt(db, prompt_id, user.id) is None
+    assert stats(db, user) == (0, 0)
+
+    assert purge_deleted_prompts(db) == 1
+    assert db.get(Prompt, prompt_id) is None
+    assert db.query(PromptVersion).count() == 0
+    assert db.query(VersionContent).count() == 0
+
+
+def test_hard_delete_after_soft_delete_counts_the_prompt_once(db, user):
+    first, second = new_prompt(db, user, "First").id, new_prompt(db, user, "Second").id
+    soft_delete_prompts(db, user.id, [first, second])
+
+    deleted, content_hashes = delete_prompts(db, user.id, [first])
+    assert deleted == []
+    assert content_hashes
+    assert delete_prompt(db, second) is not None
+
+    assert db.query(Prompt).count() == 0
+    assert stats(db, user) == (0, 0)
+    assert db.query(PromptTombstone).count() == 2
@@ -0,0 +1,35 @@
+from app.crud import create_user, get_user_stats, rebuild_user_stats, record_prompt_changes
+from app.models import Prompt, UserStats
+from app.schemas.user import UserCreate
+
+
+def test_signup_creates_the_stats_row(db):
+    user = create_user(db, UserCreate(email="new@example.com", password="secret123"), hashed_password=b"hash")
+
+    stats = db.get(UserStats, user.id)
+    assert (stats.prompt_count, stats.version_count, stats.recent_prompts) == (0, 0, [])
+
+
+def test_rebuild_creates_a_missing_row_and_repairs_an_existing_one(db, user):
+    db.add_all([Prompt(title=f"Prompt {i}", content="", user_id=user.id, version_count=2) for i in range(3)])
+    db.commit()
+
+    payload = rebuild_user_stats(db, user.id)
+    db.commit()
+    assert (payload["total_prompts"], payload["total_versions"]) == (3, 6)
+
+    db.query(UserStats).filter(UserStats.user_id == user.id).update({"prompt_count": 99})
+    db.commit()
+    rebuild_user_stats(db, user.id)
+    db.commit()
+    db.expire_all()
+    assert db.get(UserStats, user.id).prompt_count == 3
+
+
+def test_first_write_without_a_row_builds_it(db, user, prompt):
+    record_prompt_changes(db, user.id, versions=1, touched=[(prompt.id, prompt.title, prompt.updated_at)])
+    db.commit()
+
+    payload = get_user_stats(db, user.id)
+    assert payload["total_prompts"] == 1
+    assert [entry["id"] for entry in payload["recent_prompts"]] == [prompt.id]
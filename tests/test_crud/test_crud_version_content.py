@@ -0,0 +1,195 @@
+import pytest
+from sqlalchemy import event, func, select
+
+from app.core.config import VERSION_SNAPSHOT_INTERVAL
+from app.core.database import SessionLocal, engine
+from app.crud.crud_version_content import (
+    _content_cache,
+    delete_unreferenced_version_contents,
+    get_version_contents,
+    hash_content,
+    load_version_contents,
+    store_version_content,
+    store_version_contents,
+)
+from app.models import PromptVersion, VersionContent
+
+BASE_TEXT = " ".join(f"word{i}" for i in range(200))
+
+
+def edited(i: int) -> str:
+    """Version i of a long prompt: the base text with one more word changed each time"""
+    words = BASE_TEXT.split(" ")
+    for j in range(i):
+        words[j * 3] = f"edit{j}"
+    return " ".join(words)
+
+
+def store_chain(db, count: int) -> list[str]:
+    """Store `count` successive versions, each against the previous one"""
+    hashes, base = [], None
+    for i in range(count):
+        base = store_version_content(db, edited(i), base)
+        hashes.append(base)
+    db.commit()
+    return hashes
+
+
+def add_versions(db, prompt, hashes: list[str]):
+    for number, content_hash in enumerate(hashes, start=1):
+        db.add(PromptVersion(
+            prompt_id=prompt.id, version_number=number, content_hash=content_hash, user_id=prompt.user_id
+        ))
+    db.commit()
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    _content_cache.clear()
+    yield
+    _content_cache.clear()
+
+
+@pytest.fixture
+def statements():
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_chain_restarts_with_a_snapshot_every_interval(db):
+    count = VERSION_SNAPSHOT_INTERVAL * 2 + 3
+    hashes = store_chain(db, count)
+
+    rows = {row.hash: row for row in db.scalars(select(VersionContent))}
+    depths = [rows[h].depth for h in hashes]
+    assert depths == [i % VERSION_SNAPSHOT_INTERVAL for i in range(count)]
+    for h, depth in zip(hashes, depths):
+        assert (rows[h].base_hash is None) == (depth == 0)
+
+
+def test_load_rebuilds_every_version_across_snapshots(db, statements):
+    count = VERSION_SNAPSHOT_INTERVAL * 2 + 3
+    hashes = store_chain(db, count)
+    _content_cache.clear()
+
+    statements.clear()
+    contents = load_version_contents(db, hashes)
+
+    assert [contents[h] for h in hashes] == [edited(i) for i in range(count)]
+    assert len(statements) == 1  # every chain in one recursive query
+
+
+@pytest.mark.parametrize("position", [0, VERSION_SNAPSHOT_INTERVAL - 1, VERSION_SNAPSHOT_INTERVAL, -1])
+def test_load_single_version_walks_its_own_chain(db, position):
+    count = VERSION_SNAPSHOT_INTERVAL * 2 + 3
+    hashes = store_chain(db, count)
+    _content_cache.clear()
+
+    target = hashes[position]
+    assert load_version_contents(db, [target])[target] == edited(range(count)[position])
+
+
+def test_load_uses_cache_without_querying(db, statements):
+    hashes = store_chain(db, 3)
+
+    statements.clear()
+    contents = load_version_contents(db, hashes)
+
+    assert [contents[h] for h in hashes] == [edited(i) for i in range(3)]
+    assert statements == []
+
+
+def test_identical_bodies_are_stored_once(db):
+    first = store_version_content(db, "same body")
+    second = store_version_content(db, "same body", first)
+    db.commit()
+
+    assert first == second == hash_content("same body")
+    assert db.scalar(select(func.count()).select_from(VersionContent)) == 1
+
+
+def test_bulk_store_dedupes_within_and_across_calls(db):
+    first = store_version_contents(db, ["a", "b", "a"])
+    second = store_version_contents(db, ["b", "c"])
+    db.commit()
+
+    assert first == [hash_content("a"), hash_content("b"), hash_content("a")]
+    assert second == [hash_content("b"), hash_content("c")]
+    assert db.scalar(select(func.count()).select_from(VersionContent)) == 3
+
+
+def test_bulk_store_skips_bodies_stored_concurrently(db):
+    raced = []
+
+    def store_elsewhere_first(orm_execute_state):
+        # another import saves the body after this one checked for it, before it inserts
+        if orm_execute_state.is_insert and not raced:
+            raced.append(True)
+            other = SessionLocal()
+            store_version_contents(other, ["shared"])
+            other.commit()
+            other.close()
+
+    event.listen(db, "do_orm_execute", store_elsewhere_first)
+    hashes = store_version_contents(db, ["shared", "own"])
+    db.commit()
+    event.remove(db, "do_orm_execute", store_elsewhere_first)
+
+    assert load_version_contents(db, hashes) == {hash_content("shared"): "shared", hash_content("own"): "own"}
+
+
+def test_legacy_versions_keep_their_inline_content(db, prompt):
+    content_hash = store_version_content(db, "stored body")
+    legacy = PromptVersion(prompt_id=prompt.id, version_number=1, content="legacy body", user_id=prompt.user_id)
+    stored = PromptVersion(prompt_id=prompt.id, version_number=2, content_hash=content_hash, user_id=prompt.user_id)
+    db.add_all([legacy, stored])
+    db.commit()
+    _content_cache.clear()
+
+    assert get_version_contents(db, [legacy, stored]) == ["legacy body", "stored body"]
+
+
+def test_unreferenced_contents_are_deleted_down_the_chain(db, prompt):
+    hashes = store_chain(db, VERSION_SNAPSHOT_INTERVAL + 3)
+    add_versions(db, prompt, hashes)
+    orphan = store_version_content(db, "never used by a version")
+    db.commit()
+
+    # only the orphan goes while every version still exists
+    assert delete_unreferenced_version_contents(db, batch_size=2) == 1
+
+    # dropping the newest versions frees their rows, but not the bases older versions need
+    db.query(PromptVersion).filter(PromptVersion.version_number > 2).delete()
+    db.commit()
+    assert delete_unreferenced_version_contents(db, batch_size=2) == len(hashes) - 2
+    remaining = set(db.scalars(select(VersionContent.hash)))
+    assert remaining == set(hashes[:2])
+    assert orphan not in remaining
+
+    _content_cache.clear()
+    contents = load_version_contents(db, hashes[:2])
+    assert [contents[h] for h in hashes[:2]] == [edited(0), edited(1)]
+
+    db.query(PromptVersion).delete()
+    db.commit()
+    assert delete_unreferenced_version_contents(db) == 2
+    assert db.scalar(select(func.count()).select_from(VersionContent)) == 0
+
+
+def test_deleting_given_hashes_follows_their_chains(db, prompt):
+    hashes = store_chain(db, VERSION_SNAPSHOT_INTERVAL + 3)
+    add_versions(db, prompt, hashes)
+    unrelated = store_version_content(db, "orphan the targeted run doesn't look at")
+    db.commit()
+
+    db.query(PromptVersion).delete()
+    db.commit()
+    # only the tips are passed in; their bases are found through base_hash
+    assert delete_unreferenced_version_contents(db, [hashes[-1], hashes[VERSION_SNAPSHOT_INTERVAL - 1]]) == len(hashes)
+    assert set(db.scalars(select(VersionContent.hash))) == {unrelated}
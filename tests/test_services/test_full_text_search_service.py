@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql
+
+from app.core.pagination import decode_search_cursor, next_search_cursor
+from app.models import Prompt
+from app.services import full_text_search_service
+from app.services.full_text_search_service import FullTextSearchService, postgres_ranked_page
+
+
+@pytest.fixture
+def db(migrated_db):
+    if not full_text_search_service._fts_ready.get("sqlite"):
+        pytest.skip("this SQLite build has no FTS5")
+    return migrated_db
+
+
+def add_prompts(db, user, *titles, content="shared body text"):
+    prompts = [Prompt(title=title, content=content, user_id=user.id) for title in titles]
+    db.add_all(prompts)
+    db.commit()
+    return prompts
+
+
+def all_pages(db, user, query, limit):
+    """Follow the cursors the endpoint would hand out, through their JSON encoding"""
+    service = FullTextSearchService(db)
+    ids, after = [], None
+    while True:
+        results = service.search(user.id, query, limit=limit, after=after)
+        ids.extend(prompt.id for prompt, _, _ in results)
+        cursor = next_search_cursor(results, limit)
+        if cursor is None:
+            return ids
+        after = decode_search_cursor(cursor)
+
+
+def test_best_match_first(db, user):
+    add_prompts(db, user, "Other", content="nothing relevant")
+    summarize = add_prompts(db, user, "Summarize", content="summarize this")[0]
+    body = add_prompts(db, user, "Notes", content="please summarize the notes")[0]
+
+    results = FullTextSearchService(db).search(user.id, "summarize")
+
+    assert [prompt.id for prompt, _, _ in results] == [summarize.id, body.id]
+    assert "<mark>" in results[0][2]
+
+
+def test_cursor_pages_through_tied_ranks_once(db, user):
+    prompts = add_prompts(db, user, *[f"Prompt {i}" for i in range(7)])
+
+    ids = all_pages(db, user, "shared", limit=3)
+
+    assert ids == sorted((p.id for p in prompts), reverse=True)
+
+
+def test_cursor_past_the_last_page_is_empty(db, user):
+    add_prompts(db, user, "One", "Two")
+    results = FullTextSearchService(db).search(user.id, "shared", limit=2)
+    last_prompt, rank, _ = results[-1]
+
+    assert FullTextSearchService(db).search(user.id, "shared", limit=2, after=(rank, last_prompt.id)) == []
+
+
+def test_deleted_and_other_users_prompts_are_not_found(db, user):
+    deleted = add_prompts(db, user, "Deleted")[0]
+    deleted.deleted_at = func.now()
+    db.commit()
+
+    assert FullTextSearchService(db).search(user.id + 1, "shared") == []
+    assert FullTextSearchService(db).search(user.id, "shared") == []
+
+
+def test_postgres_rank_is_compared_as_double_precision():
+    stmt = postgres_ranked_page(1, func.websearch_to_tsquery("english", "x"), 0, 10, (0.1, 5))
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    rank = "CAST(ts_rank_cd(prompts.search_vector, websearch_to_tsquery("
+    assert f"SELECT prompts.id, {rank}" in sql
+    assert f"({rank}" in sql.split("WHERE", 1)[1]  # the keyset comparison
+    assert sql.count("AS FLOAT(53))") == 3
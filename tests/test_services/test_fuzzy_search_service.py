@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models import Prompt
+from app.services import fuzzy_search_service
+from app.services.fuzzy_search_service import FuzzySearchService, TrigramIndexCache, postgres_title_matches
+
+
+@pytest.fixture(autouse=True)
+def empty_index_cache(monkeypatch):
+    monkeypatch.setattr(fuzzy_search_service, "trigram_indexes", TrigramIndexCache(10))
+
+
+def add_prompts(db, user, *titles):
+    prompts = [Prompt(title=title, content="", user_id=user.id) for title in titles]
+    db.add_all(prompts)
+    db.commit()
+    return prompts
+
+
+def titles(results) -> list[str]:
+    return [prompt.title for prompt, _ in results]
+
+
+def test_typos_rank_the_closest_title_first(db, user):
+    add_prompts(db, user, "Meeting notes summary", "Summarize a meeting", "Translate to French", "Weekly report")
+
+    results = FuzzySearchService(db).search_titles(user.id, "sumary")
+
+    assert titles(results)[0] == "Meeting notes summary"
+    assert "Translate to French" not in titles(results)
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+
+def test_prefix_matches_title_starts_only(db, user):
+    add_prompts(db, user, "Email reply", "Email follow-up", "Reply by email")
+
+    results = FuzzySearchService(db).search_titles(user.id, "ema", prefix=True)
+
+    assert sorted(titles(results)) == ["Email follow-up", "Email reply"]
+
+
+def test_cursor_pages_through_tied_scores_once(db, user):
+    prompts = add_prompts(db, user, *["Invoice reminder"] * 5)
+    service = FuzzySearchService(db)
+
+    seen, after = [], None
+    while True:
+        page = service.search_titles(user.id, "invoice", limit=2, after=after)
+        if not page:
+            break
+        seen.extend(prompt.id for prompt, _ in page)
+        after = (page[-1][1], page[-1][0].id)
+
+    assert seen == sorted((p.id for p in prompts), reverse=True)
+
+
+def test_index_is_reused_until_titles_change(db, user):
+    cache = TrigramIndexCache(10)
+    prompt = add_prompts(db, user, "First title")[0]
+    index = cache.get(db, user.id)
+    assert cache.get(db, user.id) is index
+
+    add_prompts(db, user, "Second title")
+    index = cache.get(db, user.id)
+    assert len(index.grams) == 2
+
+    prompt.title = "Renamed"
+    prompt.updated_at = datetime.utcnow() + timedelta(seconds=1)
+    db.commit()
+    renamed = cache.get(db, user.id)
+    assert renamed is not index
+    assert renamed.search("renamed", 0.4)
+
+    prompt.deleted_at = datetime.utcnow()
+    db.commit()
+    assert set(cache.get(db, user.id).grams) == set(renamed.grams) - {prompt.id}
+
+
+def test_postgres_scores_are_compared_as_double_precision():
+    for prefix in (False, True):
+        sql = str(postgres_title_matches(1, "x", prefix, 0, 10, (0.5, 3)).compile(dialect=postgresql.dialect()))
+
+        assert sql.count("AS FLOAT(53))") == 3  # selected, compared with the cursor, ordered by
+        assert "AS FLOAT(53)), prompts.id) <" in sql
@@ -0,0 +1,79 @@
+import pytest
+
+from app.core.domain_error import DiffTooLargeError
+from app.services.version_diff_service import build_hunks
+
+
+def lines(*values) -> str:
+    return "".join(f"{value}\n" for value in values)
+
+
+def apply_hunks(old: str, diff: dict) -> str:
+    """Rebuild the new text from the old one and the hunks (line granularity)"""
+    old_lines = old.splitlines(keepends=True)
+    result, position = [], 0
+    for hunk in diff["hunks"]:
+        start = hunk["from_start"] - 1
+        result.extend(old_lines[position:start])
+        result.extend(change["text"] for change in hunk["changes"] if change["op"] != "delete")
+        position = start + hunk["from_count"]
+    result.extend(old_lines[position:])
+    return "".join(result)
+
+
+def test_single_change_with_context():
+    old = lines(*range(1, 11))
+    new = old.replace("5\n", "five\n")
+    diff = build_hunks(old, new, context=2)
+
+    assert diff["exact"] is True
+    assert (diff["insertions"], diff["deletions"]) == (1, 1)
+    assert len(diff["hunks"]) == 1
+    hunk = diff["hunks"][0]
+    assert (hunk["from_start"], hunk["from_count"], hunk["to_start"], hunk["to_count"]) == (3, 5, 3, 5)
+    assert [c["op"] for c in hunk["changes"]] == ["equal", "delete", "insert", "equal"]
+    assert apply_hunks(old, diff) == new
+
+
+def test_distant_changes_get_separate_hunks():
+    old = lines(*range(1, 31))
+    new = old.replace("2\n", "two\n", 1).replace("28\n", "twenty-eight\n")
+    diff = build_hunks(old, new, context=3)
+
+    assert len(diff["hunks"]) == 2
+    assert apply_hunks(old, diff) == new
+
+
+def test_identical_texts_have_no_hunks():
+    text = lines("a", "b", "c")
+    assert build_hunks(text, text) == {"insertions": 0, "deletions": 0, "exact": True, "hunks": []}
+
+
+def test_word_granularity():
+    diff = build_hunks("the quick brown fox", "the slow brown fox", granularity="word", context=1)
+    changes = diff["hunks"][0]["changes"]
+    assert changes == [
+        {"op": "equal", "text": "the "},
+        {"op": "delete", "text": "quick "},
+        {"op": "insert", "text": "slow "},
+        {"op": "equal", "text": "brown "},
+    ]
+
+
+def test_too_many_edits_fall_back_to_one_replacement():
+    old = lines("header", *(f"old {i}" for i in range(50)), "footer")
+    new = lines("header", *(f"new {i}" for i in range(60)), "footer")
+    diff = build_hunks(old, new, context=1, max_edits=10)
+
+    assert diff["exact"] is False
+    assert (diff["insertions"], diff["deletions"]) == (60, 50)
+    assert len(diff["hunks"]) == 1
+    assert [c["op"] for c in diff["hunks"][0]["changes"]] == ["equal", "delete", "insert", "equal"]
+    assert apply_hunks(old, diff) == new
+
+
+def test_oversized_inputs_are_rejected():
+    old = lines(*range(60))
+    with pytest.raises(DiffTooLargeError) as error:
+        build_hunks(old, old, max_tokens=100)
+    assert error.value.status_code == 413